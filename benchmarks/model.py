@@ -0,0 +1,122 @@
+"""Benchmarks of the likelihood, model construction, simulation and visualization.
+
+The benchmarks are written for `asv <https://asv.readthedocs.io>`_. Methods that
+start with time\\_ measure the run time, methods that start with peakmem\\_ the peak
+memory. Results are stored in benchmarks/results (see asv.conf.json), which is
+under version control, so releases can be compared with::
+
+    asv run v0.1.0..HEAD
+    asv compare v0.1.0 HEAD
+
+Commit the new files in benchmarks/results after a benchmark run of a release.
+The environments and html pages are built in the ignored .asv directory.
+
+"""
+import tempfile
+
+from benchmarks.synthetic import placeholder_dataset
+from benchmarks.synthetic import synthetic_data
+from benchmarks.synthetic import synthetic_model
+from benchmarks.synthetic import synthetic_model_dict
+from skillmodels import SkillModel
+from skillmodels.estimation.likelihood_function import log_likelihood_contributions
+
+
+class LikelihoodBySize:
+    """Likelihood for growing samples and numbers of factors."""
+
+    params = ([1_000, 10_000, 100_000], [1, 3, 5])
+    param_names = ["nobs", "nfac"]
+    timeout = 1200
+
+    def setup(self, nobs, nfac):
+        mod, params = synthetic_model(nobs, nfac=nfac)
+        self.params = params["value"]
+        self.args = mod.likelihood_arguments_dict()
+
+    def time_log_likelihood_contributions(self, nobs, nfac):
+        log_likelihood_contributions(self.params, **self.args)
+
+    def peakmem_log_likelihood_contributions(self, nobs, nfac):
+        log_likelihood_contributions(self.params, **self.args)
+
+
+class LikelihoodByStructure:
+    """Likelihood for different model structures at a fixed sample size."""
+
+    params = ([2, 8], [1, 2], [1, 3, 6], ["linear", "log_ces", "translog"])
+    param_names = ["nperiods", "nmixtures", "nmeas", "transition"]
+    timeout = 1200
+
+    def setup(self, nperiods, nmixtures, nmeas, transition):
+        mod, params = synthetic_model(
+            5_000,
+            nperiods=nperiods,
+            nmixtures=nmixtures,
+            nmeas=nmeas,
+            transition=transition,
+        )
+        self.params = params["value"]
+        self.args = mod.likelihood_arguments_dict()
+
+    def time_log_likelihood_contributions(self, nperiods, nmixtures, nmeas, transition):
+        log_likelihood_contributions(self.params, **self.args)
+
+
+class ModelConstruction:
+    """Processing of the model specification and the data."""
+
+    params = ([1_000, 100_000], [1, 3, 5])
+    param_names = ["nobs", "nfac"]
+    timeout = 1200
+
+    def setup(self, nobs, nfac):
+        self.model_dict, self.data, _ = synthetic_data(nobs, nfac=nfac)
+        self.mod = SkillModel(model_dict=self.model_dict, dataset=self.data)
+
+    def time_init(self, nobs, nfac):
+        SkillModel(model_dict=self.model_dict, dataset=self.data)
+
+    def peakmem_init(self, nobs, nfac):
+        SkillModel(model_dict=self.model_dict, dataset=self.data)
+
+    def time_generate_full_start_params(self, nobs, nfac):
+        self.mod.generate_full_start_params()
+
+
+class Simulation:
+    """Simulation of datasets from a model."""
+
+    params = ([1_000, 100_000], [1, 3, 5])
+    param_names = ["nobs", "nfac"]
+    timeout = 1200
+
+    def setup(self, nobs, nfac):
+        model_dict = synthetic_model_dict(nfac=nfac)
+        placeholder = placeholder_dataset(model_dict)
+        self.mod = SkillModel(model_dict=model_dict, dataset=placeholder)
+        self.params = self.mod.generate_full_start_params()
+
+    def time_simulate(self, nobs, nfac):
+        self.mod.simulate(nobs=nobs, params=self.params)
+
+    def peakmem_simulate(self, nobs, nfac):
+        self.mod.simulate(nobs=nobs, params=self.params)
+
+
+class Visualization:
+    """Generation of all plots and tables of visualize_model."""
+
+    params = [2, 3]
+    param_names = ["nfac"]
+    timeout = 3600
+
+    def setup(self, nfac):
+        self.mod, _ = synthetic_model(500, nfac=nfac, nperiods=3)
+        self.tempdir = tempfile.TemporaryDirectory()
+
+    def teardown(self, nfac):
+        self.tempdir.cleanup()
+
+    def time_visualize_model(self, nfac):
+        self.mod.visualize_model(self.tempdir.name)
@@ -0,0 +1,250 @@
+"""Fail if the throughput of the likelihood dropped compared to a stored baseline.
+
+The gate replays a fixed set of likelihood evaluations on the regression models
+in skillmodels/tests/regression and calls the hot kernels (sqrt_linear_update,
+array_qr and the transition functions) on fixed inputs. For each workload it
+measures the evaluations per second and compares them to a baseline that was
+recorded on the same machine::
+
+    python -m benchmarks.regression_gate --update      # record the baseline
+    python -m benchmarks.regression_gate               # compare to the baseline
+    python -m benchmarks.regression_gate --tolerance 0.1
+
+The exit code is 1 if any workload is slower than (1 - tolerance) times its
+baseline and 2 if there is no baseline for the machine, such that a gate without
+baseline never passes silently. Set SKILLMODELS_GATE_MACHINE to a stable name of
+the machine, e.g. of the CI runner, to tell machines with the same architecture
+apart. Baselines are stored per machine in
+benchmarks/regression_gate_baselines.json, which is under version control.
+Commit it after recording the baseline of a new machine.
+
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.traversal import REGRESSION_DIR
+from skillmodels import SkillModel
+from skillmodels.estimation.likelihood_function import log_likelihood_contributions
+from skillmodels.fast_routines.kalman_filters import sqrt_linear_update
+from skillmodels.fast_routines.qr_decomposition import array_qr
+from skillmodels.model_functions import transition_functions as tf
+
+BASELINE_PATH = Path(__file__).resolve().parent / "regression_gate_baselines.json"
+
+REGRESSION_MODELS = [
+    "test_model_no_stages_anchoring",
+    "test_model_one_stage",
+    "test_model_one_stage_anchoring",
+    "test_model_two_stages_anchoring",
+]
+
+
+def machine_id():
+    """Identifier of the machine and python version a baseline belongs to.
+
+    The machine is the value of the environment variable SKILLMODELS_GATE_MACHINE,
+    e.g. the name of a self-hosted CI runner, or platform.machine() if it is not
+    set. The host name is not used because it changes on every hosted CI run.
+
+    """
+    python = ".".join(platform.python_version_tuple()[:2])
+    machine = os.environ.get("SKILLMODELS_GATE_MACHINE", platform.machine())
+    return f"{machine}-py{python}"
+
+
+def _regression_data():
+    data = pd.read_stata(REGRESSION_DIR / "chs_test_ex2.dta")
+    data["period"] = data["period"].astype(int)
+    data["id"] = data["id"].astype(int)
+    data.loc[data["period"] != 7, "Q1"] = np.nan
+    data.set_index(["id", "period"], inplace=True)
+    return data
+
+
+def likelihood_workloads(layouts=("aos", "soa")):
+    """Dict of functions that evaluate the likelihood of a regression model."""
+    data = _regression_data()
+    workloads = {}
+    for model_name in REGRESSION_MODELS:
+        with open(REGRESSION_DIR / f"{model_name}.json") as j:
+            model_dict = json.load(j)
+        params = pd.read_csv(REGRESSION_DIR / f"{model_name}.csv")
+        params.set_index(["category", "period", "name1", "name2"], inplace=True)
+        mod = SkillModel(model_dict=model_dict, dataset=data)
+        full_params = mod.generate_full_start_params(params)["value"]
+        for layout in layouts:
+            args = mod.likelihood_arguments_dict(layout=layout)
+            workloads[f"likelihood_{model_name}_{layout}"] = _bind(
+                log_likelihood_contributions, full_params, **args
+            )
+    return workloads
+
+
+def kernel_workloads(nobs=10_000, nmixtures=2, nfac=3, seed=0):
+    """Dict of functions that call the hot kernels on fixed random inputs.
+
+    Kernels that work in place are called on a fresh copy of their inputs, such
+    that each evaluation does the same work.
+
+    """
+    rng = np.random.default_rng(seed)
+    workloads = {}
+
+    state = rng.normal(size=(nobs, nmixtures, nfac))
+    cov = np.zeros((nobs, nmixtures, nfac + 1, nfac + 1))
+    cov[..., 1:, 1:] = np.eye(nfac) + np.triu(rng.uniform(0, 0.1, (nfac, nfac)), 1)
+    update_args = [
+        state.copy(),
+        cov.copy(),
+        np.zeros(nobs),
+        rng.normal(size=nobs),
+        np.zeros((nobs, 0)),
+        np.zeros(0),
+        rng.uniform(0.5, 1.5, size=nfac),
+        np.array(0.5),
+        np.arange(nfac),
+        np.full((nobs, nmixtures), 1 / nmixtures),
+    ]
+
+    def update():
+        np.copyto(update_args[0], state)
+        np.copyto(update_args[1], cov)
+        sqrt_linear_update(*update_args)
+
+    workloads["sqrt_linear_update"] = update
+
+    arr = rng.normal(size=(nobs * nmixtures, 2 * nfac + 1 + nfac, nfac))
+    qr_arr = arr.copy()
+
+    def qr():
+        np.copyto(qr_arr, arr)
+        array_qr(qr_arr)
+
+    workloads["array_qr"] = qr
+
+    sigma_points = rng.uniform(0.5, 1.5, size=(nobs * nmixtures * (2 * nfac + 1), nfac))
+    positions = np.arange(nfac)
+    for name in ["linear", "log_ces", "translog"]:
+        index_tuples = getattr(tf, f"index_tuples_{name}")(
+            factor="fac0", included_factors=list(range(nfac)), period=0
+        )
+        coeffs = np.full(len(index_tuples), 1 / len(index_tuples))
+        workloads[f"transition_{name}"] = _bind(
+            getattr(tf, name), sigma_points, coeffs, positions
+        )
+
+    return workloads
+
+
+def _bind(func, *args, **kwargs):
+    def bound():
+        func(*args, **kwargs)
+
+    return bound
+
+
+def throughput(func, repeat=5):
+    """Best number of evaluations per second of func over *repeat* runs."""
+    func()
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return number / best
+
+
+def measure(workloads, repeat=5):
+    return {name: throughput(func, repeat) for name, func in workloads.items()}
+
+
+def compare(current, baseline, tolerance):
+    """DataFrame with baseline and current throughput per workload.
+
+    Workloads that are not in the baseline are never flagged as regressions.
+
+    """
+    df = pd.DataFrame({"baseline": pd.Series(baseline), "current": pd.Series(current)})
+    df = df.loc[list(current)]
+    df["ratio"] = df["current"] / df["baseline"]
+    df["regression"] = df["ratio"] < 1 - tolerance
+    return df
+
+
+def load_baselines(path):
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path, machine, results):
+    path = Path(path)
+    baselines = load_baselines(path)
+    baselines[machine] = results
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(baselines, f, indent=4, sort_keys=True)
+
+
+def main(argv=None, workloads=None):
+    """Run the gate and return its exit code.
+
+    Args:
+        argv (list): command line arguments. Default None, which uses sys.argv.
+        workloads (dict): functions whose throughput is measured. Default None,
+            which uses the likelihood and kernel workloads.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--baseline", default=BASELINE_PATH, help="json file with the baselines."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="accepted relative drop of throughput. Default 0.2.",
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="record the current baseline."
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if workloads is None:
+        workloads = {**likelihood_workloads(), **kernel_workloads()}
+    current = measure(workloads, repeat=args.repeat)
+    machine = machine_id()
+    baseline = load_baselines(args.baseline).get(machine)
+
+    if args.update:
+        save_baseline(args.baseline, machine, current)
+        print(f"Recorded the baseline of {machine} in {args.baseline}.")  # noqa
+        return 0
+
+    if baseline is None:
+        print(  # noqa
+            f"There is no baseline of {machine} in {args.baseline}. Record it "
+            "with --update and commit it."
+        )
+        return 2
+
+    report = compare(current, baseline, args.tolerance)
+    print(report.to_string())  # noqa
+    if report["regression"].any():
+        slower = ", ".join(report.index[report["regression"]])
+        print(f"Throughput dropped by more than {args.tolerance:.0%}: {slower}")  # noqa
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
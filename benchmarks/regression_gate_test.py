@@ -0,0 +1,44 @@
+import json
+
+from benchmarks.regression_gate import compare
+from benchmarks.regression_gate import machine_id
+from benchmarks.regression_gate import main
+
+
+def test_compare_flags_workloads_below_tolerance():
+    current = {"a": 80.0, "b": 95.0, "new": 1.0}
+    baseline = {"a": 100.0, "b": 100.0, "removed": 5.0}
+    report = compare(current, baseline, tolerance=0.1)
+    assert list(report.index) == ["a", "b", "new"]
+    assert report["regression"].tolist() == [True, False, False]
+    assert report.loc["b", "ratio"] == 0.95
+
+
+def _workloads():
+    return {"noop": lambda: None}
+
+
+def test_main_without_baseline_fails(tmp_path):
+    path = tmp_path / "baselines.json"
+    assert main(["--baseline", str(path), "--repeat", "1"], _workloads()) == 2
+    assert not path.exists()
+
+
+def test_main_records_and_compares_baseline(tmp_path):
+    path = tmp_path / "baselines.json"
+    argv = ["--baseline", str(path), "--repeat", "1"]
+    assert main(argv + ["--update"], _workloads()) == 0
+    assert list(json.loads(path.read_text())) == [machine_id()]
+
+    assert main(argv + ["--tolerance", "0.99"], _workloads()) == 0
+
+    baselines = {machine_id(): {"noop": 1e15}}
+    path.write_text(json.dumps(baselines))
+    assert main(argv, _workloads()) == 1
+
+
+def test_machine_id_from_environment_variable(monkeypatch):
+    monkeypatch.setenv("SKILLMODELS_GATE_MACHINE", "runner-1")
+    assert machine_id().startswith("runner-1-py")
+    monkeypatch.delenv("SKILLMODELS_GATE_MACHINE")
+    assert not machine_id().startswith("runner-1")
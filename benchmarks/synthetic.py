@@ -0,0 +1,102 @@
+"""Generate synthetic models and datasets of arbitrary size for benchmarks."""
+import numpy as np
+import pandas as pd
+
+from skillmodels import SkillModel
+
+
+def synthetic_model_dict(
+    nfac=3, nperiods=4, nmixtures=1, nmeas=3, transition="linear", ncontrols=1
+):
+    """Model dictionary with nmeas measurements per factor and period.
+
+    Args:
+        nfac (int): number of latent factors.
+        nperiods (int): number of periods.
+        nmixtures (int): number of elements in the mixture of normals of the
+            initial factor distribution.
+        nmeas (int): number of measurements per factor and period.
+        transition (str): name of the transition function of all factors.
+        ncontrols (int): number of control variables.
+
+    Returns:
+        model_dict (dict)
+
+    """
+    factors = [f"fac{i}" for i in range(nfac)]
+    factor_specific = {}
+    for factor in factors:
+        meas = [f"y_{factor}_{m}" for m in range(nmeas)]
+        factor_specific[factor] = {
+            "measurements": [meas] * nperiods,
+            "normalizations": {
+                "loadings": [{meas[0]: 1} for _ in range(nperiods)],
+                "intercepts": [{} for _ in range(nperiods)],
+            },
+            "trans_eq": {"name": transition, "included_factors": factors},
+        }
+
+    controls = [f"x{i}" for i in range(ncontrols)]
+    model_dict = {
+        "factor_specific": factor_specific,
+        "time_specific": {
+            "controls": [controls] * nperiods,
+            "stagemap": [0] * nperiods,
+        },
+        "general": {"n_mixture_components": nmixtures},
+    }
+    return model_dict
+
+
+def placeholder_dataset(model_dict, nobs=50, seed=0):
+    """Dataset with random values for all variables of model_dict.
+
+    It is only used to construct a model that can simulate data.
+
+    """
+    variables = set(model_dict["time_specific"]["controls"][0])
+    for info in model_dict["factor_specific"].values():
+        for meas in info["measurements"]:
+            variables.update(meas)
+    nperiods = len(model_dict["time_specific"]["stagemap"])
+
+    index = pd.MultiIndex.from_product(
+        [range(nobs), range(nperiods)], names=["id", "period"]
+    )
+    rng = np.random.default_rng(seed)
+    data = rng.normal(size=(len(index), len(variables)))
+    return pd.DataFrame(data=data, columns=sorted(variables), index=index)
+
+
+def synthetic_data(nobs, **model_kwargs):
+    """Dataset with nobs individuals simulated at naive start parameters.
+
+    Args:
+        nobs (int): number of simulated individuals.
+        model_kwargs: keyword arguments for :func:`synthetic_model_dict`.
+
+    Returns:
+        model_dict (dict)
+        observed_data (pd.DataFrame)
+        params (pd.DataFrame): full parameters at which the data was simulated.
+
+    """
+    model_dict = synthetic_model_dict(**model_kwargs)
+    placeholder = placeholder_dataset(model_dict)
+    small_mod = SkillModel(model_dict=model_dict, dataset=placeholder)
+    params = small_mod.generate_full_start_params()
+    observed_data, _ = small_mod.simulate(nobs=nobs, params=params)
+    return model_dict, observed_data, params
+
+
+def synthetic_model(nobs, **model_kwargs):
+    """SkillModel estimated on data from :func:`synthetic_data`.
+
+    Returns:
+        mod (SkillModel)
+        params (pd.DataFrame): full parameters at which the data was simulated.
+
+    """
+    model_dict, observed_data, params = synthetic_data(nobs, **model_kwargs)
+    mod = SkillModel(model_dict=model_dict, dataset=observed_data)
+    return mod, params
@@ -0,0 +1,73 @@
+"""Compare the traversal of individuals in the likelihood function.
+
+The benchmarks are written for `asv <https://asv.readthedocs.io>`_ but can also be
+run as a script::
+
+    python benchmarks/traversal.py
+
+"""
+import json
+import timeit
+from pathlib import Path
+
+import pandas as pd
+
+from skillmodels import SkillModel
+from skillmodels.estimation.likelihood_function import log_likelihood_contributions
+
+REGRESSION_DIR = (
+    Path(__file__).resolve().parent.parent / "skillmodels" / "tests" / "regression"
+)
+
+
+def regression_model(nobs, model_name="test_model_one_stage"):
+    """Regression test model with *nobs* individuals simulated at its params.
+
+    Returns:
+        mod (SkillModel)
+        params (pd.Series): full parameter vector of mod.
+
+    """
+    with open(REGRESSION_DIR / f"{model_name}.json") as j:
+        model_dict = json.load(j)
+    params = pd.read_csv(REGRESSION_DIR / f"{model_name}.csv")
+    params.set_index(["category", "period", "name1", "name2"], inplace=True)
+
+    data = pd.read_stata(REGRESSION_DIR / "chs_test_ex2.dta")
+    data["period"] = data["period"].astype(int)
+    data["id"] = data["id"].astype(int)
+    data.set_index(["id", "period"], inplace=True)
+
+    small_mod = SkillModel(model_dict=model_dict, dataset=data)
+    full_params = small_mod.generate_full_start_params(params)
+    observed_data, _ = small_mod.simulate(nobs=nobs, params=full_params)
+
+    mod = SkillModel(model_dict=model_dict, dataset=observed_data)
+    return mod, full_params["value"]
+
+
+class TimeTraversal:
+    """Period-wise traversal of all individuals vs. cache-sized tiles."""
+
+    params = ([1_000, 10_000, 100_000, 1_000_000], [None, "auto"])
+    param_names = ["nobs", "tile_size"]
+    timeout = 1200
+
+    def setup(self, nobs, tile_size):
+        mod, self.full_params = regression_model(nobs)
+        self.args = mod.likelihood_arguments_dict(tile_size=tile_size)
+
+    def time_log_likelihood_contributions(self, nobs, tile_size):
+        log_likelihood_contributions(self.full_params, **self.args)
+
+
+if __name__ == "__main__":
+    for nobs in TimeTraversal.params[0]:
+        for tile_size in TimeTraversal.params[1]:
+            bench = TimeTraversal()
+            bench.setup(nobs, tile_size)
+            timer = timeit.Timer(
+                lambda: bench.time_log_likelihood_contributions(nobs, tile_size)
+            )
+            n, total = timer.autorange()
+            print(f"nobs={nobs}, tile_size={tile_size}: {total / n:.4f}s")  # noqa
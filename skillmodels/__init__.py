@@ -1 +1,20 @@
-from skillmodels.estimation.skill_model import SkillModel  # noqa: F401
+import sys
+import types
+
+__all__ = ["SkillModel"]
+
+
+class _LazyModule(types.ModuleType):
+    # SkillModel is imported on first access, such that importing e.g. the fast
+    # routines in worker processes does not load the whole estimation stack.
+    # A module level __getattr__ would need python 3.7, so the class of the
+    # module is replaced instead.
+    def __getattr__(self, name):
+        if name == "SkillModel":
+            from skillmodels.estimation.skill_model import SkillModel
+
+            return SkillModel
+        raise AttributeError(f"module 'skillmodels' has no attribute '{name}'")
+
+
+sys.modules[__name__].__class__ = _LazyModule
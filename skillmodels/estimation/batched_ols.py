@@ -0,0 +1,112 @@
+"""Fit many small OLS regressions with a few vectorized linear algebra calls.
+
+The score regressions of a model are many regressions with few regressors.
+Fitting each with a statsmodels formula spends most of the time on parsing the
+formula and building the design matrix. Here, all design matrices are stacked
+into one array of [nregressions, nobs, nparams] and all regressions are solved
+with one batched pseudo inverse. As in statsmodels, regressions with collinear
+regressors get the minimum norm solution instead of an error.
+
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import t as t_dist
+
+
+class OLSResults:
+    """Results of one OLS regression.
+
+    The attributes have the names of the corresponding attributes of statsmodels
+    results, such that both can be used in the same tables and plots. Standard
+    errors are the classical, non-robust ones.
+
+    Attributes:
+        params (pd.Series): estimated coefficients.
+        bse (pd.Series): standard errors of params.
+        tvalues (pd.Series): t statistics of params.
+        pvalues (pd.Series): two sided p-values of params.
+        fittedvalues (pd.Series): fitted values. NaN in rows that were dropped
+            because of missing values.
+        resid (pd.Series): residuals, NaN in dropped rows.
+        nobs (int): number of observations that were used.
+        df_resid (int): degrees of freedom of the residuals.
+
+    """
+
+    def __init__(
+        self, params, bse, tvalues, pvalues, fittedvalues, resid, nobs, df_resid
+    ):
+        self.params = params
+        self.bse = bse
+        self.tvalues = tvalues
+        self.pvalues = pvalues
+        self.fittedvalues = fittedvalues
+        self.resid = resid
+        self.nobs = nobs
+        self.df_resid = df_resid
+
+
+def batched_ols(endog, exog):
+    """Fit OLS regressions of each element of endog on the element of exog.
+
+    Rows with a missing value in the dependent variable or a regressor are
+    dropped from the regression, as in statsmodels formulas. Regressions can have
+    different numbers of observations and regressors. Shorter regressions are
+    padded with zeros, which does not change their solution. The degrees of
+    freedom are calculated with the rank of the design matrix.
+
+    Args:
+        endog (list): list of pd.Series with dependent variables.
+        exog (list): list of pd.DataFrame with the regressors of each regression,
+            including a constant if desired. The index has to be the one of the
+            corresponding element of endog.
+
+    Returns:
+        results (list): list of :class:`OLSResults`.
+
+    """
+    nreg = len(endog)
+    nobs = max(len(y) for y in endog)
+    nparams = max(x.shape[1] for x in exog)
+
+    y = np.zeros((nreg, nobs))
+    x = np.zeros((nreg, nobs, nparams))
+    used = np.zeros((nreg, nobs), dtype=bool)
+    for r, (y_r, x_r) in enumerate(zip(endog, exog)):
+        y_r, x_r = y_r.to_numpy(dtype=float), x_r.to_numpy(dtype=float)
+        n, k = x_r.shape
+        complete = ~np.isnan(y_r) & ~np.isnan(x_r).any(axis=1)
+        used[r, :n] = complete
+        y[r, :n] = np.where(complete, y_r, 0)
+        x[r, :n, :k] = np.where(complete.reshape(n, 1), x_r, 0)
+
+    x_pinv = np.linalg.pinv(x)
+    params = (x_pinv @ y[:, :, None])[:, :, 0]
+    fitted = (x @ params[:, :, None])[:, :, 0]
+    resid = np.where(used, y - fitted, 0)
+
+    nused = used.sum(axis=1)
+    df_resid = nused - np.linalg.matrix_rank(x)
+    sigma_sq = (resid ** 2).sum(axis=1) / df_resid
+    normalized_cov = x_pinv @ x_pinv.transpose(0, 2, 1)
+    bse = np.sqrt(np.diagonal(normalized_cov, axis1=1, axis2=2) * sigma_sq[:, None])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tvalues = params / bse
+    pvalues = 2 * t_dist.sf(np.abs(tvalues), df_resid[:, None])
+
+    results = []
+    for r, (y_r, x_r) in enumerate(zip(endog, exog)):
+        n, k = x_r.shape
+        dropped = ~used[r, :n]
+        res = OLSResults(
+            params=pd.Series(params[r, :k], index=x_r.columns),
+            bse=pd.Series(bse[r, :k], index=x_r.columns),
+            tvalues=pd.Series(tvalues[r, :k], index=x_r.columns),
+            pvalues=pd.Series(pvalues[r, :k], index=x_r.columns),
+            fittedvalues=pd.Series(fitted[r, :n], index=y_r.index).mask(dropped),
+            resid=pd.Series(resid[r, :n], index=y_r.index).mask(dropped),
+            nobs=int(nused[r]),
+            df_resid=int(df_resid[r]),
+        )
+        results.append(res)
+    return results
@@ -0,0 +1,182 @@
+"""Evaluate the likelihood of a model from several threads at once."""
+import queue
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from skillmodels.estimation.likelihood_function import chunked_log_likelihood
+from skillmodels.estimation.likelihood_function import log_likelihood_contributions
+from skillmodels.estimation.profiling import LikelihoodProfiler
+
+
+class LikelihoodEvaluator:
+    """Re-entrant evaluator of the log likelihood of a SkillModel.
+
+    The likelihood function writes all intermediate results into containers that
+    are allocated once by :meth:`SkillModel.likelihood_arguments_dict`. Two
+    evaluations that share those containers would overwrite each other. The
+    evaluator therefore owns a pool of workspaces, i.e. complete sets of
+    containers. Each evaluation borrows a workspace from the pool and returns it
+    afterwards. Workspaces are only allocated if all existing ones are in use, so
+    the number of workspaces equals the maximal number of concurrent evaluations.
+
+    The numerical kernels release the GIL, so evaluations that run in different
+    threads of a ThreadPoolExecutor actually run in parallel.
+
+    Args:
+        model (SkillModel): the model whose likelihood is evaluated.
+        memory_budget (int): If specified, the likelihood is evaluated in chunks
+            of individuals such that each workspace uses approximately
+            memory_budget bytes. See :func:`chunked_log_likelihood`.
+        tile_size (int or str): See :meth:`SkillModel.likelihood_arguments_dict`.
+        layout (str): See :meth:`SkillModel.likelihood_arguments_dict`.
+        y_data (np.ndarray): optional array of [nupdates, nobs] with measurements.
+            Default model.y_data.
+        c_data (list): optional list of arrays with control variables in the
+            format of model.c_data. Default model.c_data.
+        weights (np.ndarray): optional array of length nobs with frequency weights,
+            i.e. the number of times each individual appears in the sample.
+            Default None, which uses model.weights if y_data is None and a weight
+            of 1 for each individual otherwise.
+
+    Example:
+        >>> evaluator = LikelihoodEvaluator(model)  # doctest: +SKIP
+        >>> with ThreadPoolExecutor() as executor:  # doctest: +SKIP
+        ...     values = list(executor.map(evaluator, list_of_params))
+
+    """
+
+    def __init__(
+        self,
+        model,
+        memory_budget=None,
+        tile_size=None,
+        layout="aos",
+        y_data=None,
+        c_data=None,
+        weights=None,
+    ):
+        self.model = model
+        self.memory_budget = memory_budget
+        self.tile_size = tile_size
+        self.layout = layout
+        self.y_data = model.y_data if y_data is None else y_data
+        self.c_data = model.c_data if c_data is None else c_data
+        if y_data is None and weights is None:
+            weights = model.weights
+        self.weights = weights
+        nobs = self.y_data.shape[1] if weights is None else np.sum(weights)
+        self.n_contributions = model.nupdates * nobs
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self.nworkspaces = 0
+
+    def _new_workspace(self):
+        if self.memory_budget is None:
+            args = self.model.likelihood_arguments_dict(
+                y_data=self.y_data,
+                c_data=self.c_data,
+                tile_size=self.tile_size,
+                layout=self.layout,
+            )
+        else:
+            args = self.model.chunked_likelihood_arguments_dict(
+                memory_budget=self.memory_budget,
+                layout=self.layout,
+                y_data=self.y_data,
+                c_data=self.c_data,
+            )
+        return args
+
+    @contextmanager
+    def workspace(self):
+        """Borrow a workspace from the pool and allocate one if none is idle."""
+        try:
+            args = self._idle.get_nowait()
+        except queue.Empty:
+            args = self._new_workspace()
+            with self._lock:
+                self.nworkspaces += 1
+        try:
+            yield args
+        finally:
+            self._idle.put(args)
+
+    def log_likelihood_per_individual(self, params):
+        """Return an array of length nobs with the log likelihood per individual.
+
+        Args:
+            params (pd.DataFrame or pd.Series): the parameters of the model.
+
+        """
+        with self.workspace() as args:
+            if self.memory_budget is None:
+                log_like = log_likelihood_contributions(params, **args).sum(axis=0)
+            else:
+                log_like = chunked_log_likelihood(params, **args)
+        return log_like
+
+    def log_likelihood_contributions(self, params):
+        """Return a copy of the log likelihood contributions of all updates.
+
+        This is only possible if the likelihood is not evaluated in chunks.
+
+        Args:
+            params (pd.DataFrame or pd.Series): the parameters of the model.
+
+        """
+        if self.memory_budget is not None:
+            raise ValueError(
+                "The contributions of single updates are not stored if the "
+                "likelihood is evaluated in chunks."
+            )
+        with self.workspace() as args:
+            contributions = log_likelihood_contributions(params, **args).copy()
+        return contributions
+
+    def criterion(self, params):
+        """Return the average log likelihood contribution.
+
+        This is the criterion function that is maximized in :meth:`SkillModel.fit`.
+        With frequency weights, the contributions of each individual are counted
+        as often as its weight says.
+
+        Args:
+            params (pd.DataFrame or pd.Series): the parameters of the model.
+
+        """
+        with self.workspace() as args:
+            if self.memory_budget is None:
+                log_like = log_likelihood_contributions(params, **args)
+                log_like[log_like < -1e300] = -1e300
+            else:
+                log_like = chunked_log_likelihood(params, **args, lower_bound=-1e300)
+            if self.weights is not None:
+                log_like = np.dot(log_like, self.weights)
+            res = np.sum(log_like) / self.n_contributions
+        return res
+
+    def profile(self, params, n_evaluations=1):
+        """Evaluate the likelihood and record the time spent in each stage.
+
+        Args:
+            params (pd.DataFrame or pd.Series): the parameters of the model.
+            n_evaluations (int): number of evaluations over which the times are
+                summed up.
+
+        Returns:
+            profile (pd.DataFrame): see :meth:`LikelihoodProfiler.to_frame`.
+
+        """
+        profiler = LikelihoodProfiler()
+        with self.workspace() as args:
+            for _ in range(n_evaluations):
+                if self.memory_budget is None:
+                    log_likelihood_contributions(params, **args, timer=profiler.timer)
+                else:
+                    chunked_log_likelihood(params, **args, timer=profiler.timer)
+        return profiler.to_frame()
+
+    def __call__(self, params):
+        return self.criterion(params)
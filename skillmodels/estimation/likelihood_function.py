@@ -1,8 +1,18 @@
+import numpy as np
+
 from skillmodels.estimation.parse_params import parse_params
+from skillmodels.fast_routines.kalman_filters import soa_sqrt_linear_anchoring_update
+from skillmodels.fast_routines.kalman_filters import soa_sqrt_linear_update
+from skillmodels.fast_routines.kalman_filters import soa_sqrt_unscented_predict
 from skillmodels.fast_routines.kalman_filters import sqrt_linear_anchoring_update
 from skillmodels.fast_routines.kalman_filters import sqrt_linear_update
 from skillmodels.fast_routines.kalman_filters import sqrt_unscented_predict
 from skillmodels.fast_routines.sigma_points import calculate_sigma_points
+from skillmodels.fast_routines.sigma_points import soa_calculate_sigma_points
+from skillmodels.fast_routines.timers import null_timer
+
+# quantities that are set by parse_params and overwritten by the filter
+INITIAL_STATES = ["initial_mean", "initial_cov", "mixture_weight"]
 
 
 def log_likelihood_contributions(
@@ -10,11 +20,13 @@ def log_likelihood_contributions(
     like_contributions,
     parse_params_args,
     periods,
+    residual_args,
     update_info,
     anchoring,
-    update_args,
-    predict_args,
-    calculate_sigma_points_args,
+    tiles,
+    layout="aos",
+    timer=null_timer,
+    parse=True,
 ):
     """Return the log likelihood contributions per update and individual in the sample.
 
@@ -26,9 +38,10 @@ def log_likelihood_contributions(
     First the params vector is parsed into the many quantities that depend on
     it. See :ref:`params_and_quants` for details.
 
-    Then, for each period of the model first all Kalman updates for the
-    measurement equations are done. Each Kalman update updates the following
-    quantities:
+    Then, for each period of the model the contributions of the control variables
+    are subtracted from all measurements of the period with one matrix product
+    and all Kalman updates for the measurement equations are done. Each Kalman
+    update updates the following quantities:
 
         * the state array X
         * the covariance matrices P
@@ -44,45 +57,173 @@ def log_likelihood_contributions(
     In the last period an additional update is done to incorporate the
     anchoring equation into the likelihood.
 
+    The individuals are split into tiles. Each tile is processed through all
+    updates and the predict step of a period before the next tile is processed,
+    such that the quantities of a tile stay in the cache. The arguments of each
+    tile are views on the same containers, so the number of tiles does not
+    change the result.
+
+    With layout "soa" the structure-of-arrays versions of the kernels are used,
+    where the individuals are the innermost dimension of all filter quantities.
+
+    timer can be the timer method of a :class:`LikelihoodProfiler` that records
+    the time spent in each stage of each period. By default nothing is recorded.
+
+    With parse=False, params are assumed to be parsed into the containers already,
+    which is used to parse them only once for all chunks of a sample.
+
     """
     like_contributions[:] = 0.0
 
-    parse_params(params, **parse_params_args)
+    if parse is True:
+        with timer("parse"):
+            parse_params(params, **parse_params_args)
 
     k = 0
     for t in periods:
+        with timer("residuals", t):
+            residualize_measurements(**residual_args[t])
         nmeas = len(update_info.loc[t])
-        for _j in range(nmeas):
-            purpose = update_info.iloc[k]["purpose"]
-            update(purpose, update_args[k])
-            k += 1
-        if t < periods[-1]:
-            calculate_sigma_points(**calculate_sigma_points_args)
-            predict(t, predict_args)
+        purposes = update_info["purpose"].iloc[k : k + nmeas].to_numpy()
+        for tile in tiles:
+            for j, purpose in enumerate(purposes):
+                with timer(f"{purpose}_update", t):
+                    update(purpose, tile["update_args"][k + j], layout)
+            if t < periods[-1]:
+                with timer("sigma_points", t):
+                    sigma_points(tile["calculate_sigma_points_args"], layout)
+                predict(t, tile["predict_args"], layout, timer)
+        k += nmeas
 
     return like_contributions
 
 
-def update(purpose, update_args):
+def chunked_log_likelihood(
+    params,
+    y_data,
+    c_data,
+    y_chunk,
+    c_chunk,
+    chunk_args,
+    timer=null_timer,
+    lower_bound=None,
+):
+    """Return the log likelihood per individual, evaluated chunk by chunk.
+
+    Individuals are independent, so the sample can be split into chunks of
+    individuals that are pushed through all periods of the model one after the
+    other. The filter containers in chunk_args only have the size of one chunk
+    and are reused for all chunks, which bounds the memory that is needed for
+    one evaluation independently of the sample size.
+
+    The last chunk is padded with missing measurements. Missing measurements
+    don't change the filter, so the padded individuals are simply discarded.
+
+    The params are parsed once, because the parsed quantities don't depend on
+    the chunk. Only the initial states, which the filter overwrites, are restored
+    before each chunk.
+
+    Args:
+        params (pd.DataFrame or pd.Series): the parameters of the model.
+        y_data (np.ndarray): array of [nupdates, nobs] with measurements.
+        c_data (list): list of arrays of [nobs, ncontrols_t] with control variables.
+        y_chunk (np.ndarray): buffer of [nupdates, chunk_size] for measurements.
+        c_chunk (list): buffers of [chunk_size, ncontrols_t] for control variables.
+        chunk_args (dict): arguments for :func:`log_likelihood_contributions` that
+            point to y_chunk and c_chunk.
+        timer (callable): see :func:`log_likelihood_contributions`.
+        lower_bound (float): If specified, each log likelihood contribution is
+            clipped at lower_bound before the contributions are summed up.
+
+    Returns:
+        log_like (np.ndarray): array of length nobs with the log likelihood of each
+            individual, i.e. the sum of its log likelihood contributions.
+
+    """
+    nobs = y_data.shape[1]
+    chunk_size = y_chunk.shape[1]
+    log_like = np.empty(nobs)
+
+    initial_quantities = chunk_args["parse_params_args"]["initial_quantities"]
+    with timer("parse"):
+        parse_params(params, **chunk_args["parse_params_args"])
+        initial_states = {q: initial_quantities[q].copy() for q in INITIAL_STATES}
+
+    for start in range(0, nobs, chunk_size):
+        stop = min(start + chunk_size, nobs)
+        n = stop - start
+        y_chunk[:, :n] = y_data[:, start:stop]
+        y_chunk[:, n:] = np.nan
+        for c, c_ch in zip(c_data, c_chunk):
+            c_ch[:n] = c[start:stop]
+        for q, state in initial_states.items():
+            initial_quantities[q][:] = state
+
+        contributions = log_likelihood_contributions(
+            params, **chunk_args, timer=timer, parse=False
+        )
+        if lower_bound is not None:
+            np.maximum(contributions, lower_bound, out=contributions)
+        log_like[start:stop] = contributions[:, :n].sum(axis=0)
+
+    return log_like
+
+
+def residualize_measurements(y, c, control_coeffs, out):
+    """Subtract the contribution of the control variables from the measurements.
+
+    The contributions of all measurements of a period are calculated with one
+    matrix product, i.e. one call to an optimized BLAS routine, instead of a
+    scalar loop inside each update.
+
+    Args:
+        y (np.ndarray): array of [nmeas, nobs] with the measurements of a period.
+        c (np.ndarray): array of [nobs, ncontrols] with the control variables.
+        control_coeffs (np.ndarray): array of [nmeas, ncontrols].
+        out (np.ndarray): array of [nmeas, nobs] for the residuals.
+
+    """
+    np.matmul(control_coeffs, c.T, out=out)
+    np.subtract(y, out, out=out)
+
+
+def update(purpose, update_args, layout="aos"):
     """Select and call the correct update function.
 
     The actual update functions are implemented in several modules in
     :ref:`fast_routines`
 
     """
-    if purpose == "measurement":
+    if purpose == "measurement" and layout == "aos":
         sqrt_linear_update(*update_args)
-    elif purpose == "anchoring":
+    elif purpose == "measurement" and layout == "soa":
+        soa_sqrt_linear_update(*update_args)
+    elif purpose == "anchoring" and layout == "aos":
         sqrt_linear_anchoring_update(*update_args)
+    elif purpose == "anchoring" and layout == "soa":
+        soa_sqrt_linear_anchoring_update(*update_args)
     else:
-        raise ValueError("purpose must be measurement or anchoring.")
+        raise ValueError(
+            "purpose must be measurement or anchoring and layout aos or soa."
+        )
 
 
-def predict(period, predict_args):
+def predict(period, predict_args, layout="aos", timer=null_timer):
     """Select and call the correct predict function.
 
     The actual predict functions are implemented in several modules in
     :ref:`fast_routines`
 
     """
-    sqrt_unscented_predict(period, **predict_args)
+    if layout == "aos":
+        sqrt_unscented_predict(period, **predict_args, timer=timer)
+    else:
+        soa_sqrt_unscented_predict(period, **predict_args, timer=timer)
+
+
+def sigma_points(calculate_sigma_points_args, layout="aos"):
+    """Select and call the correct sigma point function."""
+    if layout == "aos":
+        calculate_sigma_points(**calculate_sigma_points_args)
+    else:
+        soa_calculate_sigma_points(**calculate_sigma_points_args)
@@ -0,0 +1,151 @@
+"""Record the parameters at which an optimizer evaluates the likelihood and replay them.
+
+A trace is a realistic and reproducible workload. Replaying it with other
+evaluator options (layout, tile size, memory budget) or thread counts shows how
+fast they are and whether they produce the same likelihood as the reference.
+
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from skillmodels.estimation.likelihood_evaluator import LikelihoodEvaluator
+
+
+def _params_values(params):
+    if isinstance(params, pd.DataFrame):
+        params = params["value"]
+    return np.array(params, dtype=float)
+
+
+class TraceRecorder:
+    """Wrap a criterion function and record all parameter vectors it is called with.
+
+    Args:
+        criterion (callable): the criterion function.
+        params_index (pd.MultiIndex): index of the parameters. It is stored in the
+            trace to check that a trace is replayed on a matching model.
+
+    """
+
+    def __init__(self, criterion, params_index=None):
+        self.criterion = criterion
+        self.params_index = params_index
+        self._lock = threading.Lock()
+        self._params = []
+        self._values = []
+
+    def __call__(self, params):
+        value = self.criterion(params)
+        # a criterion that does not return a scalar fails here and not in save
+        scalar = float(value)
+        with self._lock:
+            self._params.append(_params_values(params))
+            self._values.append(scalar)
+        return value
+
+    def save(self, path):
+        """Save the trace as compressed .npz file.
+
+        The file has the entries params, criterion and index. params is an array
+        of [n_evaluations, nparams] in the order of evaluation, criterion the
+        corresponding criterion values.
+
+        """
+        with self._lock:
+            params = np.array(self._params)
+            values = np.array(self._values, dtype=float)
+        index = [] if self.params_index is None else self.params_index
+        np.savez_compressed(
+            path,
+            params=params,
+            criterion=values,
+            index=np.array([str(tup) for tup in index]),
+        )
+
+
+def load_trace(path):
+    """Load a trace that was saved by :meth:`TraceRecorder.save`.
+
+    Returns:
+        trace (dict): dict with the arrays params, criterion and index.
+
+    """
+    with np.load(path) as npz:
+        trace = {key: npz[key] for key in ["params", "criterion", "index"]}
+    return trace
+
+
+def replay_trace(model, trace, n_workers=1, validate=True, **evaluator_options):
+    """Evaluate the criterion at all parameters of a trace and time it.
+
+    Args:
+        model (SkillModel): the model on whose data the trace was recorded.
+        trace (str, pathlib.Path or dict): path of a trace or loaded trace.
+        n_workers (int): number of threads in which the evaluations run.
+        validate (bool): If True, the log likelihood contributions of each
+            evaluation are compared to a reference evaluator with default options.
+            This happens after the timed replay.
+        evaluator_options: keyword arguments for :class:`LikelihoodEvaluator`,
+            e.g. layout, tile_size or memory_budget.
+
+    Returns:
+        result (dict): with the entries n_evaluations, n_workers, time,
+            evals_per_second, max_criterion_deviation (compared to the recorded
+            criterion values) and max_contribution_deviation (NaN if validate is
+            False). If the likelihood is evaluated in chunks, the log likelihood per
+            individual is compared instead of the contributions.
+
+    """
+    if not isinstance(trace, dict):
+        trace = load_trace(trace)
+    index = [str(tup) for tup in model.params_index]
+    if len(trace["index"]) > 0 and list(trace["index"]) != index:
+        raise ValueError("The trace was recorded for a model with other parameters.")
+
+    points = [pd.Series(p, index=model.params_index) for p in trace["params"]]
+    evaluator = LikelihoodEvaluator(model, **evaluator_options)
+    if points:
+        # compile the kernels and allocate a workspace before the timing starts
+        evaluator.criterion(points[0])
+
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        start = time.perf_counter()
+        values = np.array(list(executor.map(evaluator.criterion, points)))
+        duration = time.perf_counter() - start
+
+    result = {
+        "n_evaluations": len(points),
+        "n_workers": n_workers,
+        "time": duration,
+        "evals_per_second": len(points) / duration,
+        "max_criterion_deviation": _max_abs_deviation(values, trace["criterion"]),
+        "max_contribution_deviation": np.nan,
+    }
+
+    if validate:
+        reference = LikelihoodEvaluator(model)
+        if evaluator.memory_budget is None:
+            func = "log_likelihood_contributions"
+        else:
+            func = "log_likelihood_per_individual"
+
+        def deviation(params):
+            return _max_abs_deviation(
+                getattr(evaluator, func)(params), getattr(reference, func)(params)
+            )
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            deviations = list(executor.map(deviation, points))
+        result["max_contribution_deviation"] = max(deviations, default=0.0)
+
+    return result
+
+
+def _max_abs_deviation(calculated, expected):
+    if len(calculated) == 0:
+        return 0.0
+    return float(np.nanmax(np.abs(np.asarray(calculated) - np.asarray(expected))))
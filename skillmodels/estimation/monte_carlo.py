@@ -0,0 +1,79 @@
+"""Checkpoints and summary statistics of Monte Carlo studies.
+
+The Monte Carlo study itself is run by :meth:`SkillModel.monte_carlo`.
+
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+
+def checkpoint_path(checkpoint_dir, replication):
+    return Path(checkpoint_dir) / f"replication_{replication:05d}.pickle"
+
+
+def save_replication(checkpoint_dir, replication, result):
+    """Pickle the result of one replication.
+
+    The result is first written to a temporary file that is renamed afterwards,
+    such that a killed job never leaves a truncated checkpoint behind.
+
+    """
+    path = checkpoint_path(checkpoint_dir, replication)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    pd.to_pickle(result, tmp_path)
+    tmp_path.replace(path)
+
+
+def load_replications(checkpoint_dir, n_replications):
+    """Dict with the results of all replications that have a checkpoint."""
+    results = {}
+    if checkpoint_dir is not None:
+        for replication in range(n_replications):
+            path = checkpoint_path(checkpoint_dir, replication)
+            if path.exists():
+                results[replication] = pd.read_pickle(path)
+    return results
+
+
+def summarize_monte_carlo(estimates, true_params, standard_errors=None, level=0.95):
+    """Bias, standard deviation, RMSE and coverage of the estimates.
+
+    Args:
+        estimates (pd.DataFrame): one column with estimated parameters per
+            replication.
+        true_params (pd.Series): parameters at which the data were simulated.
+        standard_errors (pd.DataFrame): optional standard errors with the same
+            columns as estimates. The index can be a subset of the index of
+            estimates, e.g. the free parameters.
+        level (float): level of the confidence intervals whose coverage is
+            calculated.
+
+    Returns:
+        summary (pd.DataFrame): with the index of estimates and the columns true,
+            mean, bias, std and rmse. If standard_errors are given, there are also
+            the columns mean_se and coverage, i.e. the share of replications in
+            which the confidence interval contains the true parameter.
+
+    """
+    true = true_params.reindex(estimates.index)
+    deviations = estimates.sub(true, axis=0)
+    summary = pd.DataFrame(index=estimates.index)
+    summary["true"] = true
+    summary["mean"] = estimates.mean(axis=1)
+    summary["bias"] = deviations.mean(axis=1)
+    summary["std"] = estimates.std(axis=1)
+    summary["rmse"] = np.sqrt((deviations ** 2).mean(axis=1))
+
+    if standard_errors is not None:
+        critical_value = norm.ppf(0.5 + level / 2)
+        se = standard_errors.reindex(index=estimates.index, columns=estimates.columns)
+        covered = deviations.abs() <= critical_value * se
+        covered = covered.astype(float).where(se.notnull())
+        summary["mean_se"] = se.mean(axis=1)
+        summary["coverage"] = covered.mean(axis=1)
+
+    return summary
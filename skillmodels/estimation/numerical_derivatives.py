@@ -0,0 +1,112 @@
+"""Finite difference derivatives with parallel function evaluations.
+
+All evaluation points of a derivative are known in advance. They are evaluated as
+one batch in a thread pool, which is efficient if func releases the GIL, as
+:class:`LikelihoodEvaluator` does.
+
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+EPS = np.finfo(float).eps
+
+
+def evaluate_batch(func, points, n_workers=None):
+    """Evaluate func at all points in parallel threads.
+
+    Args:
+        func (callable): function of one argument.
+        points (list): list of arguments.
+        n_workers (int): number of threads. Default None, which uses the default
+            of ThreadPoolExecutor.
+
+    Returns:
+        results (list): func evaluated at all points.
+
+    """
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        results = list(executor.map(func, points))
+    return results
+
+
+def _step_sizes(x, rel_step):
+    return rel_step * np.maximum(np.abs(x), 1)
+
+
+def _displaced_func(func, x):
+    """Function of a list of (position, step) tuples by which x is displaced.
+
+    The evaluation points are only created when they are evaluated, which keeps
+    the memory of a batch small.
+
+    """
+
+    def displaced(displacements):
+        point = x.copy()
+        for pos, step in displacements:
+            point[pos] += step
+        return func(point)
+
+    return displaced
+
+
+def jacobian(func, x, rel_step=None, n_workers=None):
+    """Central difference jacobian of func at x.
+
+    Args:
+        func (callable): function that maps a 1d array of length k to a 1d array
+            of length n.
+        x (np.ndarray): 1d array of length k.
+        rel_step (float): step sizes are rel_step * max(abs(x), 1). Default
+            EPS ** (1 / 3).
+        n_workers (int): see :func:`evaluate_batch`.
+
+    Returns:
+        jac (np.ndarray): array of [n, k].
+
+    """
+    rel_step = EPS ** (1 / 3) if rel_step is None else rel_step
+    h = _step_sizes(x, rel_step)
+    displacements = [[(i, sign * h[i])] for i in range(len(x)) for sign in [1, -1]]
+    displaced = _displaced_func(func, x)
+
+    results = np.array(evaluate_batch(displaced, displacements, n_workers))
+    jac = (results[::2] - results[1::2]).T / (2 * h)
+    return jac
+
+
+def hessian(func, x, rel_step=None, n_workers=None):
+    """Central difference hessian of a scalar function at x.
+
+    Each entry is calculated from four evaluations at x + s_i h_i e_i + s_j h_j e_j
+    with s_i, s_j in {-1, 1}. For k parameters these are 2k(k + 1) evaluations.
+
+    Args:
+        func (callable): function that maps a 1d array of length k to a scalar.
+        x (np.ndarray): 1d array of length k.
+        rel_step (float): step sizes are rel_step * max(abs(x), 1). Default
+            EPS ** (1 / 4).
+        n_workers (int): see :func:`evaluate_batch`.
+
+    Returns:
+        hess (np.ndarray): array of [k, k].
+
+    """
+    rel_step = EPS ** (1 / 4) if rel_step is None else rel_step
+    h = _step_sizes(x, rel_step)
+    k = len(x)
+    signs = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+    pairs = [(i, j) for i in range(k) for j in range(i, k)]
+    displacements = [
+        [(i, s_i * h[i]), (j, s_j * h[j])] for i, j in pairs for s_i, s_j in signs
+    ]
+    displaced = _displaced_func(func, x)
+
+    results = evaluate_batch(displaced, displacements, n_workers)
+    results = np.array(results).reshape(-1, 4)
+    hess = np.zeros((k, k))
+    for (i, j), (pp, pm, mp, mm) in zip(pairs, results):
+        hess[i, j] = (pp - pm - mp + mm) / (4 * h[i] * h[j])
+        hess[j, i] = hess[i, j]
+    return hess
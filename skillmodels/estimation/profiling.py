@@ -0,0 +1,59 @@
+"""Measure where an evaluation of the likelihood spends its time."""
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LikelihoodProfiler:
+    """Collect wall time and number of calls per stage and period.
+
+    Pass profiler.timer as timer argument to :func:`log_likelihood_contributions`.
+    The stages are "parse", "residuals", "measurement_update",
+    "anchoring_update", "sigma_points", "transition" and "qr". The period of
+    "parse" is -1 because it does not belong to a period.
+
+    Example:
+        >>> profiler = LikelihoodProfiler()  # doctest: +SKIP
+        >>> log_likelihood_contributions(  # doctest: +SKIP
+        ...     params, **args, timer=profiler.timer
+        ... )
+        >>> profiler.to_frame()  # doctest: +SKIP
+
+    """
+
+    def __init__(self):
+        self._records = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, stage, period=-1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                calls, total = self._records.get((stage, period), (0, 0.0))
+                self._records[(stage, period)] = (calls + 1, total + duration)
+
+    def reset(self):
+        with self._lock:
+            self._records = {}
+
+    def to_frame(self):
+        """Tidy DataFrame with the columns stage, period, calls, time and share.
+
+        time is the total wall time in seconds and share the fraction of the total
+        time of all stages.
+
+        """
+        import pandas as pd
+
+        with self._lock:
+            records = [
+                (stage, period, calls, total)
+                for (stage, period), (calls, total) in self._records.items()
+            ]
+        df = pd.DataFrame(records, columns=["stage", "period", "calls", "time"])
+        df["share"] = df["time"] / df["time"].sum()
+        return df
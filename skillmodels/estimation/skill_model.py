@@ -1,29 +1,44 @@
+import copy
+import threading
 import warnings
+from concurrent.futures import as_completed
+from concurrent.futures import ThreadPoolExecutor
 from itertools import product
 from os.path import join
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
-import statsmodels.formula.api as smf
 from estimagic.optimization.optimize import maximize
 from estimagic.optimization.optimize import process_constraints
 
 import skillmodels.model_functions.transition_functions as tf
-from skillmodels.estimation.likelihood_function import log_likelihood_contributions
+from skillmodels.estimation.batched_ols import batched_ols
+from skillmodels.estimation.likelihood_evaluator import LikelihoodEvaluator
+from skillmodels.estimation.likelihood_trace import TraceRecorder
+from skillmodels.estimation.monte_carlo import load_replications
+from skillmodels.estimation.monte_carlo import save_replication
+from skillmodels.estimation.monte_carlo import summarize_monte_carlo
+from skillmodels.estimation.numerical_derivatives import hessian
+from skillmodels.estimation.numerical_derivatives import jacobian
 from skillmodels.estimation.parse_params import parse_params
+from skillmodels.estimation.telemetry import TelemetryCriterion
 from skillmodels.pre_processing.constraints import add_bounds
 from skillmodels.pre_processing.data_processor import DataProcessor
 from skillmodels.pre_processing.model_spec_processor import process_model
 from skillmodels.pre_processing.model_spec_processor import public_attribute_dict
+from skillmodels.simulation.simulate_data import iter_simulated_datasets
 from skillmodels.simulation.simulate_data import simulate_datasets
+from skillmodels.simulation.simulate_data import simulate_policy_scenarios
+from skillmodels.visualization.rendering import render_jobs
 from skillmodels.visualization.table_functions import df_to_tex_table
 from skillmodels.visualization.table_functions import statsmodels_results_to_df
 from skillmodels.visualization.text_functions import get_preamble
 from skillmodels.visualization.text_functions import title_text
 from skillmodels.visualization.text_functions import write_figure_tex_snippet
 
+# approximate size of a per-core cache in bytes. Used to choose the tile size.
+CACHE_SIZE = 2 ** 20
+
 
 class SkillModel:
     """Estimate dynamic nonlinear latent factor models.
@@ -38,11 +53,24 @@ class SkillModel:
         model_name (str): optional. Used to make error messages readable.
         dataset_name (str): same as model_name
         save_path (str): specifies where intermediate results are saved.
+        deduplicate (bool): If True, individuals with identical measurements and
+            control variables are collapsed into one individual with a frequency
+            weight. This does not change the likelihood but the filter only
+            processes unique histories. Default False.
+
+    The attribute nobs is always the number of columns of y_data, i.e. the number
+    of unique individuals if deduplicate is True. The number of individuals in
+    the dataset is then the sum of the attribute weights.
 
     """
 
     def __init__(
-        self, model_dict, dataset, model_name="some_model", dataset_name="some_dataset"
+        self,
+        model_dict,
+        dataset,
+        model_name="some_model",
+        dataset_name="some_dataset",
+        deduplicate=False,
     ):
         specs = process_model(
             model_dict=model_dict,
@@ -53,9 +81,14 @@ class SkillModel:
         specs_dict = public_attribute_dict(specs)
         data_proc = DataProcessor(specs_dict)
         self.data_proc = data_proc
-        self.c_data = data_proc.c_data()
-        self.y_data = data_proc.y_data()
+        if deduplicate:
+            self.y_data, self.c_data, self.weights = data_proc.deduplicated_data()
+        else:
+            self.c_data = data_proc.c_data()
+            self.y_data = data_proc.y_data()
+            self.weights = None
         self.__dict__.update(specs_dict)
+        self.nobs = self.y_data.shape[1]
 
         # create a list of all quantities that depend from params vector
         self.params_quants = [
@@ -126,29 +159,29 @@ class SkillModel:
     def _slice_for_shock_sd(self):
         return [self._get_slice_from_loc(("shock_sd", t)) for t in self.periods[:-1]]
 
-    def _container_for_initial_mean(self):
+    def _container_for_initial_mean(self, nobs=None):
         """Initial X_zero array filled with zeros."""
-        init = np.zeros((self.nobs, self.nmixtures, self.nfac))
-        flat_init = init.reshape(self.nobs * self.nmixtures, self.nfac)
+        nobs = self.nobs if nobs is None else nobs
+        init = np.zeros((nobs, self.nmixtures, self.nfac))
+        flat_init = init.reshape(nobs * self.nmixtures, self.nfac)
         return init, flat_init
 
     def _slice_for_initial_mean(self):
         return self._get_slice_from_loc("initial_mean")
 
-    def _container_for_mixture_weight(self):
+    def _container_for_mixture_weight(self, nobs=None):
         """Initial W_zero array filled with 1/nmixtures."""
-        return np.ones((self.nobs, self.nmixtures)) / self.nmixtures
+        nobs = self.nobs if nobs is None else nobs
+        return np.ones((nobs, self.nmixtures)) / self.nmixtures
 
     def _slice_for_mixture_weight(self):
         return self._get_slice_from_loc("mixture_weight")
 
-    def _container_for_initial_cov(self):
+    def _container_for_initial_cov(self, nobs=None):
         """Initial P_zero array filled with zeros."""
-
-        init = np.zeros((self.nobs, self.nmixtures, self.nfac + 1, self.nfac + 1))
-        flat_init = init.reshape(
-            self.nobs * self.nmixtures, self.nfac + 1, self.nfac + 1
-        )
+        nobs = self.nobs if nobs is None else nobs
+        init = np.zeros((nobs, self.nmixtures, self.nfac + 1, self.nfac + 1))
+        flat_init = init.reshape(nobs * self.nmixtures, self.nfac + 1, self.nfac + 1)
         return init, flat_init
 
     def _slice_for_initial_cov(self):
@@ -292,29 +325,60 @@ class SkillModel:
         scaling_factor = np.sqrt(self.sigma_points_scale + self.nfac)
         return scaling_factor
 
-    def _initial_quantities_dict(self):
+    def _initial_quantities_dict(self, nobs=None, layout="aos"):
+        nobs = self.nobs if nobs is None else nobs
         init_dict = {}
 
+        per_individual = ["initial_mean", "initial_cov", "mixture_weight"]
         for quant in self.params_quants:
-            if quant not in ["initial_mean", "initial_cov"]:
+            if quant not in per_individual:
                 init_dict[quant] = getattr(self, f"_container_for_{quant}")()
-            else:
-                normal, flat = getattr(self, f"_container_for_{quant}")()
+
+        if layout == "aos":
+            init_dict["mixture_weight"] = self._container_for_mixture_weight(nobs)
+            for quant in ["initial_mean", "initial_cov"]:
+                normal, flat = getattr(self, f"_container_for_{quant}")(nobs)
                 init_dict[quant] = normal
                 init_dict[f"flat_{quant}"] = flat
 
-        sp = np.zeros((self.nmixtures * self.nobs, self.nsigma, self.nfac))
-        init_dict["sigma_points"] = sp
-        init_dict["flat_sigma_points"] = sp.reshape(
-            self.nmixtures * self.nobs * self.nsigma, self.nfac
-        )
+            sp = np.zeros((self.nmixtures * nobs, self.nsigma, self.nfac))
+            init_dict["sigma_points"] = sp
+            init_dict["flat_sigma_points"] = sp.reshape(
+                self.nmixtures * nobs * self.nsigma, self.nfac
+            )
+        elif layout == "soa":
+            init_dict.update(self._soa_containers(nobs))
+        else:
+            raise ValueError("layout must be 'aos' or 'soa'.")
 
-        init_dict["like_contributions"] = np.zeros((self.nupdates, self.nobs))
+        init_dict["like_contributions"] = np.zeros((self.nupdates, nobs))
+        init_dict["residuals"] = np.zeros((self.nupdates, nobs))
         if self.anchoring:
             init_dict["anchoring_loading"] = self._container_for_anchoring_loadings()
 
         return init_dict
 
+    def _soa_containers(self, nobs):
+        """Containers with the individuals as innermost dimension.
+
+        The entries without soa prefix are transposed views in the usual
+        dimension order, so parse_params fills the soa containers.
+
+        """
+        mean = np.zeros((self.nmixtures, self.nfac, nobs))
+        cov = np.zeros((self.nmixtures, self.nfac + 1, self.nfac + 1, nobs))
+        weight = np.ones((self.nmixtures, nobs)) / self.nmixtures
+
+        soa_dict = {
+            "soa_initial_mean": mean,
+            "soa_initial_cov": cov,
+            "soa_mixture_weight": weight,
+            "initial_mean": np.transpose(mean, axes=(2, 0, 1)),
+            "initial_cov": np.transpose(cov, axes=(3, 0, 1, 2)),
+            "mixture_weight": weight.T,
+        }
+        return soa_dict
+
     def _parsing_info(self):
         parsing_info = {}
         for quant in self.params_quants:
@@ -331,30 +395,61 @@ class SkillModel:
         }
         return pp
 
-    def _update_args_dict(self, initial_quantities):
+    def _update_args_dict(self, initial_quantities, layout="aos"):
+        """List with arguments for the update functions.
+
+        The measurements are residualized before the updates of each period (see
+        :meth:`_residual_args_list`), so the update functions get the residuals
+        and no control variables.
+
+        """
         position_helper = self.update_info[list(self.factors)].to_numpy().astype(bool)
+        nobs = initial_quantities["residuals"].shape[1]
+        no_coeffs = np.zeros(0)
+        if layout == "aos":
+            prefix = ""
+            no_controls = np.zeros((nobs, 0))
+        else:
+            prefix = "soa_"
+            no_controls = np.zeros((0, nobs))
 
         u_args_list = []
         k = 0
         for t in self.periods:
             nmeas = len(self.update_info.loc[t].index)
-            for j in range(nmeas):
+            for _j in range(nmeas):
                 u_args = [
-                    initial_quantities["initial_mean"],
-                    initial_quantities["initial_cov"],
+                    initial_quantities[f"{prefix}initial_mean"],
+                    initial_quantities[f"{prefix}initial_cov"],
                     initial_quantities["like_contributions"][k],
-                    self.y_data[k],
-                    self.c_data[t],
-                    initial_quantities["control_coeffs"][t][j],
+                    initial_quantities["residuals"][k],
+                    no_controls,
+                    no_coeffs,
                     initial_quantities["loading"][k],
                     initial_quantities["meas_sd"][k : k + 1],
                     np.arange(self.nfac)[position_helper[k]],
-                    initial_quantities["mixture_weight"],
+                    initial_quantities[f"{prefix}mixture_weight"],
                 ]
                 u_args_list.append(u_args)
                 k += 1
         return u_args_list
 
+    def _residual_args_list(self, initial_quantities, y_data, c_data):
+        """List with arguments for :func:`residualize_measurements` per period."""
+        r_args_list = []
+        k = 0
+        for t in self.periods:
+            nmeas = len(self.update_info.loc[t].index)
+            r_args = {
+                "y": y_data[k : k + nmeas],
+                "c": c_data[t],
+                "control_coeffs": initial_quantities["control_coeffs"][t],
+                "out": initial_quantities["residuals"][k : k + nmeas],
+            }
+            r_args_list.append(r_args)
+            k += nmeas
+        return r_args_list
+
     def _transition_equation_args_dicts(self, initial_quantities):
         dict_list = [[{} for f in self.factors] for t in self.periods[:-1]]
 
@@ -363,20 +458,22 @@ class SkillModel:
             dict_list[t][f]["included_positions"] = self.included_positions[f]
         return dict_list
 
-    def _transform_sigma_points_args_dict(self, initial_quantities):
+    def _transform_sigma_points_args_dict(self, initial_quantities, y_data):
         tsp_args = {}
         tsp_args["transition_function_names"] = self.transition_names
 
         if self.anchoring:
-            mask = self.update_info["purpose"] == "anchoring"
-            anch_params_shape = (self.nperiods, len(self.anchored_factors), -1)
+            mask = (self.update_info["purpose"] == "anchoring").to_numpy()
+            anch_rows = np.arange(self.nupdates)[mask].reshape(self.nperiods, -1)
             tsp_args["anchoring_loadings"] = initial_quantities["anchoring_loading"]
             tsp_args["anchoring_positions"] = self.anch_positions
 
             if self.centered_anchoring:
-                tsp_args["anchoring_variables"] = self.y_data[mask].reshape(
-                    anch_params_shape
-                )
+                # the anchoring updates of a period are consecutive, so slicing
+                # yields views that stay valid when y_data is refilled in place.
+                tsp_args["anchoring_variables"] = [
+                    y_data[rows[0] : rows[-1] + 1] for rows in anch_rows
+                ]
             else:
                 tsp_args["anchoring_variables"] = [None] * self.nperiods
 
@@ -385,45 +482,197 @@ class SkillModel:
         )
         return tsp_args
 
-    def _predict_args_dict(self, initial_quantities):
+    def _predict_args_dict(self, initial_quantities, y_data, layout="aos"):
         p_args = {}
-        p_args["sigma_points"] = initial_quantities["sigma_points"]
-        p_args["flat_sigma_points"] = initial_quantities["flat_sigma_points"]
+        if layout == "aos":
+            p_args["sigma_points"] = initial_quantities["sigma_points"]
+            p_args["flat_sigma_points"] = initial_quantities["flat_sigma_points"]
+        else:
+            p_args["sigma_points"] = initial_quantities["soa_sigma_points"]
         p_args["s_weights_m"], p_args["s_weights_c"] = self.sigma_weights()
         p_args["shock_sd"] = initial_quantities["shock_sd"]
         p_args["transform_sigma_points_args"] = self._transform_sigma_points_args_dict(
-            initial_quantities
+            initial_quantities, y_data
         )
-        p_args["out_flat_states"] = initial_quantities["flat_initial_mean"]
-        p_args["out_flat_covs"] = initial_quantities["flat_initial_cov"]
+        if layout == "aos":
+            p_args["out_flat_states"] = initial_quantities["flat_initial_mean"]
+            p_args["out_flat_covs"] = initial_quantities["flat_initial_cov"]
+        else:
+            p_args["out_states"] = initial_quantities["soa_initial_mean"]
+            p_args["out_covs"] = initial_quantities["soa_initial_cov"]
         return p_args
 
-    def _calculate_sigma_points_args_dict(self, initial_quantities):
+    def _calculate_sigma_points_args_dict(self, initial_quantities, layout="aos"):
         sp_args = {}
-        sp_args["states"] = initial_quantities["initial_mean"]
-        sp_args["flat_covs"] = initial_quantities["flat_initial_cov"]
-        sp_args["out"] = initial_quantities["sigma_points"]
+        if layout == "aos":
+            sp_args["states"] = initial_quantities["initial_mean"]
+            sp_args["flat_covs"] = initial_quantities["flat_initial_cov"]
+            sp_args["out"] = initial_quantities["sigma_points"]
+        else:
+            sp_args["states"] = initial_quantities["soa_initial_mean"]
+            sp_args["covs"] = initial_quantities["soa_initial_cov"]
+            sp_args["out"] = initial_quantities["soa_sigma_points"]
         sp_args["scaling_factor"] = self.sigma_scaling_factor()
         return sp_args
 
-    def likelihood_arguments_dict(self):
-        """Construct a dict with arguments for the likelihood function."""
-        initial_quantities = self._initial_quantities_dict()
+    def _tile_quantities(self, initial_quantities, start, stop, layout="aos"):
+        """Views on the quantities that belong to the individuals start to stop."""
+        nm = self.nmixtures
+        tile_iq = initial_quantities.copy()
+        if layout == "aos":
+            for quant in ["initial_mean", "initial_cov", "mixture_weight"]:
+                tile_iq[quant] = initial_quantities[quant][start:stop]
+            for quant in ["flat_initial_mean", "flat_initial_cov", "sigma_points"]:
+                tile_iq[quant] = initial_quantities[quant][start * nm : stop * nm]
+            flat_sp = tile_iq["sigma_points"].reshape(-1, self.nfac)
+            tile_iq["flat_sigma_points"] = flat_sp
+        else:
+            for quant in ["initial_mean", "initial_cov", "mixture_weight"]:
+                soa_quant = initial_quantities[f"soa_{quant}"]
+                tile_iq[f"soa_{quant}"] = soa_quant[..., start:stop]
+            # sigma points are scratch space, so each tile gets its own
+            # contiguous array.
+            tile_iq["soa_sigma_points"] = np.zeros(
+                (self.nfac, nm, self.nsigma, stop - start)
+            )
+        for quant in ["like_contributions", "residuals"]:
+            tile_iq[quant] = initial_quantities[quant][:, start:stop]
+        return tile_iq
+
+    def _tile_size(self, tile_size, nobs):
+        if tile_size is None:
+            tile_size = nobs
+        elif tile_size == "auto":
+            tile_size = self._chunk_size(CACHE_SIZE)
+        return max(min(tile_size, nobs), 1)
+
+    def likelihood_arguments_dict(
+        self, y_data=None, c_data=None, tile_size=None, layout="aos"
+    ):
+        """Construct a dict with arguments for the likelihood function.
+
+        Args:
+            y_data (np.ndarray): optional array of [nupdates, nobs] with
+                measurements. Default self.y_data.
+            c_data (list): optional list of arrays with control variables in the
+                format of self.c_data. Default self.c_data.
+            tile_size (int or str): number of individuals that are processed
+                through all updates and the predict step of a period before the
+                next individuals are processed. "auto" chooses the tile size such
+                that the filter quantities of one tile fit into CACHE_SIZE bytes.
+                Default None, which processes all individuals at once.
+            layout (str): "aos" (default) stores states, covariance factors and
+                sigma points individual by individual. "soa" stores them with
+                the individuals as innermost dimension, which allows the kernels
+                to apply each operation to a vector of individuals.
+
+        """
+        y_data = self.y_data if y_data is None else y_data
+        c_data = self.c_data if c_data is None else c_data
+        nobs = y_data.shape[1]
+        initial_quantities = self._initial_quantities_dict(nobs=nobs, layout=layout)
+        tile_size = self._tile_size(tile_size, nobs)
+
+        sp_args_func = self._calculate_sigma_points_args_dict
+        tiles = []
+        for start in range(0, nobs, tile_size):
+            stop = min(start + tile_size, nobs)
+            tile_iq = self._tile_quantities(initial_quantities, start, stop, layout)
+            y_tile = y_data[:, start:stop]
+            tile = {}
+            tile["update_args"] = self._update_args_dict(tile_iq, layout)
+            tile["predict_args"] = self._predict_args_dict(tile_iq, y_tile, layout)
+            tile["calculate_sigma_points_args"] = sp_args_func(tile_iq, layout)
+            tiles.append(tile)
 
         args = {}
         args["like_contributions"] = initial_quantities["like_contributions"]
         args["parse_params_args"] = self._parse_params_args_dict(initial_quantities)
         args["periods"] = self.periods
+        args["residual_args"] = self._residual_args_list(
+            initial_quantities, y_data, c_data
+        )
         args["update_info"] = self.update_info
         args["anchoring"] = self.anchoring
-        args["update_args"] = self._update_args_dict(initial_quantities)
-        args["predict_args"] = self._predict_args_dict(initial_quantities)
-        args["calculate_sigma_points_args"] = self._calculate_sigma_points_args_dict(
-            initial_quantities
+        args["tiles"] = tiles
+        args["layout"] = layout
+        return args
+
+    def _bytes_per_individual(self):
+        """Approximate memory in bytes needed per individual during an evaluation.
+
+        Counts the filter containers, the chunk buffers for measurements and
+        controls and the largest temporary arrays of the predict step.
+
+        """
+        nstates = self.nmixtures * (
+            self.nfac  # states
+            + (self.nfac + 1) ** 2  # covariance factors
+            + 4 * self.nsigma * self.nfac  # sigma points and predict temporaries
+            + (3 * self.nfac + 1) * self.nfac  # qr_points of the predict step
+            + 1  # mixture weights
+        )
+        ncontrols = sum(c.shape[1] for c in self.c_data)
+        n_floats = nstates + 3 * self.nupdates + ncontrols
+        return 8 * n_floats
+
+    def _chunk_size(self, memory_budget):
+        """Number of individuals that fit into *memory_budget* bytes."""
+        chunk_size = int(memory_budget // self._bytes_per_individual())
+        assert chunk_size >= 1, "The memory_budget is too small for one individual."
+        return min(chunk_size, self.nobs)
+
+    def chunked_likelihood_arguments_dict(
+        self,
+        memory_budget=2 ** 28,
+        chunk_size=None,
+        layout="aos",
+        y_data=None,
+        c_data=None,
+    ):
+        """Construct a dict with arguments for the chunked likelihood function.
+
+        The filter containers are only allocated for one chunk of individuals and
+        reused for all chunks. See :func:`chunked_log_likelihood`.
+
+        Args:
+            memory_budget (int): approximate number of bytes the filter may use.
+                Default 256 MiB. Only used if chunk_size is None.
+            chunk_size (int): number of individuals that are processed together.
+            layout (str): see :meth:`likelihood_arguments_dict`.
+            y_data (np.ndarray): see :meth:`likelihood_arguments_dict`.
+            c_data (list): see :meth:`likelihood_arguments_dict`.
+
+        """
+        y_data = self.y_data if y_data is None else y_data
+        c_data = self.c_data if c_data is None else c_data
+        if chunk_size is None:
+            chunk_size = self._chunk_size(memory_budget)
+        chunk_size = min(chunk_size, y_data.shape[1])
+
+        y_chunk = np.full((self.nupdates, chunk_size), np.nan)
+        c_chunk = [np.zeros((chunk_size, c.shape[1])) for c in c_data]
+
+        args = {}
+        args["y_data"] = y_data
+        args["c_data"] = c_data
+        args["y_chunk"] = y_chunk
+        args["c_chunk"] = c_chunk
+        args["chunk_args"] = self.likelihood_arguments_dict(
+            y_data=y_chunk, c_data=c_chunk, layout=layout
         )
         return args
 
-    def simulate(self, nobs, params, policies=None):
+    def simulate(
+        self,
+        nobs,
+        params,
+        policies=None,
+        seed=None,
+        chunk_size=None,
+        n_workers=1,
+        output="frames",
+    ):
         """Simulate a dataset generated by the model at *params*.
 
         Args:
@@ -433,12 +682,147 @@ class SkillModel:
                 specifies a potentially stochastic shock to a latent factor at the end
                 of "period" for "factor" with mean "effect_size" and
                 "standard deviation".
+            seed (int, np.random.SeedSequence or np.random.Generator): If
+                specified, chunks of individuals are simulated with independent
+                random streams derived from seed and the results are identical for
+                any n_workers. If None, the global random state of numpy is used.
+            chunk_size (int): number of individuals per chunk. See
+                :func:`simulate_datasets`.
+            n_workers (int): number of processes in which the chunks are simulated.
+            output (str): "frames" or "arrays". With "arrays", no DataFrames are
+                constructed and the result can be passed to :meth:`with_data` or
+                :class:`LikelihoodEvaluator`. The random draws are the same.
 
         Returns:
             observed_data (pd.DataFrame)
             latent_data (pd.DataFrame)
 
+            With output="arrays":
+
+            y_data (np.ndarray): array of [nupdates, nobs] in the format of
+                self.y_data.
+            c_data (list): list of arrays in the format of self.c_data.
+            factors (np.ndarray): array of [nperiods, nobs, nfac] with the latent
+                factors in the order of self.factors.
+
         """
+        return simulate_datasets(
+            nobs=nobs,
+            seed=seed,
+            chunk_size=chunk_size,
+            n_workers=n_workers,
+            output=output,
+            **self._simulation_args(params, policies),
+        )
+
+    def simulate_chunks(
+        self,
+        nobs,
+        params,
+        policies=None,
+        chunk_size=None,
+        seed=None,
+        n_workers=1,
+        output="frames",
+    ):
+        """Simulate a dataset in chunks of individuals and yield the chunks.
+
+        Only one chunk is held in memory. Use :func:`write_simulated_datasets` to
+        stream the chunks to disk. The concatenated chunks equal the result of
+        :func:`simulate_datasets` with the same seed and chunk_size.
+
+        Args:
+            nobs (int): number of observations to simulate
+            params (np.array): parameters
+            policies (list): see :meth:`simulate`.
+            chunk_size (int): number of individuals per chunk. Default
+                :data:`skillmodels.simulation.simulate_data.CHUNK_SIZE`.
+            seed (int, np.random.SeedSequence or np.random.Generator): seed from
+                which an independent random stream for each chunk is derived. If
+                None, the global random state of numpy is used.
+            n_workers (int): number of processes in which the chunks are simulated.
+            output (str): "frames" or "arrays". See :meth:`simulate`.
+
+        Yields:
+            observed_data (pd.DataFrame)
+            latent_data (pd.DataFrame)
+
+            With output="arrays", y_data, the controls and the factors of the chunk.
+            The controls are the same in all periods.
+
+        """
+        return iter_simulated_datasets(
+            nobs,
+            chunk_size,
+            seed,
+            n_workers,
+            output,
+            **self._simulation_args(params, policies),
+        )
+
+    def with_data(self, y_data, c_data, weights=None):
+        """Copy of the model that evaluates the likelihood on other data arrays.
+
+        The model specification is shared with self, so this is much faster than
+        constructing a SkillModel from a long format DataFrame. It is meant for
+        data that is simulated with output="arrays" or resampled from self.y_data.
+        Methods that work on the DataFrame, e.g. the plots and the score
+        regressions, still use the dataset the model was constructed with.
+
+        Args:
+            y_data (np.ndarray): array of [nupdates, nobs] in the format of
+                self.y_data.
+            c_data (list): list of arrays in the format of self.c_data.
+            weights (np.ndarray): optional frequency weights of length nobs.
+
+        Returns:
+            model (SkillModel)
+
+        """
+        assert y_data.shape[0] == self.nupdates, "y_data needs nupdates rows."
+        assert len(c_data) == self.nperiods, "c_data needs one array per period."
+        model = copy.copy(self)
+        model.y_data = y_data
+        model.c_data = c_data
+        model.weights = weights
+        model.nobs = y_data.shape[1]
+        return model
+
+    def simulate_policies(
+        self, params, scenarios, nobs, seed=None, quantiles=(0.1, 0.5, 0.9)
+    ):
+        """Compare the latent factors under several policy scenarios.
+
+        All scenarios share the start factors and shocks, so the differences
+        between them are not contaminated by simulation noise and the scenarios
+        are propagated in one vectorized simulation. See
+        :func:`simulate_policy_scenarios`.
+
+        Args:
+            params (pd.DataFrame): parameters
+            scenarios (dict or list): dict that maps scenario names to policies in
+                the format of :meth:`simulate` or list of policies. None is the
+                scenario without policy.
+            nobs (int): number of simulated individuals.
+            seed (int, np.random.SeedSequence or np.random.Generator): seed of the
+                random stream. If None, the global random state of numpy is used.
+            quantiles (tuple): quantiles of the factor distribution that are
+                reported.
+
+        Returns:
+            summary (pd.DataFrame): mean, standard deviation and quantiles of each
+                factor by scenario and period.
+
+        """
+        args = self._simulation_args(params)
+        for key in ["loadings_df", "control_coeffs", "meas_variances", "policies"]:
+            del args[key]
+        return simulate_policy_scenarios(
+            scenarios, nobs, seed=seed, quantiles=quantiles, **args
+        )
+
+    def _simulation_args(self, params, policies=None):
+        """Arguments of :func:`simulate_datasets` except for nobs."""
         if isinstance(policies, dict):
             policies = [policies]
 
@@ -495,26 +879,24 @@ class SkillModel:
             full_cov[:nfac, :nfac] = factor_cov
             d = {"mean": np.hstack([factor_mean, control_mean]), "cov": full_cov}
             dist_arg_dict.append(d)
-        weights = np.ones(self.nmixtures)
+        weights = initial_quantities["mixture_weight"][0]
 
-        observed_data, latent_data = simulate_datasets(
-            factor_names=factor_names,
-            control_names=control_names,
-            nobs=nobs,
-            nper=self.nperiods,
-            transition_names=transition_names,
-            transition_argument_dicts=transition_argument_dicts,
-            shock_sd=shock_sd,
-            loadings_df=loadings_df,
-            control_coeffs=control_coeffs,
-            meas_variances=meas_variances,
-            dist_name=dist_name,
-            dist_arg_dict=dist_arg_dict,
-            weights=weights,
-            policies=policies,
-        )
-
-        return observed_data, latent_data
+        args = {
+            "factor_names": factor_names,
+            "control_names": control_names,
+            "nper": self.nperiods,
+            "transition_names": transition_names,
+            "transition_argument_dicts": transition_argument_dicts,
+            "shock_sd": shock_sd,
+            "loadings_df": loadings_df,
+            "control_coeffs": control_coeffs,
+            "meas_variances": meas_variances,
+            "dist_name": dist_name,
+            "dist_arg_dict": dist_arg_dict,
+            "weights": weights,
+            "policies": policies,
+        }
+        return args
 
     def fit(
         self,
@@ -526,6 +908,11 @@ class SkillModel:
         db_options=None,
         logging=None,
         log_options=None,
+        memory_budget=None,
+        tile_size=None,
+        layout="aos",
+        telemetry=None,
+        trace=None,
     ):
         """Fit the model and return the estimated parameters.
 
@@ -540,6 +927,21 @@ class SkillModel:
             db_options (dict): Arguments to configure the dashboard.
             logging (Path): Path to .db file.
             log_options (dict)
+            memory_budget (int): If specified, the likelihood is evaluated in chunks
+                of individuals such that the filter uses approximately
+                memory_budget bytes. See :func:`chunked_log_likelihood`.
+            tile_size (int or str): Number of individuals that are processed
+                together in each period. See :meth:`likelihood_arguments_dict`.
+            layout (str): Memory layout of the filter quantities, "aos" or "soa".
+                See :meth:`likelihood_arguments_dict`.
+            telemetry (callable, str or pathlib.Path): If specified, an event with
+                latency, throughput, memory and criterion value is emitted after
+                each evaluation of the likelihood, either by calling telemetry
+                with a dict or by appending a line to the .jsonl file telemetry.
+                See :class:`TelemetryCriterion`.
+            trace (str or pathlib.Path): If specified, all parameter vectors at
+                which the optimizer evaluated the likelihood are saved to the .npz
+                file trace. It can be replayed with :func:`replay_trace`.
 
         Returns
             res (optimization result)
@@ -548,27 +950,56 @@ class SkillModel:
         `estimagic documentation <https://tinyurl.com/y3hbgmam>`_
 
         """
+        start_params = self.generate_full_start_params(start_params)
+
+        criterion = LikelihoodEvaluator(
+            self, memory_budget=memory_budget, tile_size=tile_size, layout=layout
+        )
+        if trace is not None:
+            criterion = recorder = TraceRecorder(criterion, self.params_index)
+        if telemetry is not None:
+            criterion = TelemetryCriterion(criterion, telemetry)
+
+        try:
+            res = self._maximize(
+                criterion,
+                start_params,
+                algorithm=algorithm,
+                user_constraints=user_constraints,
+                algo_options=algo_options,
+                dashboard=dashboard,
+                db_options=db_options,
+                logging=logging,
+                log_options=log_options,
+            )
+        finally:
+            if trace is not None:
+                recorder.save(trace)
+        return res
+
+    def _maximize(
+        self,
+        criterion,
+        start_params,
+        algorithm,
+        user_constraints=None,
+        algo_options=None,
+        dashboard=False,
+        db_options=None,
+        logging=None,
+        log_options=None,
+    ):
         user_constraints = user_constraints if user_constraints is not None else []
         db_options = {} if db_options is None else db_options
         combined_algo_options = {"maxfun": 1000000, "maxiter": 1000000}
         if algo_options is not None:
             combined_algo_options.update(algo_options)
 
-        args = self.likelihood_arguments_dict()
-        start_params = self.generate_full_start_params(start_params)
-
-        def criterion(params, args):
-            log_like_contributions = log_likelihood_contributions(params, **args)
-            log_like_contributions[log_like_contributions < -1e300] = -1e300
-            res = np.mean(log_like_contributions)
-            return res
-
         res = maximize(
             criterion,
             start_params,
             constraints=self.constraints + user_constraints,
             algorithm=algorithm,
-            criterion_kwargs={"args": args},
             dashboard=dashboard,
             db_options=db_options,
             algo_options=combined_algo_options,
@@ -578,6 +1009,460 @@ class SkillModel:
         )
         return res
 
+    def _jointly_constrained_params(self):
+        """Index of free parameters whose constraints are not just bounds.
+
+        These are the parameters in probability, covariance and increasing
+        constraints. Perturbing them independently would violate the constraint.
+
+        """
+        params = pd.DataFrame(index=self.params_index)
+        params["constrained"] = False
+        joint_types = ["probability", "covariance", "sdcorr", "increasing"]
+        locs = [c["loc"] for c in self.constraints if c["type"] in joint_types]
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore", message="indexing past lexsort depth may impact performance."
+            )
+            for loc in locs:
+                params.loc[loc, "constrained"] = True
+        return params.index[params["constrained"]]
+
+    def multistart_params(self, start_params=None, n_starts=20, scale=0.1, seed=None):
+        """List of start parameters for :meth:`fit_multistart`.
+
+        The first element are the full start parameters. The others are random
+        perturbations of them. Each free parameter is perturbed with normally
+        distributed noise with standard deviation scale * max(abs(value), 1).
+        Parameters that are fixed or equal to other parameters are not perturbed
+        directly and parameters in probability, covariance and increasing
+        constraints are not perturbed at all. A perturbation that would violate
+        a lower bound is discarded.
+
+        Args:
+            start_params (pd.DataFrame): see :meth:`fit`.
+            n_starts (int): number of start parameters.
+            scale (float): relative standard deviation of the perturbations.
+            seed (int): seed for the random number generator.
+
+        Returns:
+            params_list (list): list of DataFrames with start parameters.
+
+        """
+        full_sp = self.generate_full_start_params(start_params)
+        free, fixed = self.start_params_helpers()
+        to_perturb = free.index.difference(self._jointly_constrained_params())
+        values = full_sp.loc[to_perturb, "value"].to_numpy()
+        lower = full_sp.loc[to_perturb, "lower"].to_numpy()
+        sd = scale * np.maximum(np.abs(values), 1)
+
+        rng = np.random.default_rng(seed)
+        params_list = [full_sp]
+        for _ in range(n_starts - 1):
+            perturbed = values + rng.normal(scale=sd)
+            perturbed = np.where(perturbed < lower, values, perturbed)
+            new_free = full_sp.loc[free.index, ["value"]].copy()
+            new_free.loc[to_perturb, "value"] = perturbed
+            params_list.append(self.generate_full_start_params(new_free))
+        return params_list
+
+    def fit_multistart(
+        self,
+        start_params=None,
+        n_starts=20,
+        scale=0.1,
+        seed=None,
+        n_workers=None,
+        stop_after=None,
+        convergence_tol=1e-6,
+        algorithm="scipy_L-BFGS-B",
+        user_constraints=None,
+        algo_options=None,
+        memory_budget=None,
+        tile_size=None,
+        layout="aos",
+    ):
+        """Fit the model from several start parameters in parallel.
+
+        All optimizations run in threads of one process and share the model, its
+        data and the compiled kernels. They evaluate the likelihood through one
+        :class:`LikelihoodEvaluator`, which gives each running optimization its
+        own workspace.
+
+        Args:
+            start_params (pd.DataFrame or list): If a list of DataFrames is given,
+                each of them is used as start parameters. Otherwise, n_starts start
+                parameters are drawn around start_params with
+                :meth:`multistart_params`.
+            n_starts (int): number of start parameters that are drawn.
+            scale (float): see :meth:`multistart_params`.
+            seed (int): see :meth:`multistart_params`.
+            n_workers (int): number of optimizations that run at the same time.
+                Default None, which uses the default of ThreadPoolExecutor.
+            stop_after (int): If specified, optimizations that have not started
+                yet are cancelled as soon as stop_after optimizations have reached
+                the best criterion value found so far.
+            convergence_tol (float): absolute difference of criterion values below
+                which two optimizations are considered to have found the same
+                optimum.
+            algorithm (str): see :meth:`fit`.
+            user_constraints (list): see :meth:`fit`.
+            algo_options (dict): see :meth:`fit`.
+            memory_budget (int): see :meth:`fit`.
+            tile_size (int or str): see :meth:`fit`.
+            layout (str): see :meth:`fit`.
+
+        Returns:
+            results (list): list of dicts with the entries "value" (average log
+                likelihood contribution at the optimum), "params",
+                "start_params" and "result" (the result of the optimizer). The list
+                is sorted such that the best optimum comes first.
+
+        """
+        if isinstance(start_params, list):
+            params_list = [self.generate_full_start_params(sp) for sp in start_params]
+        else:
+            params_list = self.multistart_params(start_params, n_starts, scale, seed)
+
+        criterion = LikelihoodEvaluator(
+            self, memory_budget=memory_budget, tile_size=tile_size, layout=layout
+        )
+
+        def optimize(sp):
+            res = self._maximize(
+                criterion,
+                sp,
+                algorithm=algorithm,
+                user_constraints=user_constraints,
+                algo_options=algo_options,
+            )
+            params = res[1]
+            value = criterion(params)
+            return {"value": value, "params": params, "start_params": sp, "result": res}
+
+        results = []
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            futures = [executor.submit(optimize, sp) for sp in params_list]
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                results.append(future.result())
+                if stop_after is not None:
+                    best = max(r["value"] for r in results)
+                    n_hits = sum(
+                        abs(r["value"] - best) <= convergence_tol for r in results
+                    )
+                    if n_hits >= stop_after:
+                        for f in futures:
+                            f.cancel()
+
+        results.sort(key=lambda r: r["value"], reverse=True)
+        return results
+
+    def bootstrap(
+        self,
+        params,
+        n_draws=100,
+        seed=None,
+        n_workers=None,
+        algorithm="scipy_L-BFGS-B",
+        user_constraints=None,
+        algo_options=None,
+        memory_budget=None,
+        tile_size=None,
+        layout="aos",
+    ):
+        """Re-estimate the model on bootstrap samples of individuals.
+
+        Each bootstrap sample draws nobs individuals with replacement. Instead of
+        constructing a new model from a resampled dataset, the likelihood is
+        evaluated on the measurements and controls of the drawn individuals, where
+        individuals that were drawn several times appear only once but get a
+        frequency weight equal to the number of draws. Each replication starts at
+        params and the replications run in parallel threads.
+
+        Args:
+            params (pd.DataFrame): the point estimates, used as start values.
+            n_draws (int): number of bootstrap replications.
+            seed (int): seed for the random number generator.
+            n_workers (int): number of replications that run at the same time.
+                Default None, which uses the default of ThreadPoolExecutor.
+            algorithm (str): see :meth:`fit`.
+            user_constraints (list): see :meth:`fit`.
+            algo_options (dict): see :meth:`fit`.
+            memory_budget (int): see :meth:`fit`.
+            tile_size (int or str): see :meth:`fit`.
+            layout (str): see :meth:`fit`.
+
+        Returns:
+            estimates (pd.DataFrame): DataFrame with the index of params and one
+                column per bootstrap replication. estimates.std(axis=1) are the
+                bootstrap standard errors.
+
+        """
+        start_params = self.generate_full_start_params(params)
+        rows = np.arange(self.y_data.shape[1])
+        if self.weights is not None:
+            # each row stands for several individuals that are drawn separately.
+            rows = np.repeat(rows, self.weights)
+        rng = np.random.default_rng(seed)
+        draws = [rng.choice(rows, size=len(rows)) for _ in range(n_draws)]
+
+        def replicate(draw):
+            indices, counts = np.unique(draw, return_counts=True)
+            criterion = LikelihoodEvaluator(
+                self,
+                memory_budget=memory_budget,
+                tile_size=tile_size,
+                layout=layout,
+                y_data=self.y_data[:, indices],
+                c_data=[c[indices] for c in self.c_data],
+                weights=counts,
+            )
+            res = self._maximize(
+                criterion,
+                start_params,
+                algorithm=algorithm,
+                user_constraints=user_constraints,
+                algo_options=algo_options,
+            )
+            return res[1]["value"]
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            estimates = list(executor.map(replicate, draws))
+
+        return pd.concat(estimates, axis=1, keys=range(n_draws))
+
+    def monte_carlo(
+        self,
+        params,
+        nobs,
+        n_replications=100,
+        seed=None,
+        n_workers=None,
+        checkpoint_dir=None,
+        se_method=None,
+        level=0.95,
+        start_params=None,
+        algorithm="scipy_L-BFGS-B",
+        user_constraints=None,
+        algo_options=None,
+        memory_budget=None,
+        tile_size=None,
+        layout="aos",
+    ):
+        """Simulate datasets at params, re-estimate the model on each and summarize.
+
+        All replications use this model. Each thread keeps one
+        :class:`LikelihoodEvaluator` whose arrays with measurements and controls
+        are refilled in place with the data of its next replication, so the model
+        is constructed, the kernels are compiled and the workspaces are allocated
+        only once per thread. Replications run in parallel threads. Each replication
+        simulates its data with its own random stream derived from seed, so the
+        results do not depend on n_workers or on the order in which replications
+        finish.
+
+        Args:
+            params (pd.DataFrame): true parameters at which the data is simulated.
+            nobs (int): number of individuals in each simulated dataset.
+            n_replications (int): number of replications.
+            seed (int): seed from which the seeds of all replications are derived.
+            n_workers (int): number of replications that run at the same time.
+                Default None, which uses the default of ThreadPoolExecutor.
+            checkpoint_dir (str or pathlib.Path): If specified, the result of each
+                finished replication is pickled to this directory. Replications
+                that already have a checkpoint are not run again, so an
+                interrupted study can be resumed by calling monte_carlo with the
+                same arguments.
+            se_method (str): If specified, standard errors are calculated in each
+                replication with this method and the coverage of confidence
+                intervals is reported. See :meth:`standard_errors`.
+            level (float): level of the confidence intervals.
+            start_params (pd.DataFrame): start values of the optimizations. Default
+                params.
+            algorithm (str): see :meth:`fit`.
+            user_constraints (list): see :meth:`fit`.
+            algo_options (dict): see :meth:`fit`.
+            memory_budget (int): see :meth:`fit`.
+            tile_size (int or str): see :meth:`fit`.
+            layout (str): see :meth:`fit`.
+
+        Returns:
+            results (dict): with the entries "estimates" (DataFrame with one column
+                per replication), "standard_errors" (same format or None) and
+                "summary" (see :func:`summarize_monte_carlo`).
+
+        """
+        true_params = self.generate_full_start_params(params)
+        start_params = true_params if start_params is None else start_params
+        start_params = self.generate_full_start_params(start_params)
+        seeds = np.random.SeedSequence(seed).spawn(n_replications)
+        results = load_replications(checkpoint_dir, n_replications)
+        local = threading.local()
+
+        def replicate(replication):
+            y_data, c_data, _ = self.simulate(
+                nobs, true_params, seed=seeds[replication], output="arrays"
+            )
+            if hasattr(local, "criterion"):
+                # the workspaces of the evaluator hold views of its data arrays.
+                criterion = local.criterion
+                criterion.y_data[:] = y_data
+                for old, new in zip(criterion.c_data, c_data):
+                    old[:] = new
+            else:
+                criterion = LikelihoodEvaluator(
+                    self,
+                    memory_budget=memory_budget,
+                    tile_size=tile_size,
+                    layout=layout,
+                    y_data=y_data,
+                    c_data=c_data,
+                )
+                local.criterion = criterion
+            res = self._maximize(
+                criterion,
+                start_params,
+                algorithm=algorithm,
+                user_constraints=user_constraints,
+                algo_options=algo_options,
+            )
+            result = {"estimates": res[1]["value"], "standard_errors": None}
+            if se_method is not None:
+                cov = self._covariance(criterion, res[1], se_method)
+                result["standard_errors"] = pd.Series(
+                    np.sqrt(np.diag(cov)), index=cov.index
+                )
+            if checkpoint_dir is not None:
+                save_replication(checkpoint_dir, replication, result)
+            return replication, result
+
+        to_run = [r for r in range(n_replications) if r not in results]
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            for replication, result in executor.map(replicate, to_run):
+                results[replication] = result
+
+        replications = range(n_replications)
+        estimates = pd.concat(
+            [results[r]["estimates"] for r in replications], axis=1, keys=replications
+        )
+        standard_errors = None
+        if se_method is not None:
+            standard_errors = pd.concat(
+                [results[r]["standard_errors"] for r in replications],
+                axis=1,
+                keys=replications,
+            )
+        summary = summarize_monte_carlo(
+            estimates, true_params["value"], standard_errors, level
+        )
+        return {
+            "estimates": estimates,
+            "standard_errors": standard_errors,
+            "summary": summary,
+        }
+
+    def _free_params_func(self, params):
+        """Map free parameters into the full params vector.
+
+        Returns:
+            free_index (pd.MultiIndex): index of the free parameters.
+            free_values (np.ndarray): values of the free parameters in params.
+            to_full (callable): maps an array of free parameters into a pd.Series
+                with all parameters.
+
+        """
+        full = self.generate_full_start_params(params)
+        free, fixed = self.start_params_helpers()
+        empty_params = pd.concat([free, fixed], sort=False).reindex(self.params_index)
+        pc, pp = process_constraints(self.constraints, empty_params)
+        replacements = pp["_post_replacements"].to_numpy()
+        is_replaced = replacements >= 0
+        free_pos = self.params_index.get_indexer(free.index)
+        base = full["value"].to_numpy().copy()
+
+        def to_full(free_values):
+            values = base.copy()
+            values[free_pos] = free_values
+            values[is_replaced] = values[replacements[is_replaced]]
+            return pd.Series(values, index=self.params_index)
+
+        free_values = full.loc[free.index, "value"].to_numpy()
+        return free.index, free_values, to_full
+
+    def standard_errors(
+        self,
+        params,
+        method="hessian",
+        rel_step=None,
+        n_workers=None,
+        memory_budget=None,
+        tile_size=None,
+        layout="aos",
+    ):
+        """Covariance matrix of the free parameters at the estimates.
+
+        The derivatives are calculated with finite differences with respect to the
+        free parameters. All evaluation points of a derivative are evaluated in
+        parallel threads that share one :class:`LikelihoodEvaluator`.
+        Parameters that are equal to other parameters move together with them.
+        Probability and covariance constraints are not taken into account.
+
+        Args:
+            params (pd.DataFrame): the estimated parameters.
+            method (str): "hessian" uses the inverse of the negative hessian of the
+                log likelihood, which needs O(nfree ** 2) evaluations. "opg" uses
+                the outer product of the gradients of the log likelihood of each
+                individual, which needs O(nfree) evaluations. "sandwich" combines
+                both.
+            rel_step (float): relative step size of the finite differences. See
+                :func:`jacobian` and :func:`hessian`.
+            n_workers (int): number of evaluations that run at the same time.
+            memory_budget (int): see :meth:`fit`.
+            tile_size (int or str): see :meth:`fit`.
+            layout (str): see :meth:`fit`.
+
+        Returns:
+            cov (pd.DataFrame): covariance matrix with the index of the free
+                parameters as index and columns.
+
+        """
+        evaluator = LikelihoodEvaluator(
+            self, memory_budget=memory_budget, tile_size=tile_size, layout=layout
+        )
+        return self._covariance(evaluator, params, method, rel_step, n_workers)
+
+    def _covariance(self, evaluator, params, method, rel_step=None, n_workers=None):
+        """Covariance matrix of the free parameters for the data of evaluator."""
+        if method not in ["hessian", "opg", "sandwich"]:
+            raise ValueError("method must be 'hessian', 'opg' or 'sandwich'.")
+
+        free_index, x, to_full = self._free_params_func(params)
+        weights = np.ones(evaluator.y_data.shape[1])
+        if evaluator.weights is not None:
+            weights = evaluator.weights
+
+        def per_individual(free_values):
+            return evaluator.log_likelihood_per_individual(to_full(free_values))
+
+        def total(free_values):
+            return np.dot(per_individual(free_values), weights)
+
+        if method in ["opg", "sandwich"]:
+            jac = jacobian(per_individual, x, rel_step, n_workers)
+            opg = np.dot(jac.T * weights, jac)
+        if method in ["hessian", "sandwich"]:
+            hess_inv = np.linalg.inv(-hessian(total, x, rel_step, n_workers))
+
+        if method == "hessian":
+            cov = hess_inv
+        elif method == "opg":
+            cov = np.linalg.inv(opg)
+        else:
+            cov = hess_inv.dot(opg).dot(hess_inv)
+
+        return pd.DataFrame(cov, index=free_index, columns=free_index)
+
     def _basic_heatmap_args(self):
         args = {
             "cmap": "coolwarm",
@@ -638,13 +1523,14 @@ class SkillModel:
             fig, ax
 
          """
+        plt, sns = _plotting_modules()
+
         heatmap_kws = {} if heatmap_kws is None else heatmap_kws
         if write_tex is True:
             assert (
                 save_path is not None
             ), "To write a tex file, please provide a save_path"
-        df = self.data_proc.measurements_df(periods=periods, factors=factors)
-        corr = df.corr()
+        corr = self.data_proc.measurements_corr(periods=periods, factors=factors)
 
         if figsize is None:
             figsize = (len(corr), 0.8 * len(corr))
@@ -685,16 +1571,17 @@ class SkillModel:
         width=None,
         height=None,
     ):
+        plt, sns = _plotting_modules()
+
         heatmap_kws = {} if heatmap_kws is None else heatmap_kws
         if write_tex is True:
             assert (
                 save_path is not None
             ), "To write a tex file, please provide a save_path"
 
-        df = self.data_proc.score_df(
-            periods=periods, factors=factors, order="by_factor", agg_method=agg_method
+        corr = self.data_proc.score_corr(
+            periods=periods, factors=factors, agg_method=agg_method
         )
-        corr = df.corr()
 
         if width is None and height is None:
             if len(corr) <= 5:
@@ -734,6 +1621,8 @@ class SkillModel:
         width=None,
         height=None,
     ):
+        plt, sns = _plotting_modules()
+
         pair_kws = {} if pair_kws is None else pair_kws
         if write_tex is True:
             assert (
@@ -789,6 +1678,8 @@ class SkillModel:
         width=None,
         height=None,
     ):
+        plt, sns = _plotting_modules()
+
         pair_kws = {} if pair_kws is None else pair_kws
         if write_tex is True:
             assert (
@@ -846,6 +1737,8 @@ class SkillModel:
         width=None,
         height=None,
     ):
+        plt, sns = _plotting_modules()
+
         reg_kws = {} if reg_kws is None else reg_kws
         if write_tex is True:
             assert (
@@ -894,6 +1787,8 @@ class SkillModel:
         height=None,
         dpi=200,
     ):
+        plt, sns = _plotting_modules()
+
         controls = [] if controls is None else controls
         other_vars = [] if other_vars is None else other_vars
         reg_kws = {} if reg_kws is None else reg_kws
@@ -904,15 +1799,11 @@ class SkillModel:
         if width is None and height is None:
             height = 0.9
 
-        mod = self._score_regression_model(
-            period=period,
-            stage=stage,
-            factor=factor,
+        res = self._score_regressions(
+            [{"factor": factor, "period": period, "stage": stage}],
             controls=controls,
             agg_method=agg_method,
-        )
-
-        res = mod.fit()
+        )[0]
 
         data = self.data_proc.reg_df(
             factor=factor,
@@ -958,6 +1849,7 @@ class SkillModel:
         width=None,
         height=None,
     ):
+        plt, sns = _plotting_modules()
 
         if figsize is None:
             figsize = (12, 8)
@@ -1011,6 +1903,8 @@ class SkillModel:
         width=None,
         height=None,
     ):
+        plt, sns = _plotting_modules()
+
         reg_kws = {} if reg_kws is None else reg_kws
         if figsize is None:
             figsize = (12, 7)
@@ -1065,7 +1959,25 @@ class SkillModel:
         agg_method="mean",
         write_tex=False,
         save_path=None,
+        use_statsmodels=False,
     ):
+        """Table with OLS estimates of the transition equations on factor scores.
+
+        Args:
+            periods: periods of the regressions, "all" or None.
+            stages: stages of the regressions, "all" or None.
+            controls (list): names of control variables.
+            agg_method (str): how measurements are aggregated to scores.
+            write_tex (bool): if True, the table is written to save_path.
+            save_path (str): path of the tex file.
+            use_statsmodels (bool): If False (default), all regressions are fitted
+                at once with :func:`batched_ols`. If True, each regression is
+                fitted with a statsmodels formula, which is slower.
+
+        Returns:
+            df (pd.DataFrame)
+
+        """
         controls = [] if controls is None else controls
         assert (
             periods is None or stages is None
@@ -1100,24 +2012,27 @@ class SkillModel:
             time = stages
             time_name = "stage"
 
-        results = []
+        regressions = []
         for t in time:
             for factor in self.factors:
                 ind = self.factors.index(factor)
                 trans_name = self.transition_names[ind]
                 if trans_name != "constant":
-                    mod_kwargs = {
-                        "factor": factor,
-                        "controls": controls,
-                        "agg_method": agg_method,
-                        time_name: t,
-                    }
-
-                    mod = self._score_regression_model(**mod_kwargs)
-                    res = mod.fit()
-                    res.name = factor
-                    res.period = t
-                    results.append(res)
+                    regressions.append({"factor": factor, time_name: t})
+
+        if use_statsmodels:
+            results = []
+            for reg_kwargs in regressions:
+                mod = self._score_regression_model(
+                    controls=controls, agg_method=agg_method, **reg_kwargs
+                )
+                results.append(mod.fit())
+        else:
+            results = self._score_regressions(regressions, controls, agg_method)
+
+        for res, reg_kwargs in zip(results, regressions):
+            res.name = reg_kwargs["factor"]
+            res.period = reg_kwargs[time_name]
 
         df = statsmodels_results_to_df(
             res_list=results, decimals=2, period_name=time_name.capitalize()
@@ -1135,6 +2050,7 @@ class SkillModel:
     def _score_regression_model(
         self, factor, period=None, stage=None, controls=None, agg_method="mean"
     ):
+        import statsmodels.formula.api as smf
 
         df = self.data_proc.reg_df(
             factor=factor,
@@ -1143,27 +2059,72 @@ class SkillModel:
             controls=controls,
             agg_method=agg_method,
         )
+        y_var, x_vars = self._score_regression_variables(factor, controls)
+
+        formula = y_var + " ~ " + " + ".join(x_vars)
+
+        mod = smf.ols(formula=formula, data=df)
+        return mod
+
+    def _score_regression_variables(self, factor, controls=None):
         controls = [] if controls is None else controls
         ind = self.factors.index(factor)
         included = self.included_factors[ind]
 
         y_var = "{}_{}".format(factor, "t_plusone")
         x_vars = ["{}_{}".format(var, "t") for var in list(included) + list(controls)]
+        return y_var, x_vars
 
-        formula = y_var + " ~ " + " + ".join(x_vars)
+    def _score_regressions(self, regressions, controls=None, agg_method="mean"):
+        """Fit several score regressions at once with :func:`batched_ols`.
 
-        mod = smf.ols(formula=formula, data=df)
-        return mod
+        Args:
+            regressions (list): list of dicts with the keys factor and period or
+                stage.
+            controls (list): names of control variables.
+            agg_method (str): how measurements are aggregated to scores.
 
-    def visualize_model(self, save_path, anchor_var=None):
+        Returns:
+            results (list): list of :class:`OLSResults` whose parameters are named
+                like in the statsmodels formula of :meth:`_score_regression_model`.
+
+        """
+        endog, exog = [], []
+        for reg_kwargs in regressions:
+            df = self.data_proc.reg_df(
+                controls=controls, agg_method=agg_method, **reg_kwargs
+            )
+            y_var, x_vars = self._score_regression_variables(
+                reg_kwargs["factor"], controls
+            )
+            x = df[x_vars].copy()
+            x.insert(0, "Intercept", 1.0)
+            endog.append(df[y_var])
+            exog.append(x)
+        return batched_ols(endog, exog)
+
+    def visualize_model(
+        self, save_path, anchor_var=None, n_workers=None, incremental=True
+    ):
         """Visualize a SkillModel.
         Generate plots and tables that illustrate how well the measurements
         fit together, how stable factors are over time and how strong the
         transition equation deviate from linearity.
+
+        The figures are rendered in parallel processes. Figures whose data, model
+        specification and plot options did not change since the last call with
+        the same save_path are not rendered again.
+
         Args:
             save_path (str): path to a directory in which plots and tex output
             is saved.
+            anchor_var (str): If specified, anchoring plots are added.
+            n_workers (int): number of processes that render figures. Default
+                None, which uses the number of CPUs. With 1, all figures are
+                rendered in the current process.
+            incremental (bool): If False, all figures are rendered again.
         """
+        jobs = []
         tex_lines = []
         tex_input = r"\input{{{}}}"
         cp = "\n" + r"\clearpage" + "\n"
@@ -1177,113 +2138,106 @@ class SkillModel:
             "Visualization of {}".format(self.model_name.replace("_", " "))
         )
 
+        def add_job(method, base_name, extension=".png", **kwargs):
+            kwargs["write_tex"] = True
+            file = base_name + extension
+            jobs.append({"method": method, "file": file, "kwargs": kwargs})
+            tex_lines.append(tex_input.format(base_name + ".tex"))
+
+        nonconstant_factors = [
+            factor
+            for factor, trans_name in zip(self.factors, self.transition_names)
+            if trans_name != "constant"
+        ]
+
         tex_lines.append(section.format("Visualization of the Measurement System"))
         tex_lines.append(subsection.format("Correlations by Period"))
 
         for period in self.periods:
             base_name = f"meas_heat_in_period_{period}"
-            path = join(save_path, f"{base_name}.png")
-            self.measurement_heatmap(periods=period, save_path=path, write_tex=True)
-            plt.close()
-            tex_lines.append(tex_input.format(base_name + ".tex"))
+            add_job("measurement_heatmap", base_name, periods=period)
             for factor in self.factors:
                 if len(self.measurements[factor][period]) >= 2:
                     base_name = "meas_pair_in_period_{}_for_factor_{}".format(
                         period, factor
                     )
-                    path = join(save_path, f"{base_name}.png")
-                    self.measurement_pairplot(
-                        periods=period, factors=factor, save_path=path, write_tex=True
+                    add_job(
+                        "measurement_pairplot",
+                        base_name,
+                        periods=period,
+                        factors=factor,
                     )
-                    plt.close()
-                    tex_lines.append(tex_input.format(base_name + ".tex"))
         tex_lines.append(subsection.format("Correlations by Factor"))
 
         for factor in self.factors:
             base_name = f"meas_heat_for_factor_{factor}"
-            path = join(save_path, f"{base_name}.png")
-            self.measurement_heatmap(factors=factor, save_path=path, write_tex=True)
-            plt.close()
-            tex_lines.append(tex_input.format(base_name + ".tex"))
+            add_job("measurement_heatmap", base_name, factors=factor)
 
         tex_lines.append(section.format("Visualization of Factor Scores"))
 
         tex_lines.append(subsection.format("Correlations by Factor"))
-        for factor in self.factors:
-            ind = self.factors.index(factor)
-            trans_name = self.transition_names[ind]
-            if trans_name != "constant":
-                base_name = f"score_heat_for_factor_{factor}"
-                path = join(save_path, f"{base_name}.png")
-                self.score_heatmap(factors=factor, save_path=path, write_tex=True)
-                plt.close()
-                tex_lines.append(tex_input.format(base_name + ".tex"))
+        for factor in nonconstant_factors:
+            base_name = f"score_heat_for_factor_{factor}"
+            add_job("score_heatmap", base_name, factors=factor, agg_method="means")
 
         tex_lines.append(subsection.format("Joint Distribution by Period"))
         for period in self.periods:
             base_name = f"score_pair_in_period_{period}"
-            path = join(save_path, base_name + ".png")
-            self.score_pairplot(periods=period, save_path=path, write_tex=True)
-            plt.close()
-            tex_lines.append(tex_input.format(base_name + ".tex"))
+            add_job("score_pairplot", base_name, periods=period, agg_method="means")
 
         tex_lines.append(section.format("Persistence of Factor Scores"))
 
-        for factor in self.factors:
-            ind = self.factors.index(factor)
-            trans_name = self.transition_names[ind]
-            if trans_name != "constant":
-                for period in self.periods[:-1]:
-                    base_name = "autoreg_for_factor_{}_in_period_{}".format(
-                        factor, period
-                    )
-                    path = join(save_path, f"{base_name}.png")
-                    self.autoregression_plot(
-                        period=period, factor=factor, save_path=path, write_tex=True
-                    )
-                    plt.close()
-                    tex_lines.append(tex_input.format(base_name + ".tex"))
+        for factor in nonconstant_factors:
+            for period in self.periods[:-1]:
+                base_name = "autoreg_for_factor_{}_in_period_{}".format(factor, period)
+                add_job(
+                    "autoregression_plot",
+                    base_name,
+                    period=period,
+                    factor=factor,
+                    agg_method="mean",
+                )
 
         if anchor_var is not None:
             tex_lines.append(section.format("Anchoring"))
             for period in self.periods:
                 base_name = f"anchorplot_in_period_{period}"
-                path = join(save_path, f"{base_name}.png")
-                self.anchoring_plot(
-                    period=period, anchor_var=anchor_var, write_tex=True, save_path=path
+                add_job(
+                    "anchoring_plot",
+                    base_name,
+                    period=period,
+                    anchor_var=anchor_var,
+                    agg_method="mean",
                 )
 
-                plt.close()
-                tex_lines.append(tex_input.format(base_name + ".tex"))
-
         tex_lines.append(section.format("OLS Estimates of Transition Equations"))
 
         tex_lines.append(subsection.format("Parameter Estimates"))
 
-        base_name = "reg_table_by_{}.tex"
-        path = join(save_path, base_name.format("periods"))
-        self.score_regression_table(periods="all", write_tex=True, save_path=path)
-        tex_lines.append(tex_input.format(base_name.format("periods")))
-
-        path = join(save_path, base_name.format("stages"))
-        self.score_regression_table(stages="all", write_tex=True, save_path=path)
-        tex_lines.append(tex_input.format(base_name.format("stages")))
+        for time_name in ["periods", "stages"]:
+            add_job(
+                "score_regression_table",
+                f"reg_table_by_{time_name}",
+                extension=".tex",
+                agg_method="mean",
+                **{time_name: "all"},
+            )
 
         tex_lines.append(cp + float_barrier)
 
         tex_lines.append(subsection.format("Residual Plots"))
-        for factor in self.factors:
-            ind = self.factors.index(factor)
-            trans_name = self.transition_names[ind]
-            if trans_name != "constant":
-                for stage in self.stages:
-                    base_name = f"resid_for_factor_{factor}_in_stage_{stage}"
-                    path = join(save_path, f"{base_name}.png")
-                    self.score_regression_residual_plot(
-                        factor=factor, stage=stage, save_path=path, write_tex=True
-                    )
-                    plt.close()
-                    tex_lines.append(tex_input.format(base_name + ".tex"))
+        for factor in nonconstant_factors:
+            for stage in self.stages:
+                base_name = f"resid_for_factor_{factor}_in_stage_{stage}"
+                add_job(
+                    "score_regression_residual_plot",
+                    base_name,
+                    factor=factor,
+                    stage=stage,
+                    agg_method="mean",
+                )
+
+        render_jobs(self, jobs, save_path, n_workers=n_workers, incremental=incremental)
 
         preamble = get_preamble()
 
@@ -1298,3 +2252,16 @@ class SkillModel:
                 t.write(line + "\n")
 
             t.write("\n\n\n\\end{document}\n")
+
+
+def _plotting_modules():
+    """Import matplotlib.pyplot and seaborn when the first plot is made.
+
+    Returns:
+        plt, sns
+
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    return plt, sns
@@ -0,0 +1,112 @@
+"""Stream performance information about the evaluations of a criterion function."""
+import json
+import sys
+import threading
+import time
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+def max_rss():
+    """Peak resident memory of the process in bytes or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, linux kilobytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class JsonlWriter:
+    """Append events as one json object per line to a file.
+
+    Args:
+        path (str or pathlib.Path): path of the .jsonl file.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event)
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+class TelemetryCriterion:
+    """Wrap a criterion function and emit one event per evaluation.
+
+    Each event is a dict with the entries:
+
+        * event: "evaluation"
+        * evaluation: number of the evaluation, starting at 1
+        * timestamp: time when the evaluation finished, in seconds since the epoch
+        * latency: wall time of the evaluation in seconds
+        * evals_per_second: finished evaluations per second of wall time since
+          the first evaluation started
+        * active_evaluations: number of evaluations that ran concurrently,
+          including this one
+        * utilization: time spent in evaluations divided by the wall time since
+          the first evaluation started. Values above 1 mean that evaluations ran
+          in parallel threads.
+        * max_rss: peak resident memory of the process in bytes
+        * criterion: value of the criterion function
+        * finite: whether the criterion value is finite
+
+    Args:
+        criterion (callable): the criterion function.
+        telemetry (callable, str or pathlib.Path): function that is called with
+            each event or path of a .jsonl file to which the events are appended.
+
+    """
+
+    def __init__(self, criterion, telemetry):
+        self.criterion = criterion
+        self.emit = telemetry if callable(telemetry) else JsonlWriter(telemetry)
+        self._lock = threading.Lock()
+        self._start = None
+        self._n_evaluations = 0
+        self._n_active = 0
+        self._busy_time = 0.0
+
+    def __call__(self, params):
+        with self._lock:
+            start = time.perf_counter()
+            if self._start is None:
+                self._start = start
+            self._n_active += 1
+            active = self._n_active
+
+        try:
+            value = self.criterion(params)
+        finally:
+            with self._lock:
+                self._n_active -= 1
+
+        with self._lock:
+            end = time.perf_counter()
+            latency = end - start
+            self._n_evaluations += 1
+            self._busy_time += latency
+            elapsed = end - self._start
+            event = {
+                "event": "evaluation",
+                "evaluation": self._n_evaluations,
+                "timestamp": time.time(),
+                "latency": latency,
+                "evals_per_second": self._n_evaluations / elapsed,
+                "active_evaluations": active,
+                "utilization": self._busy_time / elapsed,
+                "max_rss": max_rss(),
+                "criterion": float(value),
+                "finite": bool(np.isfinite(value)),
+            }
+        self.emit(event)
+        return value
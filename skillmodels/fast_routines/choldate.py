@@ -2,7 +2,7 @@ import numpy as np
 from numba import jit
 
 
-@jit
+@jit(nopython=True, nogil=True)
 def array_choldate(to_update, update_with, weight):
     """Make a cholesky up- or downdate on all matrices in a numpy array.
 
@@ -1,11 +1,18 @@
 """Contains Kalman Update and Predict functions in several flavors."""
 import numpy as np
 from numba import guvectorize
+from numba import jit
 
+from skillmodels.fast_routines.qr_decomposition import _soa_triangularize
 from skillmodels.fast_routines.qr_decomposition import array_qr
+from skillmodels.fast_routines.qr_decomposition import soa_array_qr
+from skillmodels.fast_routines.timers import null_timer
+from skillmodels.fast_routines.transform_sigma_points import soa_transform_sigma_points
 from skillmodels.fast_routines.transform_sigma_points import transform_sigma_points
 
 
+# numpy releases the GIL while it runs the inner loop of a gufunc, so this
+# kernel can run in parallel threads like the ones compiled with nogil=True.
 @guvectorize(
     [("f8[:, :], f8[:, :, :], f8[:], f8[:], f8[:], f8[:], f8[:], f8[:], i8[:], f8[:]")],
     (
@@ -180,6 +187,7 @@ def sqrt_unscented_predict(
     transform_sigma_points_args,
     out_flat_states,
     out_flat_covs,
+    timer=null_timer,
 ):
     """Make a unscented Kalman filter predict step in square-root form.
 
@@ -200,6 +208,8 @@ def sqrt_unscented_predict(
         transform_sigma_points_args (dict): (see transform_sigma_points).
         out_flat_states (np.ndarray): output array of (nind * nmixtures, nfac).
         out_flat_covs (np.ndarray): output array of (nind * nmixtures, nfac, nfac).
+        timer (callable): returns a context manager that times a stage of a period.
+            See :class:`LikelihoodProfiler`.
 
     References:
         Van Der Merwe, R. and Wan, E.A. The Square-Root Unscented
@@ -208,14 +218,165 @@ def sqrt_unscented_predict(
     """
     nmixtures_times_nind, nsigma, nfac = sigma_points.shape
     shock_sd = shock_sd[period]
-    transform_sigma_points(period, flat_sigma_points, **transform_sigma_points_args)
+    with timer("transition", period):
+        transform_sigma_points(period, flat_sigma_points, **transform_sigma_points_args)
 
-    # get them back into states
-    predicted_states = np.dot(s_weights_m, sigma_points, out=out_flat_states)
-    devs = sigma_points - predicted_states.reshape(nmixtures_times_nind, 1, nfac)
+    with timer("qr", period):
+        # get them back into states
+        predicted_states = np.dot(s_weights_m, sigma_points, out=out_flat_states)
+        devs = sigma_points - predicted_states.reshape(nmixtures_times_nind, 1, nfac)
 
-    qr_weights = np.sqrt(s_weights_c).reshape(nsigma, 1)
-    qr_points = np.zeros((nmixtures_times_nind, 3 * nfac + 1, nfac))
-    qr_points[:, 0:nsigma, :] = devs * qr_weights
-    qr_points[:, nsigma:, :] = shock_sd
-    out_flat_covs[:, 1:, 1:] = array_qr(qr_points)[:, :nfac, :]
+        qr_weights = np.sqrt(s_weights_c).reshape(nsigma, 1)
+        qr_points = np.zeros((nmixtures_times_nind, 3 * nfac + 1, nfac))
+        qr_points[:, 0:nsigma, :] = devs * qr_weights
+        qr_points[:, nsigma:, :] = shock_sd
+        out_flat_covs[:, 1:, 1:] = array_qr(qr_points)[:, :nfac, :]
+
+
+@jit(nopython=True, nogil=True)
+def soa_sqrt_linear_update(
+    state, cov, like_vec, y, c, control_coeffs, loading, meas_sd, positions, weights
+):
+    """Make a linear Kalman update in square root form for the SoA layout.
+
+    This does the same as sqrt_linear_update, but all arrays have the individuals
+    as innermost dimension. All loops over individuals are innermost loops, so the
+    same operation (e.g. the same Givens rotation) is applied to a vector of
+    individuals.
+
+    Args:
+        state (np.ndarray): numpy array of (nmixtures, nfac, nind).
+        cov (np.ndarray): numpy array of (nmixtures, nfac + 1, nfac + 1, nind).
+            cov[:, 1:, 1:] contains the transpose of the cholesky factor of the
+            state covariance matrix.
+        like_vec (np.ndarray): numpy array of length nind.
+        y (np.ndarray): numpy array of length nind with measurements.
+        c (np.ndarray): numpy array of (ncontrols, nind) with control variables.
+        control_coeffs (np.ndarray): estimated parameters of the control variables.
+        loading (np.ndarray): numpy array of length nfac with factor loadings.
+        meas_sd (np.ndarray): a scalar in form of a length one numpy array.
+        positions (np.ndarray): the positions of the factors measured by y.
+        weights (np.ndarray): numpy array of (nmixtures, nind).
+
+    """
+    nmixtures, nfac, nind = state.shape
+    m = nfac + 1
+    ncontrol = control_coeffs.shape[0]
+    invariant = np.log(1 / (2 * np.pi) ** 0.5)
+
+    active = np.isfinite(y)
+    invar_diff = np.empty(nind)
+    for u in range(nind):
+        invar_diff[u] = y[u] if active[u] else 0.0
+    for cont in range(ncontrol):
+        for u in range(nind):
+            invar_diff[u] -= c[cont, u] * control_coeffs[cont]
+
+    diff = np.empty(nind)
+    log_prob = np.empty((nmixtures, nind))
+    for emf in range(nmixtures):
+        for u in range(nind):
+            diff[u] = invar_diff[u]
+        for pos in positions:
+            for u in range(nind):
+                diff[u] -= state[emf, pos, u] * loading[pos]
+
+        for u in range(nind):
+            cov[emf, 0, 0, u] = meas_sd[0]
+        for f in range(1, m):
+            for u in range(nind):
+                cov[emf, 0, f, u] = 0.0
+                cov[emf, f, 0, u] = 0.0
+            for pos in positions:
+                for u in range(nind):
+                    cov[emf, f, 0, u] += cov[emf, f, pos + 1, u] * loading[pos]
+
+        _soa_triangularize(cov[emf], active)
+
+        for u in range(nind):
+            sigma = cov[emf, 0, 0, u]
+            log_prob[emf, u] = (
+                invariant - np.log(np.abs(sigma)) - diff[u] ** 2 / (2 * sigma ** 2)
+            )
+            diff[u] /= sigma
+
+        # the first row of cov is zero for individuals with missing measurements
+        for f in range(nfac):
+            for u in range(nind):
+                state[emf, f, u] += cov[emf, 0, f + 1, u] * diff[u]
+
+    if nmixtures == 1:
+        for u in range(nind):
+            if active[u]:
+                like_vec[u] = log_prob[0, u]
+    else:
+        for u in range(nind):
+            if active[u]:
+                sum_wprob = 0.0
+                for emf in range(nmixtures):
+                    weights[emf, u] *= max(np.exp(log_prob[emf, u]), 1e-250)
+                    sum_wprob += weights[emf, u]
+                like_vec[u] += np.log(sum_wprob)
+                for emf in range(nmixtures):
+                    weights[emf, u] /= sum_wprob
+
+
+def soa_sqrt_linear_anchoring_update(
+    state, cov, like_vec, y, c, control_coeffs, loading, meas_sd, positions, weights
+):
+    """Make a linear Kalman update in square root form for the SoA layout.
+
+    Everything is as in soa_sqrt_linear_update, but only the like_vec is modified.
+
+    """
+    state = state.copy()
+    cov = cov.copy()
+    soa_sqrt_linear_update(
+        state, cov, like_vec, y, c, control_coeffs, loading, meas_sd, positions, weights
+    )
+
+
+def soa_sqrt_unscented_predict(
+    period,
+    sigma_points,
+    s_weights_m,
+    s_weights_c,
+    shock_sd,
+    transform_sigma_points_args,
+    out_states,
+    out_covs,
+    timer=null_timer,
+):
+    """Make a unscented Kalman filter predict step in square-root form for SoA.
+
+    Args:
+        period (int): the development period in which the predict step is done.
+        sigma_points (np.ndarray): numpy array of (nfac, nmixtures, nsigma, nind).
+        s_weights_m (np.ndarray): numpy array of length nsigma with sigma
+            weights for the means.
+        s_weights_c (np.ndarray): numpy array of length nsigma with sigma
+            weights for the covariances.
+        shock_sd (np.ndarray): numpy array of (nperiods - 1, nfac, nfac) with
+            standard deviation of the transition equation shocks.
+        transform_sigma_points_args (dict): (see soa_transform_sigma_points).
+        out_states (np.ndarray): output array of (nmixtures, nfac, nind).
+        out_covs (np.ndarray): output array of (nmixtures, nfac + 1, nfac + 1, nind).
+        timer (callable): see sqrt_unscented_predict.
+
+    """
+    nfac, nmixtures, nsigma, nind = sigma_points.shape
+    shock_sd = shock_sd[period]
+    with timer("transition", period):
+        soa_transform_sigma_points(period, sigma_points, **transform_sigma_points_args)
+
+    with timer("qr", period):
+        predicted_states = np.tensordot(s_weights_m, sigma_points, axes=(0, 2))
+        out_states[:] = np.transpose(predicted_states, axes=(1, 0, 2))
+        devs = sigma_points - predicted_states.reshape(nfac, nmixtures, 1, nind)
+
+        qr_weights = np.sqrt(s_weights_c).reshape(nsigma, 1, 1)
+        qr_points = np.zeros((nmixtures, 3 * nfac + 1, nfac, nind))
+        qr_points[:, 0:nsigma] = np.transpose(devs, axes=(1, 2, 0, 3)) * qr_weights
+        qr_points[:, nsigma:] = shock_sd.reshape(nfac, nfac, 1)
+        for emf in range(nmixtures):
+            out_covs[emf, 1:, 1:] = soa_array_qr(qr_points[emf])[:nfac]
@@ -1,7 +1,8 @@
+import numpy as np
 from numba import jit
 
 
-@jit
+@jit(nopython=True, nogil=True)
 def array_qr(arr):
     """Calculate R of a QR decomposition for matrices in an array.
 
@@ -85,3 +86,59 @@ def array_qr(arr):
                         arr[u, i, k] = -s * helper1 + c * helper2
 
     return arr
+
+
+@jit(nopython=True, nogil=True)
+def soa_array_qr(arr):
+    """Calculate R of a QR decomposition for matrices in structure-of-arrays layout.
+
+    args:
+        arr (np.ndarray): 3d array of [m, n, nmixtures * nind], where m >= n. The
+            individuals are the innermost dimension. It is overwritten with the R
+            of the QR decomposition.
+
+    The Givens rotations are the same as in array_qr, but each rotation is applied
+    to the same two rows of all matrices in one loop over individuals. This loop
+    has unit stride and no dependencies between iterations, so it can be
+    vectorized by the compiler.
+
+    """
+    nind = arr.shape[2]
+    active = np.ones(nind, dtype=np.bool_)
+    _soa_triangularize(arr, active)
+    return arr
+
+
+@jit(nopython=True, nogil=True)
+def _soa_triangularize(arr, active):
+    """Triangularize the matrices in arr of [m, n, nind] with Givens rotations.
+
+    The matrices of individuals where active is False are not changed.
+
+    """
+    m, n, nind = arr.shape
+    c = np.empty(nind)
+    s = np.empty(nind)
+    for j in range(n):
+        for i in range(m - 1, j, -1):
+            for u in range(nind):
+                b = arr[i, j, u]
+                a = arr[i - 1, j, u]
+                if b == 0.0 or not active[u]:
+                    c[u] = 1.0
+                    s[u] = 0.0
+                elif abs(b) > abs(a):
+                    r = a / b
+                    s[u] = 1 / (1 + r ** 2) ** 0.5
+                    c[u] = s[u] * r
+                else:
+                    r = b / a
+                    c[u] = 1 / (1 + r ** 2) ** 0.5
+                    s[u] = c[u] * r
+            # the columns left of j are zero in both rows
+            for k in range(j, n):
+                for u in range(nind):
+                    helper1 = arr[i - 1, k, u]
+                    helper2 = arr[i, k, u]
+                    arr[i - 1, k, u] = c[u] * helper1 + s[u] * helper2
+                    arr[i, k, u] = -s[u] * helper1 + c[u] * helper2
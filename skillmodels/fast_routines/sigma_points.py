@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def calculate_sigma_points(states, flat_covs, scaling_factor, out):
     """Calculate the array of sigma_points for the unscented transform.
 
@@ -17,3 +20,24 @@ def calculate_sigma_points(states, flat_covs, scaling_factor, out):
     cholcovs_t *= scaling_factor
     out[:, 1 : nfac + 1, :] += cholcovs_t
     out[:, nfac + 1 :, :] -= cholcovs_t
+
+
+def soa_calculate_sigma_points(states, covs, scaling_factor, out):
+    """Calculate the array of sigma_points in structure-of-arrays layout.
+
+    Args:
+        states (np.ndarray): numpy array of (nmixtures, nfac, nind)
+        covs (np.ndarray): numpy array of (nmixtures, nfac + 1, nfac + 1, nind)
+        scaling_factor (float): see calculate_sigma_points.
+        out (np.ndarray): numpy array of (nfac, nmixtures, nsigma, nind) with
+            sigma_points.
+
+    """
+    nfac, nmixtures, nsigma, nind = out.shape
+    cholcovs_t = covs[:, 1:, 1:]
+    cholcovs_t *= scaling_factor
+    scaled = np.transpose(cholcovs_t, axes=(2, 0, 1, 3))
+
+    out[:] = np.transpose(states, axes=(1, 0, 2)).reshape(nfac, nmixtures, 1, nind)
+    out[:, :, 1 : nfac + 1] += scaled
+    out[:, :, nfac + 1 :] -= scaled
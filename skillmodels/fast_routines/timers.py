@@ -0,0 +1,22 @@
+"""Timer that is used by the fast routines if no profiler is passed.
+
+See :class:`skillmodels.estimation.profiling.LikelihoodProfiler` for a timer that
+records the time spent in each stage.
+
+"""
+
+
+class _NullContext:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_CONTEXT = _NullContext()
+
+
+def null_timer(stage, period=None):
+    """Timer that does nothing. Used if no profiler is passed."""
+    return _NULL_CONTEXT
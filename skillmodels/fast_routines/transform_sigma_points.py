@@ -62,3 +62,61 @@ def unanchor_sigma_points(sigma_points, loadings, positions, variables):
         sigma_points[:, :, pos] /= loadings[p, pos]
         if variables is not None:
             sigma_points[:, :, pos] += variables[p]
+
+
+def soa_transform_sigma_points(
+    period,
+    sigma_points,
+    transition_argument_dicts,
+    transition_function_names,
+    anchoring_loadings=None,
+    anchoring_positions=None,
+    anchoring_variables=None,
+):
+    """Transform an array of sigma_points in structure-of-arrays layout.
+
+    Does the same as transform_sigma_points for sigma_points of
+    (nfac, nmixtures, nsigma, nind). The transition functions receive a transposed
+    view on the sigma points, i.e. the usual 2d array with one row per sigma point.
+
+    """
+    nfac = sigma_points.shape[0]
+    flat_sigma_points = sigma_points.reshape(nfac, -1)
+    intermediate_array = np.empty_like(flat_sigma_points)
+
+    if anchoring_loadings is not None:
+        soa_anchor_sigma_points(
+            sigma_points,
+            anchoring_loadings[period],
+            anchoring_positions,
+            anchoring_variables[period],
+        )
+
+    for f in range(nfac):
+        intermediate_array[f] = getattr(trans, transition_function_names[f])(
+            flat_sigma_points.T, **transition_argument_dicts[period][f]
+        )
+
+    flat_sigma_points[:] = intermediate_array
+
+    if anchoring_loadings is not None:
+        soa_unanchor_sigma_points(
+            sigma_points,
+            anchoring_loadings[period + 1],
+            anchoring_positions,
+            anchoring_variables[period + 1],
+        )
+
+
+def soa_anchor_sigma_points(sigma_points, loadings, positions, variables):
+    for p, pos in enumerate(positions):
+        sigma_points[pos] *= loadings[p, pos]
+        if variables is not None:
+            sigma_points[pos] -= variables[p]
+
+
+def soa_unanchor_sigma_points(sigma_points, loadings, positions, variables):
+    for p, pos in enumerate(positions):
+        sigma_points[pos] /= loadings[p, pos]
+        if variables is not None:
+            sigma_points[pos] += variables[p]
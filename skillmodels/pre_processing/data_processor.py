@@ -6,7 +6,9 @@ import pandas as pd
 
 def prepend_index_level(df, to_prepend):
     df = df.copy()
-    df.index = pd.MultiIndex.from_tuples([(to_prepend, x) for x in df.index])
+    df.index = pd.MultiIndex.from_arrays(
+        [np.full(len(df), to_prepend), df.index], names=[None, None]
+    )
     return df
 
 
@@ -83,12 +85,71 @@ def pre_process_data(df):
     return balanced
 
 
+def collapse_identical_individuals(y_data, c_data):
+    """Keep one copy of individuals with identical measurements and controls.
+
+    Args:
+        y_data (np.ndarray): array of [nupdates, nobs] with measurements.
+        c_data (list): list of arrays of [nobs, ncontrols_t] with control variables.
+
+    Returns:
+        unique_y_data (np.ndarray): array of [nupdates, nunique].
+        unique_c_data (list): list of arrays of [nunique, ncontrols_t].
+        weights (np.ndarray): array of length nunique with the number of
+            individuals that have the same measurements and controls.
+
+    """
+    features = np.column_stack([y_data.T] + list(c_data))
+    # all missing values need the same bit pattern to be recognized as equal.
+    features[np.isnan(features)] = np.nan
+    features = np.ascontiguousarray(features)
+    row_type = np.dtype((np.void, features.dtype.itemsize * features.shape[1]))
+    rows = features.view(row_type).ravel()
+    _, first, weights = np.unique(rows, return_index=True, return_counts=True)
+    order = np.argsort(first)
+    first, weights = first[order], weights[order]
+
+    unique_y_data = y_data[:, first]
+    unique_c_data = [c[first] for c in c_data]
+    return unique_y_data, unique_c_data, weights
+
+
+def pairwise_corr(arr):
+    """Correlation matrix of the columns of arr with pairwise complete observations.
+
+    This is the same as DataFrame.corr() but all sums are calculated with a few
+    matrix products.
+
+    Args:
+        arr (np.ndarray): array of [nobs, nvariables] that can contain np.nan.
+
+    Returns:
+        corr (np.ndarray): array of [nvariables, nvariables].
+
+    """
+    observed = (~np.isnan(arr)).astype(float)
+    filled = np.where(observed == 1, arr, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        n = observed.T @ observed
+        sums = filled.T @ observed
+        squares = (filled ** 2).T @ observed
+        cross = filled.T @ filled
+        cov = cross - sums * sums.T / n
+        var = squares - sums ** 2 / n
+        corr = cov / np.sqrt(var * var.T)
+    corr[n < 2] = np.nan
+    return np.clip(corr, -1, 1)
+
+
 class DataProcessor:
     """Transform a pandas DataFrame in long format into numpy arrays."""
 
     def __init__(self, specs_processor_attribute_dict):
         self.__dict__.update(specs_processor_attribute_dict)
         self._check_observable_data()
+        self._score_cache = {}
+        self._cube = None
+        self._corr = None
 
     def c_data(self):
         """A List of 2d arrays with control variables for each period.
@@ -139,6 +200,125 @@ class DataProcessor:
             counter += len(measurements)
         return y_data
 
+    def deduplicated_data(self):
+        """y_data and c_data without repeated individuals and frequency weights.
+
+        Individuals with exactly the same measurements and control variables in
+        all periods have the same likelihood. They are collapsed into one
+        individual whose weight is the number of such individuals.
+
+        Returns:
+            y_data (np.ndarray): array of [nupdates, nunique].
+            c_data (list): list of arrays of [nunique, ncontrols_t].
+            weights (np.ndarray): array of length nunique.
+
+        """
+        return collapse_identical_individuals(self.y_data(), self.c_data())
+
+    def measurement_cube(self):
+        """Array with all measurements of all individuals and periods.
+
+        The cube is created at the first call and cached together with the mean
+        and standard deviation of each measurement in each period.
+
+        The first dimension of the cube is indexed by the __period__ labels and
+        the second by the sorted __id__ labels. The data does not have to be
+        sorted or balanced. Entries of individuals that are not observed in a
+        period are np.nan.
+
+        Returns:
+            cube (np.ndarray): array of [nperiods, nobs, nmeasurements]. Entries of
+                measurements that are not used in a period are np.nan.
+            positions (dict): maps measurement names to their position in the
+                last dimension of the cube.
+
+        """
+        if self._cube is None:
+            variables = []
+            for factor in self.factors:
+                for meas_list in self.measurements[factor]:
+                    for meas in meas_list:
+                        if meas not in variables:
+                            variables.append(meas)
+            positions = {var: pos for pos, var in enumerate(variables)}
+
+            periods = self.data["__period__"].to_numpy()
+            if not np.isin(periods, self.periods).all():
+                raise ValueError(
+                    f"The __period__ values of the data have to be in {self.periods}."
+                )
+            periods = periods.astype(int)
+            ids, id_positions = np.unique(
+                self.data["__id__"].to_numpy(), return_inverse=True
+            )
+            keys = id_positions * self.nperiods + periods
+            if len(np.unique(keys)) < len(keys):
+                raise ValueError("The data has several rows per __id__ and __period__.")
+
+            cube = np.full((self.nperiods, len(ids), len(variables)), np.nan)
+            cube[periods, id_positions] = self.data[variables].to_numpy(dtype=float)
+            for t in self.periods:
+                used = [positions[var] for var in self._period_measurements(t)]
+                unused = np.setdiff1d(np.arange(len(variables)), used)
+                cube[t][:, unused] = np.nan
+            self._ids = pd.Index(ids, name="__id__")
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                self._cube_means = np.nanmean(cube, axis=1)
+                self._cube_sds = np.nanstd(cube, axis=1, ddof=1)
+            self._cube = (cube, positions)
+        return self._cube
+
+    def _period_measurements(self, period, factors=None):
+        factors = self.factors if factors is None else factors
+        measurements = []
+        for factor in factors:
+            for meas in self.measurements[factor][period]:
+                if meas not in measurements:
+                    measurements.append(meas)
+        return measurements
+
+    def measurements_corr(self, periods="all", factors="all"):
+        """Correlation matrix of the measurements in measurements_df.
+
+        The correlations are sliced from a cached correlation matrix of all
+        measurements in all periods.
+
+        Returns:
+            corr (pd.DataFrame): the same as
+                measurements_df(periods, factors).corr().
+
+        """
+        periods, factors = self._periods_and_factors(periods, factors)
+        cube, positions = self.measurement_cube()
+        nper, nobs, nvars = cube.shape
+        if self._corr is None:
+            self._corr = pairwise_corr(cube.transpose(1, 0, 2).reshape(nobs, -1))
+
+        # the suffixes are positions in periods, as in measurements_df
+        columns, locations = [], []
+        for i, period in enumerate(periods):
+            for meas in self._period_measurements(period, factors):
+                columns.append(meas if len(periods) == 1 else f"{meas}_{i}")
+                locations.append(period * nvars + positions[meas])
+        corr = self._corr[np.ix_(locations, locations)]
+        return pd.DataFrame(corr, index=columns, columns=columns)
+
+    def _periods_and_factors(self, periods, factors):
+        if periods == "all":
+            periods = self.periods
+
+        if factors == "all":
+            factors = list(self.factors)
+
+        if isinstance(periods, (int, float)):
+            periods = [periods]
+
+        if isinstance(factors, str):
+            factors = [factors]
+
+        return list(periods), list(factors)
+
     def measurements_df(self, periods="all", factors="all", other_vars=None):
         other_vars = [] if other_vars is None else other_vars
         if periods == "all":
@@ -166,16 +346,19 @@ class DataProcessor:
         for i, period in enumerate(periods):
             other_vars_dict[period] = other_vars[i]
 
+        cube, positions = self.measurement_cube()
         period_dfs = []
         for period in periods:
-            relevant_variables = ["__id__"]
-            for factor in factors:
-                for meas in self.measurements[factor][period]:
-                    if meas not in relevant_variables:
-                        relevant_variables.append(meas)
-            relevant_variables += other_vars_dict[period]
-            df = self.data[self.data["__period__"] == period]
-            df = df[relevant_variables].set_index("__id__")
+            relevant_variables = self._period_measurements(period, factors)
+            locations = [positions[meas] for meas in relevant_variables]
+            df = pd.DataFrame(
+                cube[period][:, locations], index=self._ids, columns=relevant_variables
+            )
+            if len(other_vars_dict[period]) > 0:
+                in_period = self.data["__period__"].to_numpy() == period
+                other = self.data.loc[in_period, other_vars_dict[period]]
+                other.index = self.data.loc[in_period, "__id__"].to_numpy()
+                df = pd.concat([df, other.reindex(self._ids)], axis=1)
             period_dfs.append(df)
 
         if len(period_dfs) == 1:
@@ -237,19 +420,9 @@ class DataProcessor:
             to_concat = []
             for factor in factors:
 
-                if trans_name_dict[factor] == "constant":
-                    meas_df = self.measurements_df(factors=factor)
-                else:
-                    meas_df = self.measurements_df(periods=period, factors=factor)
-                if agg_method == "mean":
-                    score_sr = meas_df.mean(axis=1)
-                else:
-                    scaled = (meas_df - meas_df.mean()) / meas_df.std()
-                    score_sr = scaled.mean(axis=1)
-                    if agg_method == "norm_scaled":
-                        raise NotImplementedError
-
-                score_sr.name = factor
+                score_sr = self._factor_score(
+                    factor, period, agg_method, trans_name_dict[factor] == "constant"
+                )
                 to_concat.append(score_sr)
             to_concat.append(
                 self.measurements_df(periods=period, factors=[], other_vars=other_vars)
@@ -281,6 +454,76 @@ class DataProcessor:
 
         return score_df
 
+    def score_corr(self, periods="all", factors="all", agg_method="mean"):
+        """Correlation matrix of the factor scores in score_df.
+
+        The scores are taken from the cached scores that are calculated from the
+        measurement cube and correlated with :func:`pairwise_corr`.
+
+        Returns:
+            corr (pd.DataFrame): the same as score_df(periods, factors,
+                agg_method=agg_method, order="by_factor").corr().
+
+        """
+        periods, factors = self._periods_and_factors(periods, factors)
+        relevant_uinfo = self.update_info.loc[periods, factors]
+        assert (
+            relevant_uinfo.sum(axis=1) <= 1
+        ).all(), "score_corr only works with dedicated measurement systems."
+
+        columns, scores = [], []
+        for factor in factors:
+            constant = self.transition_names[self.factors.index(factor)] == "constant"
+            for period in periods:
+                columns.append(factor if len(periods) == 1 else f"{factor}_{period}")
+                score = self._factor_score(factor, period, agg_method, constant)
+                scores.append(score.to_numpy())
+        corr = pairwise_corr(np.column_stack(scores))
+        return pd.DataFrame(corr, index=columns, columns=columns)
+
+    def _factor_score(self, factor, period, agg_method, constant=False):
+        """Score of one factor in one period as pd.Series with the __id__ index.
+
+        Scores are calculated from the measurement cube and cached because the
+        same score enters many score DataFrames. The score of a constant factor is
+        calculated from its measurements in all periods.
+
+        """
+        if agg_method == "norm_scaled":
+            raise NotImplementedError
+        key = (factor, None if constant else period, agg_method)
+        if key not in self._score_cache:
+            cube, positions = self.measurement_cube()
+            score_periods = self.periods if constant else [period]
+            blocks = []
+            for t in score_periods:
+                locations = [positions[m] for m in self.measurements[factor][t]]
+                block = cube[t][:, locations]
+                if agg_method != "mean":
+                    means = self._cube_means[t, locations]
+                    sds = self._cube_sds[t, locations]
+                    block = (block - means) / sds
+                blocks.append(block)
+            block = np.hstack(blocks)
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                score = np.nanmean(block, axis=1)
+            self._score_cache[key] = pd.Series(score, index=self._ids, name=factor)
+        return self._score_cache[key]
+
+    def cache_scores(self, agg_methods=("mean",)):
+        """Calculate the scores of all factors and periods for later score_df calls.
+
+        This is useful before the DataProcessor is copied to other processes.
+
+        """
+        for agg_method in agg_methods:
+            for factor, trans_name in zip(self.factors, self.transition_names):
+                for period in self.periods:
+                    self._factor_score(
+                        factor, period, agg_method, trans_name == "constant"
+                    )
+
     def reg_df(self, factor, period=None, stage=None, controls=None, agg_method="mean"):
         controls = [] if controls is None else list(controls)
         assert (
@@ -37,6 +37,7 @@ def process_model(
     model_specs = {}
     model_specs["model_dict"] = model_dict
     model_specs["data"] = pre_process_data(dataset)
+    model_specs["model_name"] = model_name
     model_specs["dataset_name"] = dataset_name
     model_specs["_timeinf"] = model_dict.get("time_specific", {})
     model_specs["_facinf"] = model_dict["factor_specific"]
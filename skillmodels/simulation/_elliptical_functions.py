@@ -6,12 +6,48 @@
     - calls multivariate normal from np.random to be able to use with getattr()
       in simulate_data
 
+All functions take an optional numpy.random.Generator rng. If it is None, the
+global random state of numpy is used. The heavy tailed distributions are scale
+mixtures of normals. They draw the whole sample of shape (size, d) at once and
+correlate standard normal draws with one factor of the covariance matrix.
+
 """
 import numpy as np
-from numpy.random import multivariate_normal
 
 
-def _mv_student_t(mean, cov, d_f, size=1):
+def _random_state(rng):
+    return np.random if rng is None else rng
+
+
+def multivariate_normal(mean, cov, size=None, rng=None):
+    """Draw from a multivariate normal with rng or the global random state."""
+    return _random_state(rng).multivariate_normal(mean, cov, size)
+
+
+def _cov_factor(cov):
+    """Matrix factor with factor @ factor.T == cov.
+
+    This is the lower Cholesky factor if cov is positive definite. Positive
+    semi-definite matrices, e.g. a matrix of zeros for a degenerate distribution,
+    are factorized with an eigendecomposition.
+
+    """
+    cov = np.asarray(cov, dtype=float)
+    try:
+        factor = np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        eigvals, eigvecs = np.linalg.eigh(cov)
+        factor = eigvecs * np.sqrt(np.clip(eigvals, 0, None))
+    return factor
+
+
+def _correlated_normals(cov, size, rng=None):
+    """Draw an array of shape (size, d) from a centered normal with covariance cov."""
+    factor = _cov_factor(cov)
+    return _random_state(rng).standard_normal((size, len(factor))) @ factor.T
+
+
+def _mv_student_t(mean, cov, d_f, size=1, rng=None):
     """Generate random sample from d-dimensional t_distribution.
 
     Args:
@@ -19,6 +55,7 @@ def _mv_student_t(mean, cov, d_f, size=1):
         cov (np.ndarray): covariance matrix of shape (d,d)
         d_f (float): degree of freedom
         size (float): the sample size
+        rng (numpy.random.Generator): optional random number generator.
     Returns:
         mv_t (np.ndarray): shape (size, d)
     Notes:
@@ -27,14 +64,13 @@ def _mv_student_t(mean, cov, d_f, size=1):
        - Ref: bit.ly/2NDhbWM
 
     """
-    d_dim = len(cov)
-    x_chi = np.sqrt(np.random.chisquare(d_f, size) / d_f).reshape(size, 1, 1)
-    y_norm = multivariate_normal(np.zeros(d_dim), cov, size).reshape(size, 1, d_dim)
-    mv_t = mean + (y_norm / x_chi).reshape(size, d_dim)
+    x_chi = np.sqrt(_random_state(rng).chisquare(d_f, size) / d_f)
+    y_norm = _correlated_normals(cov, size, rng)
+    mv_t = mean + y_norm / x_chi.reshape(size, 1)
     return mv_t
 
 
-def _uv_elip_stable(alpha, gamma, delta=0, beta=1, size=1):
+def _uv_elip_stable(alpha, gamma, delta=0, beta=1, size=1, rng=None):
     """An algorithm for simulating random variables from stable distribution.
 
     Args:
@@ -43,6 +79,7 @@ def _uv_elip_stable(alpha, gamma, delta=0, beta=1, size=1):
         delta (float): location parameter
         beta (float): measure of skewness.
         size (float): sample size
+        rng (numpy.random.Generator): optional random number generator.
 
     Returns:
         stable_u (np.ndarray): S_1(alpha, beta, gamma, delta) random vector of length
@@ -68,8 +105,9 @@ def _uv_elip_stable(alpha, gamma, delta=0, beta=1, size=1):
             the two forumlas agree or not is out of scope of this assignment)
 
     """
-    theta = np.random.uniform(-np.pi / 2, np.pi / 2, size)
-    w_exp = np.random.exponential(1, size)
+    rng = _random_state(rng)
+    theta = rng.uniform(-np.pi / 2, np.pi / 2, size)
+    w_exp = rng.exponential(1, size)
     if alpha == 1:
         comp_1 = np.tan(theta) * (0.5 * np.pi + beta * theta)
         comp_2 = -beta * np.log(
@@ -82,7 +120,6 @@ def _uv_elip_stable(alpha, gamma, delta=0, beta=1, size=1):
     else:
         theta_0 = np.arctan(beta * np.tan(0.5 * np.pi * alpha)) / alpha
         # cross checked ([3] Weron, 1995)
-        theta_0 = np.ones(size) * theta_0
         z_1 = np.sin(alpha * (theta_0 + theta)) / np.power(
             (np.cos(theta) * np.cos(alpha * theta_0)), (1 / alpha)
         )
@@ -96,13 +133,15 @@ def _uv_elip_stable(alpha, gamma, delta=0, beta=1, size=1):
     return stable_u
 
 
-def _mv_elip_stable(alpha, sigma_mat, delta, size=1):
+def _mv_elip_stable(alpha, sigma_mat, delta, size=1, rng=None):
     """Generate d-dimensional multivariate elliptically contoured stable rv.
 
      Args:
         alpha (float): measure of concentration strictly between 0 and 2
         sigma_mat (np.ndarray): positive definite matrix of shape (d,d)
         delta (np.ndarray): shift vector of size d
+        size (int): the sample size
+        rng (numpy.random.Generator): optional random number generator.
 
      Returns:
         stable_m (np.ndarray): rv of shape (size, d)
@@ -113,8 +152,11 @@ def _mv_elip_stable(alpha, sigma_mat, delta, size=1):
 
     """
     a_stab = _uv_elip_stable(
-        0.5 * alpha, 2 * np.power(np.cos(np.pi * alpha / 4), (2 / alpha)), size=size
+        0.5 * alpha,
+        2 * np.power(np.cos(np.pi * alpha / 4), (2 / alpha)),
+        size=size,
+        rng=rng,
     ).reshape(size, 1)
-    g_norm = multivariate_normal(np.zeros(len(sigma_mat)), sigma_mat, size)
+    g_norm = _correlated_normals(sigma_mat, size, rng)
     stable_m = np.sqrt(a_stab) * g_norm + delta
     return stable_m
@@ -1,15 +1,30 @@
-"""Functions to simulate a dataset generated by a latent factor model."""
+"""Functions to simulate a dataset generated by a latent factor model.
+
+All functions that draw random numbers take an optional argument rng, which is a
+numpy.random.Generator. If it is None, the global random state of numpy is used.
+
+"""
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-from numpy.random import binomial
-from numpy.random import choice
-from numpy.random import multivariate_normal
 
 import skillmodels.model_functions.transition_functions as tf
 import skillmodels.simulation._elliptical_functions as ef
 
+# number of individuals that are simulated with one random stream if a seed is given
+CHUNK_SIZE = 100_000
+
+
+def _random_state(rng):
+    """Return rng or the numpy.random module, which has the same sampling methods."""
+    return np.random if rng is None else rng
+
 
-def add_missings(data, meas_names, p_b, p_r):
+def add_missings(data, meas_names, p_b, p_r, rng=None):
     """Add np.nans to data.
 
     nans are only added to measurements, not to control variables or factors.
@@ -21,6 +36,7 @@ def add_missings(data, meas_names, p_b, p_r):
         meas_names (list): list of strings of names of each measurement variable
         p_b (float): probability of a measurement to become missing
         p_r (float): probability of a measurement to remain missing in the next period
+        rng (numpy.random.Generator): optional random number generator.
     Returns:
         data_with_missings (pd.DataFrame): Dataset with a share of measurements
         replaced by np.nan values
@@ -41,18 +57,25 @@ def add_missings(data, meas_names, p_b, p_r):
           formula for deciding on p_b and p_r.
 
     """
-    nmeas = len(meas_names)
+    rng = _random_state(rng)
     data_with_missings = data.copy(deep=True)
-    for i in set(data_with_missings.index):
-        ind_data = data_with_missings.loc[i][meas_names].to_numpy()
-        s_0 = binomial(1, p_b, nmeas)
-        ind_data[0, np.where(s_0 == 1)] = np.nan
-        for t in range(1, len(ind_data)):
-            indc_nan = np.isnan(ind_data[t - 1])
-            prob = p_r * indc_nan + p_b * (1 - indc_nan)
-            s_m = binomial(1, prob)
-            ind_data[t, np.where(s_m == 1)] = np.nan
-        data_with_missings.loc[i, meas_names] = ind_data
+    meas = data_with_missings[meas_names].to_numpy(dtype=float, copy=True)
+    ids = data_with_missings.index.get_level_values(0)
+    # position of each row in the history of its individual and the row of the
+    # previous period of the same individual
+    position = pd.Series(ids).groupby(ids).cumcount().to_numpy()
+    previous_row = pd.Series(np.arange(len(meas))).groupby(ids).shift(1).to_numpy()
+
+    for t in range(position.max() + 1 if len(meas) > 0 else 0):
+        rows = np.flatnonzero(position == t)
+        if t == 0:
+            prob = np.full((len(rows), len(meas_names)), p_b)
+        else:
+            prev_nan = np.isnan(meas[previous_row[rows].astype(int)])
+            prob = np.where(prev_nan, p_r, p_b)
+        meas[rows] = np.where(rng.binomial(1, prob) == 1, np.nan, meas[rows])
+
+    data_with_missings[meas_names] = meas
 
     return data_with_missings
 
@@ -72,6 +95,10 @@ def simulate_datasets(
     dist_arg_dict,
     weights,
     policies=None,
+    seed=None,
+    chunk_size=None,
+    n_workers=1,
+    output="frames",
 ):
     """Simulate datasets generated by a latent factor model.
 
@@ -105,14 +132,335 @@ def simulate_datasets(
         policies (list): list of dictionaries. Each dictionary specifies a
             a stochastic shock to a latent factor AT THE END of "period" for "factor"
             with mean "effect_size" and "standard deviation"
+        seed (int, np.random.SeedSequence or np.random.Generator): If specified,
+            the individuals are simulated in chunks of chunk_size and each chunk
+            draws from its own random stream that is derived from seed. The result
+            only depends on seed and chunk_size, not on n_workers. If None, the
+            global random state of numpy is used.
+        chunk_size (int): number of individuals per chunk. Default
+            :data:`CHUNK_SIZE` if seed is specified and nobs otherwise.
+        n_workers (int): number of processes in which chunks are simulated. See
+            :func:`iter_simulated_datasets`.
+        output (str): "frames" or "arrays". "arrays" skips the construction of the
+            long format DataFrames and returns the arrays in the format of
+            SkillModel.y_data and SkillModel.c_data. The random draws are the same.
 
     Returns:
         observed_data (pd.DataFrame): Dataset with measurements and control variables
             in long format
         latent_data (pd.DataFrame): Dataset with lantent factors in long format
+
+        With output="arrays":
+
+        y_data (np.ndarray): array of [nupdates, nobs] with the measurements in the
+            order of loadings_df.
+        c_data (list): list of length nper with arrays of [nobs, ncontrols + 1]
+            with a constant and the control variables.
+        factors (np.ndarray): array of [nper, nobs, nfac] with the latent factors.
     Notes:
         - the key names of dist_arg_dict can be looked up in the module
           _elliptical_functions. For multivariate_normal it's [mean, cov].
+    """
+    model_args = {
+        "factor_names": factor_names,
+        "control_names": control_names,
+        "nper": nper,
+        "transition_names": transition_names,
+        "transition_argument_dicts": transition_argument_dicts,
+        "shock_sd": shock_sd,
+        "loadings_df": loadings_df,
+        "control_coeffs": control_coeffs,
+        "meas_variances": meas_variances,
+        "dist_name": dist_name,
+        "dist_arg_dict": dist_arg_dict,
+        "weights": weights,
+        "policies": policies,
+    }
+    if output not in ["frames", "arrays"]:
+        raise ValueError(f"output has to be 'frames' or 'arrays', not {output}.")
+    if seed is None and chunk_size is None and n_workers == 1:
+        chunk_size = nobs
+    chunks = list(
+        iter_simulated_datasets(nobs, chunk_size, seed, n_workers, output, **model_args)
+    )
+    if output == "arrays":
+        y_data = np.hstack([chunk[0] for chunk in chunks])
+        controls = np.vstack([chunk[1] for chunk in chunks])
+        factors = np.concatenate([chunk[2] for chunk in chunks], axis=1)
+        return y_data, [controls] * nper, factors
+    elif len(chunks) == 1:
+        observed_data, latent_data = chunks[0]
+    else:
+        observed_data = pd.concat([chunk[0] for chunk in chunks])
+        latent_data = pd.concat([chunk[1] for chunk in chunks])
+    return observed_data, latent_data
+
+
+def iter_simulated_datasets(
+    nobs, chunk_size=None, seed=None, n_workers=1, output="frames", **model_args
+):
+    """Simulate datasets in chunks of individuals and yield them one at a time.
+
+    Only one chunk is held in memory, so arbitrarily large datasets can be simulated
+    and processed or written to disk, e.g. with :func:`write_simulated_datasets`.
+    Concatenating the chunks gives the same datasets as :func:`simulate_datasets`
+    with the same seed and chunk_size.
+
+    Args:
+        nobs (int): total number of individuals.
+        chunk_size (int): number of individuals per chunk. Default
+            :data:`CHUNK_SIZE`.
+        seed (int, np.random.SeedSequence or np.random.Generator): seed from which
+            one random stream per chunk is derived. If None, the global random
+            state of numpy is used.
+        n_workers (int): number of processes in which chunks are simulated. If it
+            is larger than one, at most 2 * n_workers chunks are in memory. Each
+            chunk has its own random stream, so the results do not depend on
+            n_workers. Without seed, the streams are derived from fresh entropy,
+            because the global random state can't be shared across processes.
+        output (str): "frames" or "arrays". See :func:`simulate_datasets`.
+        model_args: the remaining arguments of :func:`simulate_datasets`.
+
+    Yields:
+        observed_data (pd.DataFrame): observed data of the individuals in the chunk.
+        latent_data (pd.DataFrame): latent data of the individuals in the chunk.
+
+        With output="arrays", y_data, the controls of all periods and the factors of
+        the individuals in the chunk.
+
+    """
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+    assert chunk_size > 0, "chunk_size has to be positive."
+    starts = range(0, nobs, chunk_size)
+    if seed is None and n_workers == 1:
+        rngs = [None] * len(starts)
+    else:
+        seed_seq = _seed_sequence(seed)
+        rngs = [np.random.default_rng(s) for s in seed_seq.spawn(len(starts))]
+    tasks = [
+        {
+            "first_id": start,
+            "nobs": min(chunk_size, nobs - start),
+            "rng": rng,
+            "output": output,
+        }
+        for start, rng in zip(starts, rngs)
+    ]
+
+    if n_workers == 1:
+        for task in tasks:
+            yield _simulate_chunk(**task, **model_args)
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(_simulate_chunk, **task, **model_args))
+                if len(pending) >= 2 * n_workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+
+def _seed_sequence(seed):
+    """Convert None, an int, a SeedSequence or a Generator to a SeedSequence."""
+    if isinstance(seed, np.random.SeedSequence):
+        seed_seq = seed
+    elif isinstance(seed, np.random.Generator):
+        seed_seq = np.random.SeedSequence(seed.integers(2 ** 63, size=4))
+    else:
+        seed_seq = np.random.SeedSequence(seed)
+    return seed_seq
+
+
+def write_simulated_datasets(chunks, path, fmt="npy"):
+    """Write chunks of simulated datasets to one file per chunk and dataset.
+
+    Args:
+        chunks (iterable): yields tuples of observed and latent data, e.g. the
+            generator returned by :func:`iter_simulated_datasets`.
+        path (str or pathlib.Path): directory. It is created if necessary. Chunk
+            files of earlier calls in the same directory are removed.
+        fmt (str): "npy" or "parquet". With "npy", each chunk is stored as 2d float
+            array whose first two columns are id and period. The names of all
+            columns are stored in observed_columns.json and latent_columns.json.
+            "parquet" requires pyarrow or fastparquet.
+
+    """
+    if fmt not in ["npy", "parquet"]:
+        raise ValueError(f"fmt has to be 'npy' or 'parquet', not {fmt}.")
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for name in ["observed", "latent"]:
+        for ext in ["npy", "parquet"]:
+            for file in path.glob(f"{name}_[0-9]*.{ext}"):
+                file.unlink()
+    for i, chunk in enumerate(chunks):
+        for name, df in zip(["observed", "latent"], chunk):
+            if fmt == "parquet":
+                df.to_parquet(path / f"{name}_{i:05d}.parquet")
+            else:
+                long = df.reset_index()
+                np.save(path / f"{name}_{i:05d}.npy", long.to_numpy(dtype=float))
+                if i == 0:
+                    with open(path / f"{name}_columns.json", "w") as f:
+                        json.dump(list(long.columns), f)
+
+
+def read_simulated_datasets(path, fmt="npy"):
+    """Read datasets that were written by :func:`write_simulated_datasets`.
+
+    Returns:
+        observed_data (pd.DataFrame)
+        latent_data (pd.DataFrame)
+
+    """
+    path = Path(path)
+    datasets = []
+    for name in ["observed", "latent"]:
+        files = sorted(path.glob(f"{name}_[0-9]*.{fmt}"))
+        if fmt == "parquet":
+            df = pd.concat([pd.read_parquet(file) for file in files])
+        else:
+            with open(path / f"{name}_columns.json") as f:
+                columns = json.load(f)
+            arr = np.concatenate([np.load(file) for file in files])
+            df = pd.DataFrame(arr, columns=columns)
+            df[["id", "period"]] = df[["id", "period"]].astype(int)
+            df.set_index(["id", "period"], inplace=True)
+        datasets.append(df)
+    return tuple(datasets)
+
+
+def simulate_policy_scenarios(
+    scenarios,
+    nobs,
+    factor_names,
+    nper,
+    transition_names,
+    transition_argument_dicts,
+    shock_sd,
+    dist_name,
+    dist_arg_dict,
+    weights,
+    control_names=(),
+    seed=None,
+    quantiles=(0.1, 0.5, 0.9),
+):
+    """Simulate the latent factors under several policy scenarios.
+
+    All scenarios use common random numbers: the start factors, the transition
+    shocks and the standard normal draws from which the stochastic policy
+    effects are scaled are drawn once and shared by all scenarios. Differences
+    between the scenarios are therefore only caused by the policies. The
+    scenarios are propagated together, such that each transition function is
+    called once per period and factor on an array of [nscenarios * nobs, nfac].
+
+    Args:
+        scenarios (dict or list): dict that maps the names of the scenarios to
+            their policies or list of policies, in which case the scenarios are
+            numbered. The policies of a scenario are a list of dictionaries as in
+            :func:`simulate_datasets`, a single dictionary or None for the
+            scenario without policy. Policies of one scenario for the same period
+            and factor share their random draws.
+        nobs (int): number of simulated individuals.
+        quantiles (tuple): quantiles of the factor distribution that are reported.
+        seed (int, np.random.SeedSequence or np.random.Generator): seed of the
+            random stream. If None, the global random state of numpy is used.
+        control_names (list): names of the control variables. They are drawn
+            jointly with the start factors if the start distribution covers them.
+
+        See :func:`simulate_datasets` for the remaining arguments.
+
+    Returns:
+        summary (pd.DataFrame): The index has the levels scenario, period and
+            factor. The columns are mean, std and the quantiles in the format of
+            DataFrame.describe, e.g. "10%". As in :func:`simulate_datasets`, the
+            factors of a period include the policy effects of that period.
+
+    """
+    if not isinstance(scenarios, dict):
+        scenarios = dict(enumerate(scenarios))
+    scenario_policies = []
+    for policies in scenarios.values():
+        if policies is None:
+            policies = []
+        elif isinstance(policies, dict):
+            policies = [policies]
+        scenario_policies.append(policies)
+
+    rng = None if seed is None else np.random.default_rng(_seed_sequence(seed))
+    nscen, nfac = len(scenarios), len(factor_names)
+
+    start, _ = generate_start_factors_and_control_variables_elliptical(
+        nobs, nfac, len(control_names), dist_name, dist_arg_dict, weights, rng=rng
+    )
+    shocks = _random_state(rng).normal(size=(nper - 1, nobs, nfac))
+    shocks *= np.asarray(shock_sd)[: nper - 1].reshape(nper - 1, 1, nfac)
+    policy_draws = _random_state(rng).normal(size=(nper - 1, nobs, nfac))
+
+    fac = np.repeat(start[np.newaxis], nscen, axis=0)
+    stats = []
+    for t in range(nper):
+        if t < nper - 1:
+            for s, policies in enumerate(scenario_policies):
+                for policy in [p for p in policies if p["period"] == t]:
+                    if policy["standard_deviation"] < 0:
+                        raise ValueError("No negative standard deviation allowed.")
+                    position = factor_names.index(policy["factor"])
+                    fac[s, :, position] += (
+                        policy["effect_size"]
+                        + policy["standard_deviation"] * policy_draws[t, :, position]
+                    )
+
+        stats.append(
+            np.concatenate(
+                [
+                    fac.mean(axis=1)[np.newaxis],
+                    fac.std(axis=1, ddof=1)[np.newaxis],
+                    np.quantile(fac, quantiles, axis=1),
+                ]
+            )
+        )
+
+        if t < nper - 1:
+            flat = fac.reshape(nscen * nobs, nfac)
+            fac = _transition(flat, transition_names, transition_argument_dicts[t])
+            fac = fac.reshape(nscen, nobs, nfac) + shocks[t]
+
+    # stats has the shape [nper, nstats, nscen, nfac]
+    stats = np.array(stats).transpose(2, 0, 3, 1).reshape(-1, 2 + len(quantiles))
+    index = pd.MultiIndex.from_product(
+        [list(scenarios), range(nper), factor_names],
+        names=["scenario", "period", "factor"],
+    )
+    columns = ["mean", "std"] + [f"{100 * q:g}%" for q in quantiles]
+    return pd.DataFrame(stats, index=index, columns=columns)
+
+
+def _simulate_chunk(
+    first_id,
+    nobs,
+    factor_names,
+    control_names,
+    nper,
+    transition_names,
+    transition_argument_dicts,
+    shock_sd,
+    loadings_df,
+    control_coeffs,
+    meas_variances,
+    dist_name,
+    dist_arg_dict,
+    weights,
+    policies=None,
+    rng=None,
+    output="frames",
+):
+    """Simulate the individuals first_id, ..., first_id + nobs - 1.
+
+    See :func:`simulate_datasets` for the arguments. With output="arrays", the
+    result is y_data, the controls of all periods and the factors.
+
     """
     policies = policies if policies is not None else []
     ncont = len(control_names)
@@ -120,80 +468,86 @@ def simulate_datasets(
     fac = np.zeros((nper, nobs, nfac))
 
     fac[0], cont = generate_start_factors_and_control_variables_elliptical(
-        nobs, nfac, ncont, dist_name, dist_arg_dict, weights
+        nobs, nfac, ncont, dist_name, dist_arg_dict, weights, rng=rng
     )
 
-    cont = pd.DataFrame(data=cont, columns=["constant"] + control_names)
-    # ==========
-
-    # ==========
     for t in range(nper - 1):
         # if there is a shock in period t, add it here
         policies_t = [p for p in policies if p["period"] == t]
         for policy in policies_t:
             position = factor_names.index(policy["factor"])
             fac[t, :, position] += _get_shock(
-                mean=policy["effect_size"], sd=policy["standard_deviation"], size=nobs
+                mean=policy["effect_size"],
+                sd=policy["standard_deviation"],
+                size=nobs,
+                rng=rng,
             )
 
         fac[t + 1] = next_period_factors(
-            fac[t], transition_names, transition_argument_dicts[t], shock_sd[t]
+            fac[t], transition_names, transition_argument_dicts[t], shock_sd[t], rng
         )
 
-    observed_data_by_period = []
+    y_data = np.zeros((len(loadings_df), nobs))
+    counter = 0
     for t in range(nper):
-        meas = pd.DataFrame(
-            data=measurements_from_factors(
-                fac[t],
-                cont.to_numpy(),
-                loadings_df.loc[t].to_numpy(),
-                control_coeffs[t],
-                meas_variances.loc[t].to_numpy(),
-            ),
-            columns=loadings_df.loc[t].index,
+        meas = measurements_from_factors(
+            fac[t],
+            cont,
+            loadings_df.loc[t].to_numpy(),
+            control_coeffs[t],
+            meas_variances.loc[t].to_numpy(),
+            rng=rng,
         )
-        meas["period"] = t
-        observed_data_by_period.append(pd.concat([meas, cont], axis=1))
+        y_data[counter : counter + meas.shape[1]] = meas.T
+        counter += meas.shape[1]
 
-    observed_data = pd.concat(observed_data_by_period, axis=0, sort=True)
-    observed_data["id"] = observed_data.index
-    observed_data.sort_values(["id", "period"], inplace=True)
-    observed_data.set_index(["id", "period"], inplace=True)
+    if output == "arrays":
+        return y_data, cont, fac
 
-    latent_data_by_period = []
-    for t in range(nper):
-        lat = pd.DataFrame(data=fac[t], columns=factor_names)
-        lat["period"] = t
-        latent_data_by_period.append(lat)
+    index = pd.MultiIndex.from_product(
+        [range(first_id, first_id + nobs), range(nper)], names=["id", "period"]
+    )
 
-    latent_data = pd.concat(latent_data_by_period, axis=0, sort=True)
-    latent_data["id"] = latent_data.index
-    latent_data.sort_values(["id", "period"], inplace=True)
-    latent_data.set_index(["id", "period"], inplace=True)
+    # columns in the long format order of index. Measurements are collected in
+    # arrays of [nobs, nper] because not all of them are measured in each period.
+    observed = {}
+    for i, name in enumerate(["constant"] + control_names):
+        observed[name] = np.repeat(cont[:, i], nper)
+    for i, (t, name) in enumerate(loadings_df.index):
+        if name not in observed:
+            observed[name] = np.full((nobs, nper), np.nan)
+        observed[name][:, t] = y_data[i]
+    observed = {name: arr.reshape(-1) for name, arr in observed.items()}
+    observed_data = pd.DataFrame(observed, index=index)[sorted(observed)]
+
+    latent = fac.transpose(1, 0, 2).reshape(nobs * nper, nfac)
+    latent_data = pd.DataFrame(latent, columns=factor_names, index=index)
+    latent_data = latent_data[sorted(factor_names)]
 
     return observed_data, latent_data
 
 
-def _get_shock(mean, sd, size):
+def _get_shock(mean, sd, size, rng=None):
     """Add stochastic effect to a  factor of length nobs.
     Args:
         mean (float): mean of the stochastic effect
         sd (float): standard deviation of the effect
         size (int): length of resulting array
+        rng (numpy.random.Generator): optional random number generator.
     Returns:
         shock (np.array): 1d array of length nobs with the stochastic shock
     """
     if sd == 0:
         shock = np.full(size, mean)
     elif sd > 0:
-        shock = np.random.normal(mean, sd, size)
+        shock = _random_state(rng).normal(mean, sd, size)
     else:
         raise ValueError("No negative standard deviation allowed.")
     return shock
 
 
 def generate_start_factors_and_control_variables_elliptical(
-    nobs, nfac, ncont, dist_name, dist_arg_dict, weights=1
+    nobs, nfac, ncont, dist_name, dist_arg_dict, weights=1, rng=None
 ):
     """Draw initial states and control variables from a (mixture of) normals.
 
@@ -208,19 +562,26 @@ def generate_start_factors_and_control_variables_elliptical(
             arguments should be in accordance with nfac + ncont
             weights (np.ndarray): size (nmixtures). The weight of each mixture element.
             Default value is equal to 1.
+        rng (numpy.random.Generator): optional random number generator.
 
     Returns:
         start_factors (np.ndarray): shape (nobs, nfac),
         controls (np.ndarray): shape (nobs, ncontrols),
 
     """
+    dist = getattr(ef, dist_name)
     if np.size(weights) == 1:
-        out = getattr(ef, dist_name)(size=nobs, **dist_arg_dict[0])
+        out = dist(size=nobs, rng=rng, **dist_arg_dict[0])
     else:
-        helper_array = choice(np.arange(len(weights)), p=weights, size=nobs)
+        nmixtures = len(weights)
+        membership = _random_state(rng).choice(nmixtures, p=weights, size=nobs)
         out = np.zeros((nobs, nfac + ncont))
-        for i in range(nobs):
-            out[i] = getattr(ef, dist_name)(**dist_arg_dict[helper_array[i]])
+        # draw the start values of all members of a mixture component at once
+        for m, args in enumerate(dist_arg_dict):
+            members = membership == m
+            nmembers = members.sum()
+            if nmembers > 0:
+                out[members] = dist(size=nmembers, rng=rng, **args)
     start_factors = out[:, 0:nfac]
     controls = out[:, nfac:]
     controls = np.hstack([np.ones((nobs, 1)), controls])
@@ -228,7 +589,9 @@ def generate_start_factors_and_control_variables_elliptical(
     return start_factors, controls
 
 
-def next_period_factors(factors, transition_names, transition_argument_dicts, shock_sd):
+def next_period_factors(
+    factors, transition_names, transition_argument_dicts, shock_sd, rng=None
+):
     """Apply transition function to factors and add shocks.
 
     Args:
@@ -240,27 +603,33 @@ def next_period_factors(factors, transition_names, transition_argument_dicts, sh
             description of the arguments of transition functions can be found in the
             module docstring of skillmodels.model_functions.transition_functions.
         shock_sd (np.ndarray): numpy array of length nfac.
+        rng (numpy.random.Generator): optional random number generator.
 
     Returns:
         next_factors (np.ndarray): shape(nobs,nfac)
 
     """
     nobs, nfac = factors.shape
-    factors_tp1 = np.zeros((nobs, nfac))
-    for i in range(nfac):
-        factors_tp1[:, i] = getattr(tf, transition_names[i])(
-            factors, **transition_argument_dicts[i]
-        )
+    factors_tp1 = _transition(factors, transition_names, transition_argument_dicts)
     # Assumption: In general err_{Obs_j,Fac_i}!=err{Obs_k,Fac_i}, where j!=k
-    errors = multivariate_normal([0] * nfac, np.diag(shock_sd ** 2), nobs).reshape(
-        nobs, nfac
-    )
+    # The shocks are independent, so they are scaled standard normal draws.
+    errors = _random_state(rng).normal(size=(nobs, nfac)) * np.asarray(shock_sd)
     next_factors = factors_tp1 + errors
 
     return next_factors
 
 
-def measurements_from_factors(factors, controls, loadings, control_coeffs, variances):
+def _transition(factors, transition_names, transition_argument_dicts):
+    """Apply the transition function of each factor without adding shocks."""
+    factors_tp1 = np.zeros(factors.shape)
+    for i, name in enumerate(transition_names):
+        factors_tp1[:, i] = getattr(tf, name)(factors, **transition_argument_dicts[i])
+    return factors_tp1
+
+
+def measurements_from_factors(
+    factors, controls, loadings, control_coeffs, variances, rng=None
+):
     """Generate the variables that would be observed in practice.
 
     This generates the data for only one period. Let nmeas be the number
@@ -274,6 +643,7 @@ def measurements_from_factors(factors, controls, loadings, control_coeffs, varia
         variances (np.ndarray): numpy array of size (nmeas) with the variances of the
             measurements. Measurement error is assumed to be independent across
             measurements
+        rng (numpy.random.Generator): optional random number generator.
 
     Returns:
         measurements (np.ndarray): array of shape (nobs, nmeas) with measurements.
@@ -281,7 +651,7 @@ def measurements_from_factors(factors, controls, loadings, control_coeffs, varia
     nmeas = loadings.shape[0]
     nobs, nfac = factors.shape
     # Assumption: In general eps_{Obs_j,Meas_i}!=eps_{Obs_k,Meas_i}  where j!=k
-    epsilon = multivariate_normal([0] * nmeas, np.diag(variances), nobs)
+    epsilon = _random_state(rng).normal(size=(nobs, nmeas)) * np.sqrt(variances)
     states = factors
     conts = controls
     states_part = np.dot(states, loadings.T)
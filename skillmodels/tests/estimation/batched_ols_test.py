@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+import statsmodels.api as sm
+from numpy.testing import assert_array_almost_equal as aaae
+
+from skillmodels.estimation.batched_ols import batched_ols
+
+
+@pytest.fixture
+def regressions():
+    rng = np.random.default_rng(0)
+    endog, exog = [], []
+    for nobs, nregressors in [(50, 1), (80, 3), (65, 2)]:
+        x = pd.DataFrame(
+            rng.normal(size=(nobs, nregressors)),
+            columns=[f"x{i}" for i in range(nregressors)],
+            index=np.arange(nobs) + 100,
+        )
+        x.insert(0, "Intercept", 1.0)
+        y = x @ np.arange(1, nregressors + 2) + rng.normal(size=nobs)
+        endog.append(y)
+        exog.append(x)
+    endog[1].iloc[[3, 7]] = np.nan
+    exog[2].iloc[[0, 10], 1] = np.nan
+    return endog, exog
+
+
+def test_batched_ols_equals_statsmodels(regressions):
+    endog, exog = regressions
+    results = batched_ols(endog, exog)
+    for y, x, res in zip(endog, exog, results):
+        expected = sm.OLS(y, x, missing="drop").fit()
+        for attr in ["params", "bse", "tvalues", "pvalues"]:
+            aaae(getattr(res, attr), getattr(expected, attr))
+            assert getattr(res, attr).index.equals(x.columns)
+        assert res.nobs == expected.nobs
+        assert res.df_resid == expected.df_resid
+        aaae(res.fittedvalues.dropna(), expected.fittedvalues)
+        aaae(res.resid.dropna(), expected.resid)
+
+
+def test_batched_ols_residuals_are_missing_in_dropped_rows(regressions):
+    endog, exog = regressions
+    res = batched_ols(endog, exog)[1]
+    assert res.resid.index.equals(endog[1].index)
+    assert res.resid.isnull().sum() == 2
+    assert res.fittedvalues.isnull().equals(endog[1].isnull())
+
+
+def test_batched_ols_with_collinear_regressors_equals_statsmodels(regressions):
+    endog, exog = regressions
+    exog[0]["x0_copy"] = 2 * exog[0]["x0"]
+    results = batched_ols(endog, exog)
+    expected = sm.OLS(endog[0], exog[0]).fit()
+    for attr in ["params", "bse", "tvalues", "pvalues"]:
+        aaae(getattr(results[0], attr), getattr(expected, attr))
+    assert results[0].df_resid == expected.df_resid == 50 - 2
+
+    # the other regressions are not affected
+    for y, x, res in zip(endog[1:], exog[1:], results[1:]):
+        aaae(res.params, sm.OLS(y, x, missing="drop").fit().params)
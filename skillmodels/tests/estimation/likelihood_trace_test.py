@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import pytest
+from numpy.testing import assert_array_equal
+
+from skillmodels.estimation.likelihood_trace import load_trace
+from skillmodels.estimation.likelihood_trace import TraceRecorder
+
+
+def criterion(params):
+    if isinstance(params, pd.DataFrame):
+        params = params["value"]
+    return -np.sum(params ** 2)
+
+
+def test_record_and_load_trace(tmp_path):
+    index = pd.MultiIndex.from_tuples([("a", 0), ("b", 1)])
+    recorder = TraceRecorder(criterion, index)
+    recorder(pd.DataFrame({"value": [1.0, 2.0]}, index=index))
+    recorder(np.array([3.0, 4.0]))
+    recorder.save(tmp_path / "trace.npz")
+
+    trace = load_trace(tmp_path / "trace.npz")
+    assert_array_equal(trace["params"], [[1, 2], [3, 4]])
+    assert_array_equal(trace["criterion"], [-5, -25])
+    assert list(trace["index"]) == ["('a', 0)", "('b', 1)"]
+
+
+def test_non_scalar_criterion_fails_when_recorded():
+    recorder = TraceRecorder(lambda params: params ** 2)
+    with pytest.raises(TypeError):
+        recorder(pd.DataFrame({"value": [1.0, 2.0]}))
+    assert recorder._values == []
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from numpy.testing import assert_array_almost_equal as aaae
+
+from skillmodels.estimation.monte_carlo import load_replications
+from skillmodels.estimation.monte_carlo import save_replication
+from skillmodels.estimation.monte_carlo import summarize_monte_carlo
+
+
+def test_summarize_monte_carlo():
+    true = pd.Series([1.0, 2.0], index=["a", "b"])
+    estimates = pd.DataFrame([[1.0, 3.0], [2.0, 2.0]], index=["a", "b"])
+    standard_errors = pd.DataFrame([[0.1, 0.5], [1.0, 1.0]], index=["a", "b"])
+    summary = summarize_monte_carlo(estimates, true, standard_errors)
+
+    aaae(summary["bias"], [1, 0])
+    aaae(summary["rmse"], [np.sqrt(2), 0])
+    aaae(summary["std"], [np.sqrt(2), 0])
+    aaae(summary["coverage"], [0.5, 1])
+
+
+def test_checkpoints_are_loaded(tmp_path):
+    save_replication(tmp_path, 3, {"estimates": pd.Series([1.0])})
+    save_replication(tmp_path, 0, {"estimates": pd.Series([2.0])})
+    results = load_replications(tmp_path, n_replications=3)
+    assert list(results) == [0]
+    assert results[0]["estimates"].iloc[0] == 2.0
+    assert load_replications(None, n_replications=3) == {}
@@ -0,0 +1,33 @@
+import numpy as np
+from numpy.testing import assert_array_almost_equal as aaae
+
+from skillmodels.estimation.numerical_derivatives import hessian
+from skillmodels.estimation.numerical_derivatives import jacobian
+
+
+def vector_func(x):
+    return np.array([x[0] ** 2 * x[1], np.exp(x[1]) + x[2], np.sin(x[0])])
+
+
+def scalar_func(x):
+    return x[0] ** 2 * x[1] + np.exp(x[1]) * x[2] + x[2] ** 3
+
+
+def test_jacobian():
+    x = np.array([0.5, -1.0, 2.0])
+    expected = np.array(
+        [[2 * x[0] * x[1], x[0] ** 2, 0], [0, np.exp(x[1]), 1], [np.cos(x[0]), 0, 0]]
+    )
+    aaae(jacobian(vector_func, x, n_workers=2), expected)
+
+
+def test_hessian():
+    x = np.array([0.5, -1.0, 2.0])
+    expected = np.array(
+        [
+            [2 * x[1], 2 * x[0], 0],
+            [2 * x[0], np.exp(x[1]) * x[2], np.exp(x[1])],
+            [0, np.exp(x[1]), 6 * x[2]],
+        ]
+    )
+    aaae(hessian(scalar_func, x, n_workers=2), expected, decimal=5)
@@ -0,0 +1,48 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from skillmodels.estimation.telemetry import TelemetryCriterion
+
+
+def criterion(params):
+    return -np.sum(params ** 2)
+
+
+def test_telemetry_callback():
+    events = []
+    wrapped = TelemetryCriterion(criterion, events.append)
+    values = [wrapped(np.ones(3) * i) for i in range(3)]
+
+    assert values == [0, -3, -12]
+    assert [e["evaluation"] for e in events] == [1, 2, 3]
+    assert [e["criterion"] for e in events] == values
+    assert all(e["latency"] >= 0 and e["active_evaluations"] == 1 for e in events)
+
+
+def test_telemetry_jsonl_file_with_threads(tmp_path):
+    path = tmp_path / "telemetry.jsonl"
+    wrapped = TelemetryCriterion(criterion, path)
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        list(executor.map(wrapped, [np.ones(2)] * 10))
+
+    with open(path) as f:
+        events = [json.loads(line) for line in f]
+    assert sorted(e["evaluation"] for e in events) == list(range(1, 11))
+    assert all(e["criterion"] == -2 and e["finite"] for e in events)
+
+
+def test_telemetry_failed_evaluation_is_not_active():
+    def failing(params):
+        raise ValueError("failed")
+
+    events = []
+    wrapped = TelemetryCriterion(failing, events.append)
+    with pytest.raises(ValueError):
+        wrapped(np.ones(2))
+
+    wrapped.criterion = criterion
+    wrapped(np.ones(2))
+    assert events[0]["active_evaluations"] == 1
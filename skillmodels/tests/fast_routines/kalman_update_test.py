@@ -397,3 +397,29 @@ def test_normal_state_and_cov_against_filterpy(fixture):
     reduced_cholcovs = cholcovs[:, 1:, 1:]
     covs = np.matmul(np.transpose(reduced_cholcovs, axes=(0, 2, 1)), reduced_cholcovs)
     aaae(covs, exp_cov)
+
+
+def test_soa_sqrt_linear_update_with_nans(setup_linear_update, expected_linear_update):
+    d = setup_linear_update
+    exp = expected_linear_update
+    state = np.ascontiguousarray(np.transpose(d["state"], axes=(1, 2, 0)))
+    mcovs = np.ascontiguousarray(np.transpose(d["mcovs"], axes=(1, 2, 3, 0)))
+    weights = np.ascontiguousarray(d["weights"].T)
+    kf.soa_sqrt_linear_update(
+        state,
+        mcovs,
+        d["like_vector"],
+        d["y"],
+        np.ascontiguousarray(d["c"].T),
+        d["control_coeffs"],
+        d["loading"],
+        d["meas_sd"],
+        d["positions"],
+        weights,
+    )
+    aaae(np.transpose(state, axes=(2, 0, 1)), exp["expected_states"])
+    aaae(weights.T, exp["expected_weights"])
+    aaae(d["like_vector"], exp["expected_like_vector"])
+    cholcovs = np.transpose(mcovs, axes=(3, 0, 1, 2))[:, :, 1:, 1:].copy()
+    make_unique(cholcovs.reshape(12, 3, 3))
+    aaae(cholcovs, exp["exp_cholcovs"])
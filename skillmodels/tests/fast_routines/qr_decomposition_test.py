@@ -2,6 +2,7 @@ import numpy as np
 from numpy.testing import assert_array_almost_equal as aaae
 
 from skillmodels.fast_routines.qr_decomposition import array_qr
+from skillmodels.fast_routines.qr_decomposition import soa_array_qr
 
 
 def a_prime_a(a):
@@ -23,3 +24,12 @@ class TestRFromQR:
         self.expected_prod = a_prime_a(self.some_array)
         prod = array_qr(self.some_array)
         aaae(a_prime_a(prod), self.expected_prod)
+
+
+def test_soa_r_from_qr():
+    some_array = np.random.randn(200, 7, 3)
+    expected_prod = a_prime_a(some_array)
+    soa_array = np.ascontiguousarray(np.transpose(some_array, axes=(1, 2, 0)))
+    soa_array_qr(soa_array)
+    prod = np.transpose(soa_array, axes=(2, 0, 1))[:, :3]
+    aaae(a_prime_a(prod), expected_prod)
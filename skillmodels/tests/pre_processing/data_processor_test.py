@@ -1,10 +1,13 @@
 import numpy as np
 import pandas as pd
+import pytest
 from numpy.testing import assert_array_equal as aae
 from pandas import DataFrame
 from pytest import raises
 
+from skillmodels.pre_processing.data_processor import collapse_identical_individuals
 from skillmodels.pre_processing.data_processor import DataProcessor
+from skillmodels.pre_processing.data_processor import pairwise_corr
 from skillmodels.pre_processing.data_processor import pre_process_data
 
 
@@ -186,3 +189,85 @@ class TestObsValidty:
         with raises(ValueError) as errinfo:
             DataProcessor._check_observable_data(self)
         assert f"Invalid dataset:\n{res}" == str(errinfo.value)
+
+
+def test_collapse_identical_individuals():
+    y_data = np.array([[1, np.nan, 1, 2, np.nan], [3, 4, 3, 3, 4]])
+    c_data = [np.ones((5, 1)), np.array([[0, 1, 0, 0, 1]]).T]
+
+    exp_y_data = np.array([[1, np.nan, 2], [3, 4, 3]])
+    exp_c_data = [np.ones((3, 1)), np.array([[0, 1, 0]]).T]
+    exp_weights = np.array([2, 2, 1])
+
+    y, c, weights = collapse_identical_individuals(y_data, c_data)
+    aae(y, exp_y_data)
+    for calc, exp in zip(c, exp_c_data):
+        aae(calc, exp)
+    aae(weights, exp_weights)
+
+
+def test_pairwise_corr_equals_pandas_corr():
+    arr = np.random.default_rng(0).normal(size=(50, 4))
+    arr[:, 1] += arr[:, 0]
+    arr[np.random.default_rng(1).uniform(size=arr.shape) < 0.2] = np.nan
+    arr[:, 3] = np.nan
+    arr[0, 3] = 1
+
+    expected = pd.DataFrame(arr).corr().to_numpy()
+    np.testing.assert_array_almost_equal(pairwise_corr(arr), expected)
+
+
+@pytest.fixture
+def unbalanced_specs():
+    data = pd.DataFrame(
+        {
+            "__id__": [2, 0, 1, 2, 0],
+            "__period__": [1, 0, 1, 0, 1],
+            "m1": [1.0, 2, 3, 4, 5],
+            "m2": [6.0, 7, 8, 9, 10],
+            "m3": [11.0, 12, 13, 14, 15],
+            "m4": [16.0, np.nan, 18, 19, 20],
+            "x": [21.0, 22, 23, 24, 25],
+        }
+    )
+    return {
+        "data": data,
+        "periods": (0, 1),
+        "nperiods": 2,
+        "factors": ("f1", "f2"),
+        "measurements": {"f1": [["m1", "m2"], ["m1"]], "f2": [["m3"], ["m3", "m4"]]},
+        "controls": ((), ()),
+        "anchoring": False,
+    }
+
+
+def test_measurement_cube_of_unbalanced_and_unsorted_data(unbalanced_specs):
+    dp = DataProcessor(unbalanced_specs)
+    cube, positions = dp.measurement_cube()
+    assert positions == {"m1": 0, "m2": 1, "m3": 2, "m4": 3}
+    nan = np.nan
+    expected = [
+        [[2, 7, 12, nan], [nan, nan, nan, nan], [4, 9, 14, nan]],
+        [[5, nan, 15, 20], [3, nan, 13, 18], [1, nan, 11, 16]],
+    ]
+    aae(cube, expected)
+
+    df = dp.measurements_df(periods=[0, 1], other_vars="x")
+    assert list(df.index) == [0, 1, 2]
+    aae(df["x_0"], [22, nan, 24])
+    aae(df["x_1"], [25, 23, 21])
+    aae(df["m4_1"], [20, 18, 16])
+
+    expected_corr = dp.measurements_df().corr()
+    pd.testing.assert_frame_equal(dp.measurements_corr(), expected_corr)
+
+
+def test_measurement_cube_with_invalid_rows_raises_error(unbalanced_specs):
+    dp = DataProcessor(unbalanced_specs)
+    dp.data = unbalanced_specs["data"].iloc[[0, 1, 2, 3, 4, 4]]
+    with raises(ValueError, match="several rows"):
+        dp.measurement_cube()
+
+    dp.data = unbalanced_specs["data"].replace({"__period__": {1: 2}})
+    with raises(ValueError, match="__period__"):
+        dp.measurement_cube()
@@ -1,13 +1,21 @@
+import copy
 import json
 import pickle
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
 import pytest
+from estimagic.optimization.optimize import process_constraints
 from numpy.testing import assert_array_almost_equal as aaae
 
 from skillmodels import SkillModel
+from skillmodels.estimation.likelihood_evaluator import LikelihoodEvaluator
+from skillmodels.estimation.likelihood_function import chunked_log_likelihood
 from skillmodels.estimation.likelihood_function import log_likelihood_contributions
+from skillmodels.estimation.likelihood_trace import replay_trace
+from skillmodels.estimation.likelihood_trace import TraceRecorder
+from skillmodels.estimation.monte_carlo import save_replication
 
 model_names = [
     # "test_model_no_stages_anchoring",
@@ -55,3 +63,293 @@ def test_likelihood_value(model, params, data, model_name):
     with open(in_path, "rb") as p:
         last_result = pickle.load(p)
     aaae(res, last_result)
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_chunked_likelihood_value(model, params, data, model_name):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    args = mod.likelihood_arguments_dict()
+    expected = log_likelihood_contributions(full_params, **args).sum(axis=0)
+
+    chunked_args = mod.chunked_likelihood_arguments_dict(chunk_size=37)
+    calculated = chunked_log_likelihood(full_params, **chunked_args)
+    aaae(calculated, expected)
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_chunked_likelihood_clips_each_contribution(model, params, data, model_name):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    args = mod.likelihood_arguments_dict()
+    contributions = log_likelihood_contributions(full_params, **args)
+    expected = np.maximum(contributions, -1).sum(axis=0)
+
+    chunked_args = mod.chunked_likelihood_arguments_dict(chunk_size=37)
+    calculated = chunked_log_likelihood(full_params, **chunked_args, lower_bound=-1)
+    aaae(calculated, expected)
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_chunked_criterion_equals_full_criterion(model, params, data, model_name):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    expected = LikelihoodEvaluator(mod)(full_params)
+    calculated = LikelihoodEvaluator(mod, memory_budget=10 ** 6)(full_params)
+    aaae(calculated, expected)
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_tiled_likelihood_value(model, params, data, model_name):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    args = mod.likelihood_arguments_dict()
+    expected = log_likelihood_contributions(full_params, **args).copy()
+
+    tiled_args = mod.likelihood_arguments_dict(tile_size=37)
+    calculated = log_likelihood_contributions(full_params, **tiled_args)
+    aaae(calculated, expected)
+
+
+@pytest.mark.parametrize("tile_size", [None, 37])
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_soa_likelihood_value(model, params, data, model_name, tile_size):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    args = mod.likelihood_arguments_dict()
+    expected = log_likelihood_contributions(full_params, **args).copy()
+
+    soa_args = mod.likelihood_arguments_dict(tile_size=tile_size, layout="soa")
+    calculated = log_likelihood_contributions(full_params, **soa_args)
+    aaae(calculated, expected)
+
+    in_path = f"skillmodels/tests/regression/{model_name}_result.pickle"
+    with open(in_path, "rb") as p:
+        last_result = pickle.load(p)
+    aaae(calculated.sum(axis=0), last_result)
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_concurrent_likelihood_evaluations(model, params, data, model_name):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    params_list = [full_params + 0.01 * i for i in range(6)]
+    evaluator = LikelihoodEvaluator(mod)
+    expected = [evaluator(p) for p in params_list]
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        calculated = list(executor.map(evaluator, params_list))
+    aaae(calculated, expected)
+    assert evaluator.nworkspaces <= 3
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_multistart_params(model, params, data, model_name):
+    mod = SkillModel(model_dict=model, dataset=data)
+    params_list = mod.multistart_params(params, n_starts=3, seed=1234)
+    full_params = mod.generate_full_start_params(params)
+    free, fixed = mod.start_params_helpers()
+    empty_params = pd.concat([free, fixed]).reindex(mod.params_index)
+    pc, pp = process_constraints(mod.constraints, empty_params)
+    fixed_to_value = pp.index[pp["_is_fixed_to_value"]]
+    replacements = pp["_post_replacements"].to_numpy()
+    followers = np.flatnonzero(replacements >= 0)
+    leaders = replacements[followers]
+
+    assert len(params_list) == 3
+    aaae(params_list[0]["value"], full_params["value"])
+    for sp in params_list[1:]:
+        assert sp.index.equals(full_params.index)
+        aaae(sp.loc[fixed_to_value, "value"], full_params.loc[fixed_to_value, "value"])
+        values = sp["value"].to_numpy()
+        aaae(values[followers], values[leaders])
+        assert not np.allclose(sp["value"], full_params["value"])
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_frequency_weights_equal_copies(model, params, data, model_name):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    draw = np.random.default_rng(1234).integers(0, mod.nobs, size=mod.nobs)
+    indices, counts = np.unique(draw, return_counts=True)
+
+    copied = LikelihoodEvaluator(
+        mod, y_data=mod.y_data[:, draw], c_data=[c[draw] for c in mod.c_data]
+    )
+    weighted = LikelihoodEvaluator(
+        mod,
+        y_data=mod.y_data[:, indices],
+        c_data=[c[indices] for c in mod.c_data],
+        weights=counts,
+    )
+    aaae(weighted(full_params), copied(full_params))
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_nobs_with_and_without_deduplication(model, params, data, model_name):
+    copy = data.copy()
+    ids = copy.index.get_level_values("id")
+    copy.index = copy.index.set_levels(ids.unique() + ids.max() + 1, level="id")
+    doubled = pd.concat([data, copy])
+
+    mod = SkillModel(model_dict=model, dataset=doubled)
+    dedup_mod = SkillModel(model_dict=model, dataset=doubled, deduplicate=True)
+    assert mod.nobs == mod.y_data.shape[1] == 2 * len(ids.unique())
+    assert dedup_mod.nobs == dedup_mod.y_data.shape[1] == len(ids.unique())
+    assert dedup_mod.weights.sum() == mod.nobs
+
+    arrays_mod = mod.with_data(dedup_mod.y_data, dedup_mod.c_data, dedup_mod.weights)
+    assert arrays_mod.nobs == dedup_mod.nobs
+
+    full_params = mod.generate_full_start_params(params)["value"]
+    expected = LikelihoodEvaluator(mod)(full_params)
+    aaae(LikelihoodEvaluator(dedup_mod)(full_params), expected)
+    aaae(LikelihoodEvaluator(arrays_mod)(full_params), expected)
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_likelihood_profile(model, params, data, model_name):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    profile = LikelihoodEvaluator(mod).profile(full_params, n_evaluations=2)
+
+    assert list(profile.columns) == ["stage", "period", "calls", "time", "share"]
+    calls = profile.groupby("stage")["calls"].sum()
+    assert calls["parse"] == 2
+    assert calls["qr"] == 2 * (mod.nperiods - 1)
+    assert calls["measurement_update"] == 2 * mod.nupdates
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_replay_trace(model, params, data, model_name, tmp_path):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)["value"]
+    recorder = TraceRecorder(LikelihoodEvaluator(mod), mod.params_index)
+    for scale in [1, 0.99, 1.01]:
+        recorder(full_params * scale)
+    recorder.save(tmp_path / "trace.npz")
+
+    res = replay_trace(mod, tmp_path / "trace.npz", n_workers=2, layout="soa")
+    assert res["n_evaluations"] == 3
+    assert res["max_criterion_deviation"] < 1e-10
+    assert res["max_contribution_deviation"] < 1e-10
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_simulated_arrays_give_likelihood_of_simulated_dataset(
+    model, params, data, model_name
+):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)
+    observed_data, _ = mod.simulate(nobs=50, params=full_params, seed=0)
+    y_data, c_data, _ = mod.simulate(
+        nobs=50, params=full_params, seed=0, output="arrays"
+    )
+
+    sim_mod = SkillModel(model_dict=model, dataset=observed_data)
+    calc = LikelihoodEvaluator(mod.with_data(y_data, c_data))
+    exp = LikelihoodEvaluator(sim_mod)
+    aaae(calc.criterion(full_params), exp.criterion(full_params))
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_monte_carlo(model, params, data, model_name, tmp_path):
+    mod = SkillModel(model_dict=model, dataset=data)
+    full_params = mod.generate_full_start_params(params)
+    kwargs = {"nobs": 50, "n_replications": 2, "seed": 0}
+    kwargs["algo_options"] = {"maxiter": 2}
+
+    serial = mod.monte_carlo(full_params, n_workers=1, **kwargs)
+    parallel = mod.monte_carlo(
+        full_params, n_workers=3, checkpoint_dir=tmp_path, **kwargs
+    )
+    aaae(parallel["estimates"], serial["estimates"])
+    assert list(serial["estimates"].columns) == [0, 1]
+    assert serial["estimates"].index.equals(mod.params_index)
+
+    # replication 0 is loaded from its checkpoint, replication 1 runs again.
+    checkpoint = pd.read_pickle(tmp_path / "replication_00000.pickle")
+    checkpoint["estimates"] += 1
+    save_replication(tmp_path, 0, checkpoint)
+    (tmp_path / "replication_00001.pickle").unlink()
+    resumed = mod.monte_carlo(
+        full_params, n_workers=3, checkpoint_dir=tmp_path, **kwargs
+    )
+    aaae(resumed["estimates"][0], serial["estimates"][0] + 1)
+    aaae(resumed["estimates"][1], serial["estimates"][1])
+
+    with_se = mod.monte_carlo(full_params, n_workers=2, se_method="opg", **kwargs)
+    free, _ = mod.start_params_helpers()
+    standard_errors = with_se["standard_errors"]
+    assert standard_errors.index.equals(free.index)
+    assert list(standard_errors.columns) == [0, 1]
+    assert {"mean_se", "coverage"}.issubset(with_se["summary"].columns)
+
+
+@pytest.fixture(scope="module")
+def fitted_two_period_model():
+    """The first two periods of the one-stage model, fitted to simulated data.
+
+    Standard errors are only meaningful at the maximum of an identified model.
+    Therefore the intercepts of the measurements with normalized loadings are
+    normalized as well and the log_ces transition is replaced by a linear one,
+    because standard_errors does not take the probability constraint of its
+    gammas into account. Without controls, the model has few parameters. The
+    data are simulated with small measurement errors, such that the maximum
+    is not on the bounds of the measurement variances.
+
+    """
+    model = copy.deepcopy(model_dicts[0])
+    model["time_specific"] = {"controls": [[], []], "stagemap": [0, 0]}
+    model["factor_specific"]["fac1"]["trans_eq"]["name"] = "linear"
+    for spec in model["factor_specific"].values():
+        spec["measurements"] = spec["measurements"][:2]
+        loadings = spec["normalizations"]["loadings"][:2]
+        spec["normalizations"]["loadings"] = loadings
+        spec["normalizations"]["intercepts"] = [dict.fromkeys(n, 0) for n in loadings]
+
+    two_periods = data.query("period < 2")
+    two_periods.index = two_periods.index.remove_unused_levels()
+    mod = SkillModel(model_dict=model, dataset=two_periods)
+    free, _ = mod.start_params_helpers()
+    true_params = start_params[0].reindex(free.index).fillna(0)
+    true_params.loc["meas_sd", "value"] = 0.25
+    true_params = mod.generate_full_start_params(true_params)
+    sim_data, _ = mod.simulate(nobs=300, params=true_params, seed=0)
+
+    sim_mod = SkillModel(model_dict=model, dataset=sim_data)
+    _, estimates = sim_mod.fit(true_params)
+    return sim_mod, estimates
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("method", ["hessian", "opg", "sandwich"])
+def test_standard_errors(fitted_two_period_model, method):
+    mod, estimates = fitted_two_period_model
+    free, _ = mod.start_params_helpers()
+    cov = mod.standard_errors(estimates, method=method)
+
+    assert cov.index.equals(free.index)
+    assert cov.columns.equals(free.index)
+    aaae(cov, cov.T)
+    assert (np.diag(cov) > 0).all()
+
+
+@pytest.mark.parametrize("model, params, data, model_name", test_cases)
+def test_frames_from_measurement_cube(model, params, data, model_name):
+    data_proc = SkillModel(model_dict=model, dataset=data).data_proc
+    for periods in ["all", 0, [1, 3]]:
+        meas_df = data_proc.measurements_df(periods=periods)
+        aaae(data_proc.measurements_corr(periods=periods), meas_df.corr())
+
+    factor = data_proc.factors[0]
+    meas_df = data_proc.measurements_df(periods=2, factors=factor)
+    scaled = (meas_df - meas_df.mean()) / meas_df.std()
+    for agg_method, expected in [("mean", meas_df), ("scaled", scaled)]:
+        score_df = data_proc.score_df(periods=2, factors=factor, agg_method=agg_method)
+        aaae(score_df[factor], expected.mean(axis=1))
+
+    for periods, agg_method in [("all", "mean"), (1, "means"), ([0, 2], "mean")]:
+        score_df = data_proc.score_df(periods=periods, agg_method=agg_method)
+        calculated = data_proc.score_corr(periods=periods, agg_method=agg_method)
+        pd.testing.assert_frame_equal(calculated, score_df.corr())
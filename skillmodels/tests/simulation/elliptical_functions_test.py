@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_almost_equal as aaae
+from scipy.stats import kendalltau
+
+import skillmodels.simulation._elliptical_functions as ef
+
+
+@pytest.fixture
+def cov():
+    return np.array([[1, 0.5, 0.2], [0.5, 2, 0.3], [0.2, 0.3, 1.5]])
+
+
+@pytest.mark.parametrize("size", [1, 5])
+def test_cov_factor_of_positive_semi_definite_matrix(size):
+    root = np.arange(3 * size).reshape(3, size) / 10
+    cov = root @ root.T
+    factor = ef._cov_factor(cov)
+    aaae(factor @ factor.T, cov)
+
+
+def test_student_t_has_expected_mean_and_covariance(cov):
+    mean = np.array([1, 2, 3])
+    draws = ef._mv_student_t(
+        mean, cov, d_f=10, size=200_000, rng=np.random.default_rng(0)
+    )
+    assert draws.shape == (200_000, 3)
+    aaae(draws.mean(axis=0), mean, decimal=2)
+    aaae(np.cov(draws.T), cov * 10 / 8, decimal=1)
+
+
+def test_student_t_with_zero_covariance_returns_mean():
+    mean = np.array([0.5, 1])
+    draws = ef._mv_student_t(mean, np.zeros((2, 2)), d_f=3, size=4)
+    aaae(draws, np.tile(mean, (4, 1)))
+
+
+def test_elliptical_stable_has_expected_correlation(cov):
+    delta = np.array([1, 0, -1])
+    rng = np.random.default_rng(0)
+    draws = ef._mv_elip_stable(1.9, cov, delta, size=100_000, rng=rng)
+    assert draws.shape == (100_000, 3)
+    aaae(np.median(draws, axis=0), delta, decimal=1)
+    # for elliptical distributions, kendall's tau is 2 / pi * arcsin(correlation)
+    corr = cov[0, 1] / np.sqrt(cov[0, 0] * cov[1, 1])
+    tau = kendalltau(draws[:5000, 0], draws[:5000, 1])[0]
+    aaae(tau, 2 / np.pi * np.arcsin(corr), decimal=1)
+
+
+def test_samplers_are_reproducible_with_generator(cov):
+    first = ef._mv_elip_stable(1.5, cov, np.zeros(3), 10, np.random.default_rng(3))
+    second = ef._mv_elip_stable(1.5, cov, np.zeros(3), 10, np.random.default_rng(3))
+    aaae(first, second)
@@ -539,3 +539,195 @@ def test_simulate_observed_data_with_mock_mix_2(
 ):
     results = sd.simulate_datasets(**set_up_generate_datasets_mock_mix_2)
     adfeq(results[0], expected_dataset_mock_mix_2["observed_data"], check_dtype=False)
+
+
+# =================
+# test add_missings
+# =================
+
+
+@pytest.fixture
+def panel():
+    index = pd.MultiIndex.from_product([range(3), range(4)], names=["id", "period"])
+    data = pd.DataFrame(data=np.ones((12, 3)), columns=["m1", "m2", "c1"], index=index)
+    data.loc[(1, 0), "m1"] = np.nan
+    return data
+
+
+def test_add_missings_all_missing(panel):
+    res = sd.add_missings(panel, ["m1", "m2"], p_b=1, p_r=1)
+    assert res[["m1", "m2"]].isnull().all().all()
+    assert res["c1"].notnull().all()
+
+
+def test_add_missings_persistent_missings(panel):
+    res = sd.add_missings(panel, ["m1", "m2"], p_b=0, p_r=1)
+    expected = panel.copy()
+    expected.loc[1, "m1"] = np.nan
+    adfeq(res, expected)
+
+
+def test_start_factors_from_mixture_drawn_per_component():
+    means = np.array([[0, 0, 1], [5, 5, 1]])
+    dist_arg_dict = [{"mean": m, "cov": np.zeros((3, 3))} for m in means]
+    generate = sd.generate_start_factors_and_control_variables_elliptical
+    start_factors, controls = generate(
+        1000, 2, 1, "multivariate_normal", dist_arg_dict, np.array([0.5, 0.5])
+    )
+    from_first = (start_factors == [0, 0]).all(axis=1)
+    from_second = (start_factors == [5, 5]).all(axis=1)
+    assert (from_first | from_second).all()
+    assert 0 < from_first.sum() < 1000
+    aaae(controls, np.ones((1000, 2)))
+
+
+# =========================
+# test chunked simulation
+# =========================
+
+
+@pytest.fixture
+def set_up_random_2_mix(set_up_generate_datasets_2_mix):
+    out = set_up_generate_datasets_2_mix.copy()
+    out["nobs"] = 23
+    out["dist_arg_dict"] = [
+        {"mean": d["mean"], "cov": np.eye(4)} for d in out["dist_arg_dict"]
+    ]
+    out["shock_sd"] = [np.ones(2)] * (out["nper"] - 1)
+    out["meas_variances"] = out["meas_variances"] + 1
+    return out
+
+
+def test_chunks_equal_single_shot_simulation(set_up_random_2_mix):
+    expected = sd.simulate_datasets(**set_up_random_2_mix, seed=5, chunk_size=10)
+
+    args = set_up_random_2_mix.copy()
+    nobs = args.pop("nobs")
+    chunks = list(sd.iter_simulated_datasets(nobs, chunk_size=10, seed=5, **args))
+    assert [len(chunk[0]) for chunk in chunks] == [30, 30, 9]
+    for i in range(2):
+        adfeq(pd.concat([chunk[i] for chunk in chunks]), expected[i])
+
+
+def test_simulation_with_seed_is_reproducible(set_up_random_2_mix):
+    first = sd.simulate_datasets(**set_up_random_2_mix, seed=5)
+    second = sd.simulate_datasets(**set_up_random_2_mix, seed=5)
+    other = sd.simulate_datasets(**set_up_random_2_mix, seed=6)
+    adfeq(first[0], second[0])
+    assert not np.allclose(first[0], other[0])
+
+
+def test_write_and_read_simulated_datasets(set_up_random_2_mix, tmp_path):
+    args = set_up_random_2_mix.copy()
+    nobs = args.pop("nobs")
+    chunks = sd.iter_simulated_datasets(nobs, chunk_size=10, seed=5, **args)
+    sd.write_simulated_datasets(chunks, tmp_path)
+
+    expected = sd.simulate_datasets(**set_up_random_2_mix, seed=5, chunk_size=10)
+    calculated = sd.read_simulated_datasets(tmp_path)
+    for calc, exp in zip(calculated, expected):
+        adfeq(calc, exp)
+
+
+def test_rewriting_simulated_datasets_removes_old_chunks(set_up_random_2_mix, tmp_path):
+    args = set_up_random_2_mix.copy()
+    nobs = args.pop("nobs")
+    old_chunks = sd.iter_simulated_datasets(nobs, chunk_size=3, seed=1, **args)
+    sd.write_simulated_datasets(old_chunks, tmp_path)
+    chunks = sd.iter_simulated_datasets(nobs, chunk_size=10, seed=5, **args)
+    sd.write_simulated_datasets(chunks, tmp_path)
+
+    expected = sd.simulate_datasets(**set_up_random_2_mix, seed=5, chunk_size=10)
+    calculated = sd.read_simulated_datasets(tmp_path)
+    for calc, exp in zip(calculated, expected):
+        adfeq(calc, exp)
+
+
+def test_parallel_simulation_independent_of_n_workers(set_up_random_2_mix):
+    kwargs = {"seed": 5, "chunk_size": 4}
+    serial = sd.simulate_datasets(**set_up_random_2_mix, **kwargs)
+    parallel = sd.simulate_datasets(**set_up_random_2_mix, n_workers=3, **kwargs)
+    for par, ser in zip(parallel, serial):
+        adfeq(par, ser)
+
+
+def test_simulation_with_generator_as_seed(set_up_random_2_mix):
+    first = sd.simulate_datasets(
+        **set_up_random_2_mix, seed=np.random.default_rng(1), chunk_size=4
+    )
+    second = sd.simulate_datasets(
+        **set_up_random_2_mix, seed=np.random.default_rng(1), chunk_size=4
+    )
+    adfeq(first[0], second[0])
+
+
+def test_arrays_output_equals_frames(set_up_random_2_mix):
+    kwargs = {"seed": 5, "chunk_size": 10}
+    observed_data, latent_data = sd.simulate_datasets(**set_up_random_2_mix, **kwargs)
+    y_data, c_data, factors = sd.simulate_datasets(
+        **set_up_random_2_mix, output="arrays", **kwargs
+    )
+    nobs, nper = set_up_random_2_mix["nobs"], set_up_random_2_mix["nper"]
+    assert y_data.shape == (len(set_up_random_2_mix["loadings_df"]), nobs)
+    assert len(c_data) == nper
+
+    for i, (period, name) in enumerate(set_up_random_2_mix["loadings_df"].index):
+        aaae(y_data[i], observed_data.xs(period, level="period")[name])
+    controls = ["constant"] + set_up_random_2_mix["control_names"]
+    aaae(c_data[0], observed_data.xs(0, level="period")[controls])
+    for t in range(nper):
+        latent = latent_data.xs(t, level="period")
+        aaae(factors[t], latent[set_up_random_2_mix["factor_names"]])
+
+
+def test_invalid_output_raises_error(set_up_random_2_mix):
+    with pytest.raises(ValueError):
+        sd.simulate_datasets(**set_up_random_2_mix, output="dict")
+
+
+# ==========================
+# test policy scenarios
+# ==========================
+
+
+@pytest.fixture
+def set_up_scenarios(set_up_random_2_mix):
+    keys = [
+        "nobs",
+        "factor_names",
+        "control_names",
+        "nper",
+        "transition_names",
+        "transition_argument_dicts",
+        "shock_sd",
+        "dist_name",
+        "dist_arg_dict",
+        "weights",
+    ]
+    return {key: set_up_random_2_mix[key] for key in keys}
+
+
+def test_scenarios_use_common_random_numbers(set_up_scenarios):
+    fac = set_up_scenarios["factor_names"][0]
+    deterministic = {"period": 0, "factor": fac, "effect_size": 2}
+    deterministic["standard_deviation"] = 0
+    stochastic = {**deterministic, "standard_deviation": 1}
+    scenarios = {"none": None, "same": [], "det": deterministic, "stoch": stochastic}
+    res = sd.simulate_policy_scenarios(scenarios, seed=3, **set_up_scenarios)
+
+    adfeq(res.loc["none"], res.loc["same"])
+    diff = res.loc["det"] - res.loc["none"]
+    aaae(diff.loc[(0, fac)], [2, 0, 2, 2, 2])
+    # with linear transitions, the policy shifts all individuals by the same amount
+    later = diff.loc[(1, set_up_scenarios["factor_names"][1])]
+    assert later["mean"] != 0
+    aaae(later.drop("mean"), [0] + [later["mean"]] * 3)
+    assert list(res.columns) == ["mean", "std", "10%", "50%", "90%"]
+
+
+def test_scenario_results_do_not_depend_on_other_scenarios(set_up_scenarios):
+    fac = set_up_scenarios["factor_names"][1]
+    policy = {"period": 1, "factor": fac, "effect_size": 1, "standard_deviation": 0.5}
+    alone = sd.simulate_policy_scenarios([policy], seed=4, **set_up_scenarios)
+    together = sd.simulate_policy_scenarios([None, policy], seed=4, **set_up_scenarios)
+    adfeq(alone.loc[0], together.loc[1])
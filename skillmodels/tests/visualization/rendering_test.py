@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import pytest
+
+from skillmodels import SkillModel
+from skillmodels.visualization.rendering import load_manifest
+from skillmodels.visualization.rendering import render_jobs
+
+
+class FakeDataProcessor:
+    def __init__(self, value):
+        self.data = pd.DataFrame({"m1": [value, 2.0]})
+
+    def cache_scores(self, agg_methods):
+        pass
+
+
+class FakeModel:
+    """Picklable stand-in for a SkillModel whose figures are text files."""
+
+    def __init__(self, value=1.0):
+        self.data_proc = FakeDataProcessor(value)
+        self.model_dict = {"factor_specific": {"fac1": {}}}
+
+    def figure(self, label, save_path, write_tex=False):
+        plt.figure()
+        Path(save_path).write_text(label)
+        if write_tex:
+            Path(save_path).with_suffix(".tex").write_text(label)
+
+
+@pytest.fixture
+def jobs():
+    return [
+        {
+            "method": "figure",
+            "file": f"fig_{i}.png",
+            "kwargs": {"label": str(i), "write_tex": True},
+        }
+        for i in range(3)
+    ]
+
+
+def test_unchanged_jobs_are_not_rendered_again(jobs, tmp_path):
+    model = FakeModel()
+    assert len(render_jobs(model, jobs, tmp_path, n_workers=1)) == 3
+    assert render_jobs(model, jobs, tmp_path, n_workers=1) == []
+    assert sorted(load_manifest(tmp_path)) == ["fig_0.png", "fig_1.png", "fig_2.png"]
+
+
+def test_changed_options_missing_files_and_data_trigger_rendering(jobs, tmp_path):
+    model = FakeModel()
+    render_jobs(model, jobs, tmp_path, n_workers=1)
+
+    jobs[0]["kwargs"]["label"] = "changed"
+    (tmp_path / "fig_1.png").unlink()
+    assert render_jobs(model, jobs, tmp_path, n_workers=1) == ["fig_0.png", "fig_1.png"]
+    assert (tmp_path / "fig_0.png").read_text() == "changed"
+
+    assert len(render_jobs(FakeModel(value=3.0), jobs, tmp_path, n_workers=1)) == 3
+
+
+def test_render_in_processes(jobs, tmp_path):
+    render_jobs(FakeModel(), jobs, tmp_path, n_workers=2)
+    for i in range(3):
+        assert (tmp_path / f"fig_{i}.png").read_text() == str(i)
+        assert (tmp_path / f"fig_{i}.tex").exists()
+    assert render_jobs(FakeModel(), jobs, tmp_path, n_workers=2) == []
+    assert len(render_jobs(FakeModel(), jobs, tmp_path, incremental=False)) == 3
+
+
+def test_figures_of_the_caller_stay_open(jobs, tmp_path):
+    fig = plt.figure()
+    render_jobs(FakeModel(), jobs, tmp_path, n_workers=1)
+    assert plt.get_fignums() == [fig.number]
+    plt.close(fig)
+
+
+@pytest.fixture
+def skill_model():
+    with open("skillmodels/tests/regression/test_model_one_stage.json") as j:
+        model_dict = json.load(j)
+    data = pd.read_stata("skillmodels/tests/regression/chs_test_ex2.dta")
+    data["period"] = data["period"].astype(int)
+    data["id"] = data["id"].astype(int)
+    data.loc[data["period"] != 7, "Q1"] = np.nan
+    data.set_index(["id", "period"], inplace=True)
+    return SkillModel(model_dict=model_dict, dataset=data)
+
+
+def test_render_skill_model_in_processes(skill_model, tmp_path):
+    jobs = [
+        {
+            "method": "measurement_heatmap",
+            "file": f"meas_heat_in_period_{period}.png",
+            "kwargs": {"periods": period, "write_tex": True},
+        }
+        for period in [0, 1]
+    ]
+    jobs.append(
+        {
+            "method": "score_heatmap",
+            "file": "score_heat_for_factor_fac1.png",
+            "kwargs": {"factors": "fac1", "agg_method": "means", "write_tex": True},
+        }
+    )
+
+    rendered = render_jobs(skill_model, jobs, tmp_path, n_workers=2)
+    assert sorted(rendered) == sorted(job["file"] for job in jobs)
+    for job in jobs:
+        assert (tmp_path / job["file"]).stat().st_size > 0
+        assert (tmp_path / job["file"]).with_suffix(".tex").exists()
+    assert sorted(load_manifest(tmp_path)) == sorted(job["file"] for job in jobs)
+    assert render_jobs(skill_model, jobs, tmp_path, n_workers=2) == []
@@ -0,0 +1,138 @@
+"""Render the figures and tables of a model visualization.
+
+Each figure or table is described by a job, a dictionary with the name of the
+SkillModel method that creates it ("method"), its keyword arguments except for
+save_path ("kwargs") and the name of the file it is saved to ("file").
+
+Jobs are rendered in a pool of processes. The hash of the dataset, the model
+specification and the job is stored in a manifest in the output directory. A
+job whose hash did not change since the last run and whose files exist is not
+rendered again.
+
+"""
+import hashlib
+import json
+from multiprocessing import Pool
+from pathlib import Path
+
+import pandas as pd
+
+MANIFEST_NAME = "visualization_hashes.json"
+
+# model of a worker process. It is set once per process by _init_worker.
+_worker_model = None
+
+
+def model_hash(model):
+    """Hash of the dataset and the model specification of a SkillModel."""
+    data_hash = pd.util.hash_pandas_object(model.data_proc.data, index=True)
+    digest = hashlib.sha256(data_hash.to_numpy().tobytes())
+    digest.update(json.dumps(model.model_dict, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def job_hash(base_hash, job):
+    """Hash of a job given the hash of its model."""
+    content = [base_hash, job["method"], job["file"], job["kwargs"]]
+    content = json.dumps(content, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def job_outputs(job):
+    """Files written by a job: the file itself and its tex snippet."""
+    file = Path(job["file"])
+    return sorted({file.name, file.with_suffix(".tex").name})
+
+
+def load_manifest(directory):
+    path = Path(directory) / MANIFEST_NAME
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(directory, manifest):
+    with open(Path(directory) / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+
+
+def render_jobs(model, jobs, directory, n_workers=None, incremental=True):
+    """Render the jobs whose inputs changed since the last run.
+
+    Args:
+        model (SkillModel): the model whose methods create the figures.
+        jobs (list): list of jobs as described in the module docstring.
+        directory (str or pathlib.Path): directory to which the files are saved.
+        n_workers (int): number of processes. Default None, which uses the
+            number of CPUs. With 1, jobs are rendered in the current process.
+        incremental (bool): If False, all jobs are rendered.
+
+    Returns:
+        rendered (list): files of the rendered jobs.
+
+    """
+    directory = Path(directory)
+    base_hash = model_hash(model)
+    hashes = {job["file"]: job_hash(base_hash, job) for job in jobs}
+    old_manifest = load_manifest(directory) if incremental else {}
+
+    def is_current(job):
+        files_exist = all((directory / f).exists() for f in job_outputs(job))
+        return files_exist and old_manifest.get(job["file"]) == hashes[job["file"]]
+
+    manifest = {job["file"]: hashes[job["file"]] for job in jobs if is_current(job)}
+    stale = [job for job in jobs if job["file"] not in manifest]
+    tasks = [(job["method"], _with_save_path(job, directory)) for job in stale]
+
+    try:
+        if n_workers == 1 or len(tasks) <= 1:
+            for job, (method, kwargs) in zip(stale, tasks):
+                _render(method, kwargs, model)
+                manifest[job["file"]] = hashes[job["file"]]
+        elif tasks:
+            # scores that are used by several figures are calculated once and
+            # passed to the workers together with the model.
+            agg_methods = {t[1]["agg_method"] for t in tasks if "agg_method" in t[1]}
+            model.data_proc.cache_scores(sorted(agg_methods))
+            pool_tasks = [(job["file"], *task) for job, task in zip(stale, tasks)]
+            with Pool(n_workers, initializer=_init_worker, initargs=(model,)) as pool:
+                for file in pool.imap_unordered(_render_in_worker, pool_tasks):
+                    manifest[file] = hashes[file]
+    finally:
+        save_manifest(directory, manifest)
+
+    return [job["file"] for job in stale]
+
+
+def _with_save_path(job, directory):
+    return {**job["kwargs"], "save_path": str(directory / job["file"])}
+
+
+def _init_worker(model):
+    global _worker_model
+    import matplotlib
+
+    matplotlib.use("Agg")
+    _worker_model = model
+
+
+def _render_in_worker(task):
+    file, method, kwargs = task
+    _render(method, kwargs)
+    return file
+
+
+def _render(method, kwargs, model=None):
+    import matplotlib.pyplot as plt
+
+    if model is None:
+        # a worker process only holds the figures of its jobs.
+        getattr(_worker_model, method)(**kwargs)
+        plt.close("all")
+    else:
+        # in the current process, the figures of the caller stay open.
+        open_figures = set(plt.get_fignums())
+        getattr(model, method)(**kwargs)
+        for num in set(plt.get_fignums()) - open_figures:
+            plt.close(num)